@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Benchmarks
+Microbenchmarks für TaskManager, Dispatch-Loop und TUI auf synthetischen DAGs
+
+Usage:
+  python bench/run_bench.py                         # 1k + 10k, alle Formen
+  python bench/run_bench.py --sizes 1000,10000,100000 --backend sqlite
+  python bench/run_bench.py --shapes random --fan-in 4 --latency exponential:0.01
+  python bench/run_bench.py --compare alt.json neu.json [--threshold 0.15]
+
+Gemessen pro Backend, DAG-Form und Größe:
+
+- add_task         µs pro Task (Projekt mit size Tasks anlegen)
+- get_ready_tasks  ms pro Aufruf (Median über --repeat)
+- get_status       ms pro Aufruf
+- complete_task    µs pro Task (assign + complete, Welle für Welle)
+- run_parallel     Tasks/s (Stub-Agent, --parallel Slots)
+- run_loop         Tasks/s für thread und async (ganzer DAG, max. --loop-tasks)
+- tui_render       ms pro Frame mit einer geänderten Zeile (nur mit rich)
+
+Ergebnis ist JSON (Commit, Python, Plattform, Parameter, Messwerte) unter
+bench/results/<commit>.json. --compare vergleicht zwei Läufe und endet mit
+Exit-Code 1, wenn ein Wert um mehr als --threshold schlechter ist.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / "core"))
+sys.path.insert(0, str(BENCH_DIR.parent / "ui"))
+
+from workload import (LATENCY_DISTRIBUTIONS, SHAPES, LatencyModel,
+                      StubExecutor, generate_dag, populate)
+from task_manager import TaskManager
+from agent_orchestrator import create_orchestrator
+
+try:
+    from rich.console import Console
+    from jarvis_tui import JarvisTUI
+    RICH_AVAILABLE = True
+except ImportError:
+    RICH_AVAILABLE = False
+
+SCHEMA_VERSION = 1
+
+
+class BenchTaskManager(TaskManager):
+    """TaskManager mit Config-Overrides (Backend, Safeguards)"""
+
+    def __init__(self, project_path: str, overrides: Dict):
+        self._overrides = overrides
+        super().__init__(project_path)
+
+    def _load_config(self) -> Dict:
+        config = super()._load_config()
+        _merge(config, self._overrides)
+        return config
+
+
+class Benchmarks:
+    """Führt alle Benchmarks einer Konfiguration aus und sammelt Ergebnisse"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.results: List[Dict] = []
+        self.workdir = Path(tempfile.mkdtemp(prefix="jarvis-bench-"))
+        distribution, _, mean = args.latency.partition(":")
+        self.latency = (distribution, float(mean or 0))
+
+    def run(self) -> Dict:
+        started = time.perf_counter()
+        try:
+            for backend in self.args.backend:
+                for shape in self.args.shapes:
+                    for size in self.args.sizes:
+                        self._log(f"⏱️  {backend} {shape} {size}")
+                        self._bench_task_manager(backend, shape, size)
+                        if shape == self.args.shapes[0]:
+                            self._bench_run_parallel(backend, size)
+                        for engine in ("thread", "async"):
+                            self._bench_run_loop(backend, shape, size, engine)
+                        self._bench_tui(backend, shape, size)
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        return {
+            "schema": SCHEMA_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "git": _git_info(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "sizes": self.args.sizes, "shapes": self.args.shapes,
+                "backends": self.args.backend, "fan_in": self.args.fan_in,
+                "seed": self.args.seed, "repeat": self.args.repeat,
+                "latency": self.args.latency, "parallel": self.args.parallel,
+                "loop_tasks": self.args.loop_tasks,
+                "complete_limit": self.args.complete_limit
+            },
+            "duration_sec": round(time.perf_counter() - started, 3),
+            "results": self.results
+        }
+
+    # --- Benchmarks ---
+
+    def _bench_task_manager(self, backend: str, shape: str, size: int) -> None:
+        """add_task, get_ready_tasks, get_status, complete_task"""
+        tm = self._project(backend)
+        dag = generate_dag(shape, size, self.args.fan_in, self.args.seed)
+        started = time.perf_counter()
+        populate(tm, dag)
+        elapsed = time.perf_counter() - started
+        key = (backend, shape, size)
+        self._record("add_task", key, "us", elapsed / size * 1e6,
+                     {"total_sec": round(elapsed, 4)})
+
+        self._record_timings("get_ready_tasks", key,
+                             self._repeat(tm.get_ready_tasks))
+        self._record_timings("get_status", key, self._repeat(tm.get_status))
+
+        # Welle für Welle: bereite Tasks zuweisen und abschließen
+        limit = min(size, self.args.complete_limit)
+        completed, elapsed = 0, 0.0
+        while completed < limit:
+            ready = tm.get_ready_tasks()
+            if not ready:
+                break
+            for task in ready[:limit - completed]:
+                started = time.perf_counter()
+                tm.assign_task(task["id"], "coding-agent")
+                tm.complete_task(task["id"], f"Task {task['id']} done", 0.0)
+                elapsed += time.perf_counter() - started
+                completed += 1
+        tm.flush()
+        if completed:
+            self._record("complete_task", key, "us", elapsed / completed * 1e6,
+                         {"tasks": completed})
+        self._close(tm)
+
+    def _bench_run_parallel(self, backend: str, size: int) -> None:
+        """
+        Durchsatz von run_parallel (ohne Dependencies und Persistenz, daher
+        nur einmal pro Größe, als Form "wide")
+        """
+        tm = self._project(backend)
+        populate(tm, generate_dag("wide", min(size, self.args.loop_tasks)))
+        tasks = tm.get_ready_tasks()
+        orchestrator = self._orchestrator(tm, "thread")
+        started = time.perf_counter()
+        result = orchestrator.run_parallel(tasks, self.args.parallel)
+        elapsed = time.perf_counter() - started
+        self._record("run_parallel", (backend, "wide", size), "tasks_per_sec",
+                     len(result["completed"]) / elapsed,
+                     {"tasks": len(tasks), "total_sec": round(elapsed, 4)},
+                     better="higher")
+        self._close(tm)
+
+    def _bench_run_loop(self, backend: str, shape: str, size: int,
+                        engine: str) -> None:
+        """Ganzer DAG durch den Dispatch-Loop (inkl. Persistenz)"""
+        tm = self._project(backend)
+        count = min(size, self.args.loop_tasks)
+        populate(tm, generate_dag(shape, count, self.args.fan_in,
+                                  self.args.seed))
+        orchestrator = self._orchestrator(tm, engine)
+        started = time.perf_counter()
+        result = orchestrator.run_loop(tm, max_parallel=self.args.parallel)
+        elapsed = time.perf_counter() - started
+        done = len(result["completed"])
+        self._record(f"run_loop_{engine}", (backend, shape, size),
+                     "tasks_per_sec", done / elapsed,
+                     {"tasks": count, "completed": done,
+                      "failed": len(result["failed"]),
+                      "total_sec": round(elapsed, 4)},
+                     better="higher")
+        self._close(tm)
+
+    def _bench_tui(self, backend: str, shape: str, size: int) -> None:
+        """Ein TUI-Frame: collect_status + update_display (nur mit rich)"""
+        if not RICH_AVAILABLE:
+            self._log("   tui_render übersprungen (rich nicht installiert)")
+            return
+        tm = self._project(backend)
+        populate(tm, generate_dag(shape, size, self.args.fan_in,
+                                  self.args.seed))
+        tui = JarvisTUI(str(tm.project_path))
+        tui.task_manager = tm
+        tui.console = Console(file=io.StringIO(), width=160, height=50,
+                              force_terminal=True)
+        tui.start_display(screen=False)
+        frames = itertools.count()
+
+        def frame() -> None:
+            # Pro Frame ändert sich eine sichtbare Zeile (sonst zeichnet
+            # das differenzielle Rendering gar nicht)
+            status = tui.collect_status(tm)
+            status["tasks_detail"][0]["status"] = (
+                "in_progress" if next(frames) % 2 else "pending")
+            tui.update_display(status)
+            tui.console.file.seek(0)
+            tui.console.file.truncate()
+
+        timings = self._repeat(frame)
+        tui.stop_display()  # Live leitet stdout bis dahin um
+        self._record_timings("tui_render", (backend, shape, size), timings)
+        self._close(tm)
+
+    # --- Hilfen ---
+
+    def _project(self, backend: str) -> TaskManager:
+        path = Path(tempfile.mkdtemp(dir=self.workdir))
+        tm = BenchTaskManager(str(path), {
+            "storage": {"backend": backend},
+            "safeguards": {"max_iterations": 10 ** 9,
+                           "max_total_cost_usd": 10 ** 9},
+            "tracing": {"enabled": False}
+        })
+        tm.create_project("bench", "synthetischer Workload")
+        return tm
+
+    @staticmethod
+    def _close(tm: TaskManager) -> None:
+        """Store schließen und Projekt löschen (kein flush mehr bei exit)"""
+        tm.close()
+        shutil.rmtree(tm.project_path, ignore_errors=True)
+
+    def _orchestrator(self, tm: TaskManager, engine: str):
+        orchestrator = create_orchestrator(str(tm.project_path), tm.config,
+                                           engine)
+        orchestrator.log_handler = lambda message: None
+        distribution, mean = self.latency
+        orchestrator.executor = StubExecutor(
+            LatencyModel(distribution, mean, seed=self.args.seed),
+            seed=self.args.seed)
+        return orchestrator
+
+    def _repeat(self, function: Callable[[], object]) -> List[float]:
+        timings = []
+        for _ in range(self.args.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def _record_timings(self, bench: str, key: tuple,
+                        timings: List[float]) -> None:
+        ms = sorted(value * 1000 for value in timings)
+        self._record(bench, key, "ms", statistics.median(ms), {
+            "mean": round(statistics.fmean(ms), 4),
+            "min": round(ms[0], 4),
+            "p95": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+            "repeat": len(ms)})
+
+    def _record(self, bench: str, key: tuple, unit: str, value: float,
+                extra: Dict = None, better: str = "lower") -> None:
+        backend, shape, size = key
+        self.results.append({
+            "bench": bench, "backend": backend, "shape": shape, "size": size,
+            "unit": unit, "value": round(value, 4), "better": better,
+            **({"extra": extra} if extra else {})})
+        self._log(f"   {bench:<16} {value:12.3f} {unit}")
+
+    @staticmethod
+    def _log(message: str) -> None:
+        print(message, file=sys.stderr)
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> List[Dict]:
+    """Vergleicht zwei Läufe; ratio > 1 heißt schlechter (auch bei Tasks/s)"""
+    def key(result: Dict) -> tuple:
+        return (result["bench"], result["backend"], result["shape"],
+                result["size"])
+
+    baseline = {key(result): result for result in old["results"]}
+    rows = []
+    for result in new["results"]:
+        before = baseline.get(key(result))
+        if before is None or not before["value"] or not result["value"]:
+            continue
+        ratio = result["value"] / before["value"]
+        if result["better"] == "higher":
+            ratio = 1 / ratio
+        rows.append({"key": key(result), "unit": result["unit"],
+                     "change": result["value"] / before["value"] - 1,
+                     "before": before["value"], "after": result["value"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+
+def format_comparison(rows: List[Dict], old: Dict, new: Dict) -> str:
+    lines = [f"📊 {_commit_label(old)} -> {_commit_label(new)}"]
+    if old.get("params") != new.get("params"):
+        lines.append("⚠️  Unterschiedliche Parameter - Werte nur bedingt "
+                     "vergleichbar")
+    lines.append(f"{'Benchmark':<44} {'vorher':>12} {'nachher':>12}  Änderung")
+    for row in rows:
+        bench, backend, shape, size = row["key"]
+        name = f"{bench} {backend}/{shape}/{size}"
+        marker = "  ❌" if row["regression"] else ""
+        lines.append(f"{name:<44} {row['before']:>12.3f} {row['after']:>12.3f}"
+                     f"  {row['change'] * 100:+6.1f}% {row['unit']}{marker}")
+    regressions = sum(row["regression"] for row in rows)
+    lines.append(f"\n{regressions} Regression(en) bei {len(rows)} Vergleichen")
+    return "\n".join(lines)
+
+
+def _commit_label(run: Dict) -> str:
+    git = run.get("git") or {}
+    commit = (git.get("commit") or "?")[:10]
+    return commit + ("+dirty" if git.get("dirty") else "")
+
+
+def _git_info() -> Dict:
+    """Commit und ob jarvis-loop/ lokale Änderungen hat"""
+    root = BENCH_DIR.parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root,
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."],
+                               cwd=root, capture_output=True, text=True,
+                               check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": bool(dirty)}
+
+
+def _merge(target: Dict, overrides: Dict) -> None:
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def _csv(text: str, cast=str) -> List:
+    return [cast(item) for item in text.split(",") if item]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JARVIS Loop Benchmarks")
+    parser.add_argument("--sizes", type=lambda text: _csv(text, int),
+                        default=[1000, 10000],
+                        help="Anzahl Tasks, kommagetrennt (default: 1000,10000)")
+    parser.add_argument("--shapes", type=_csv, default=list(SHAPES),
+                        help=f"DAG-Formen: {','.join(SHAPES)}")
+    parser.add_argument("--backend", type=_csv, default=["json"],
+                        help="Storage-Backends: json,sqlite")
+    parser.add_argument("--fan-in", type=int, default=2,
+                        help="Dependencies pro Task (deep/diamond/random)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Wiederholungen für get_ready_tasks/get_status/TUI")
+    parser.add_argument("--latency", default="constant:0",
+                        help="Stub-Agent: <verteilung>:<mittel_sec> mit "
+                             f"{'|'.join(LATENCY_DISTRIBUTIONS)}")
+    parser.add_argument("--parallel", type=int, default=8,
+                        help="Slots für run_parallel/run_loop")
+    parser.add_argument("--loop-tasks", type=int, default=2000,
+                        help="Höchstens so viele Tasks für run_parallel/run_loop")
+    parser.add_argument("--complete-limit", type=int, default=10000,
+                        help="Höchstens so viele complete_task-Aufrufe")
+    parser.add_argument("--out", help="Ergebnisdatei (default: "
+                                      "bench/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("ALT", "NEU"),
+                        help="Zwei Ergebnisdateien vergleichen")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Erlaubte Verschlechterung für --compare (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(Path(path).read_text(encoding="utf-8"))
+                    for path in args.compare)
+        rows = compare(old, new, args.threshold)
+        print(format_comparison(rows, old, new))
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    unknown = set(args.shapes) - set(SHAPES)
+    if unknown:
+        parser.error(f"Unbekannte DAG-Form: {', '.join(sorted(unknown))}")
+    if args.latency.partition(":")[0] not in LATENCY_DISTRIBUTIONS:
+        parser.error(f"Unbekannte Latenz-Verteilung: {args.latency}")
+
+    report = Benchmarks(args).run()
+    commit = (report["git"]["commit"] or "nogit")[:12]
+    out = Path(args.out) if args.out else BENCH_DIR / "results" / (
+        f"{commit}{'-dirty' if report['git']['dirty'] else ''}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"💾 {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
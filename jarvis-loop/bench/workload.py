@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Benchmark Workloads
+Synthetische Task-DAGs und ein In-Process Stub-Agent
+
+DAG-Formen (generate_dag liefert pro Task die Indizes seiner Dependencies,
+immer auf frühere Tasks - also zyklenfrei):
+
+- wide:    keine Dependencies, alles sofort bereit
+- deep:    Kette, jeder Task hängt an den fan_in Vorgängern
+- diamond: Quelle -> fan_in parallele Tasks -> Senke, aneinandergereiht
+- random:  je Task bis zu fan_in zufällige frühere Tasks (seed)
+
+StubExecutor ersetzt tools/stub_agent.py, wenn der Prozessstart nicht
+mitgemessen werden soll: Latenz aus einer Verteilung, Fehlerquote, Kosten.
+"""
+
+import asyncio
+import math
+import random
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
+
+from executors import AgentExecutor, OutputCallback
+from task_manager import TaskManager
+
+SHAPES = ("wide", "deep", "diamond", "random")
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal",
+                         "pareto")
+TASK_TYPES = ("coding", "testing", "docs", "review")
+
+
+def generate_dag(shape: str, size: int, fan_in: int = 2,
+                 seed: int = 0) -> List[List[int]]:
+    """Dependencies (Indizes früherer Tasks) für size Tasks"""
+    if shape not in SHAPES:
+        raise ValueError(f"Unbekannte DAG-Form: {shape}")
+    fan_in = max(1, fan_in)
+    rng = random.Random(seed)
+    dag: List[List[int]] = []
+    for index in range(size):
+        if shape == "wide" or index == 0:
+            dag.append([])
+        elif shape == "deep":
+            dag.append(list(range(max(0, index - fan_in), index)))
+        elif shape == "diamond":
+            # Block aus Quelle, fan_in Mitte, Senke (= Quelle des nächsten)
+            position = (index - 1) % (fan_in + 1)
+            source = index - 1 - position
+            if position < fan_in:
+                dag.append([source])
+            else:
+                dag.append(list(range(source + 1, index)))
+        else:
+            count = min(fan_in, index)
+            dag.append(sorted(rng.sample(range(index), count)))
+    return dag
+
+
+def populate(task_manager: TaskManager, dag: List[List[int]]) -> List[int]:
+    """Legt die Tasks eines DAGs an, gibt ihre IDs zurück"""
+    ids: List[int] = []
+    for index, dependencies in enumerate(dag):
+        ids.append(task_manager.add_task(
+            f"Task {index}", TASK_TYPES[index % len(TASK_TYPES)],
+            [ids[dep] for dep in dependencies], estimated_cost=0.01))
+    return ids
+
+
+class LatencyModel:
+    """Latenz in Sekunden aus einer Verteilung mit Mittelwert mean_sec"""
+
+    def __init__(self, distribution: str = "constant", mean_sec: float = 0.0,
+                 sigma: float = 0.5, seed: int = 0):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unbekannte Latenz-Verteilung: {distribution}")
+        self.distribution = distribution
+        self.mean_sec = mean_sec
+        self.sigma = sigma
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.mean_sec <= 0:
+            return 0.0
+        with self._lock:
+            rng = self._random
+            if self.distribution == "constant":
+                return self.mean_sec
+            if self.distribution == "uniform":
+                return rng.uniform(0, 2 * self.mean_sec)
+            if self.distribution == "exponential":
+                return rng.expovariate(1 / self.mean_sec)
+            if self.distribution == "lognormal":
+                mu = math.log(self.mean_sec) - self.sigma ** 2 / 2
+                return rng.lognormvariate(mu, self.sigma)
+            # pareto: schwerer Tail (alpha 1 + 1/sigma), gleicher Mittelwert
+            alpha = 1 + 1 / max(self.sigma, 1e-6)
+            return self.mean_sec * (alpha - 1) / alpha * rng.paretovariate(alpha)
+
+
+class StubExecutor(AgentExecutor):
+    """Agent ohne Kindprozess: wartet laut LatencyModel, meldet Kosten"""
+
+    name = "stub"
+
+    def __init__(self, latency: LatencyModel = None, fail_rate: float = 0.0,
+                 cost_usd: float = 0.0, seed: int = 0):
+        self.latency = latency or LatencyModel()
+        self.fail_rate = fail_rate
+        self.cost_usd = cost_usd
+        self._random = random.Random(seed)
+
+    def run(self, task: Dict, agent_type: str, prompt: str,
+            on_output: OutputCallback = None,
+            cancel: threading.Event = None) -> Dict:
+        cancel = cancel or threading.Event()
+        delay = self.latency.sample()
+        if delay and cancel.wait(delay):
+            return self._result(task, agent_type, False, error="cancelled")
+        return self._outcome(task, agent_type)
+
+    async def run_async(self, task: Dict, agent_type: str, prompt: str,
+                        on_output: OutputCallback = None) -> Dict:
+        await asyncio.sleep(self.latency.sample())
+        return self._outcome(task, agent_type)
+
+    def _outcome(self, task: Dict, agent_type: str) -> Dict:
+        if self.fail_rate and self._random.random() < self.fail_rate:
+            return self._result(task, agent_type, False, error="stub failure",
+                                cost=self.cost_usd, exit_code=1)
+        return self._result(task, agent_type, True,
+                            output=f"Task {task['id']} done",
+                            cost=self.cost_usd, exit_code=0)
@@ -6,10 +6,25 @@ Multi-Agent Coordination wie in Ralph Loop [10:02]
 
 import json
 import time
+import threading
 import subprocess
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import (Future, ThreadPoolExecutor, as_completed,
+                                wait, FIRST_COMPLETED)
+
+from scheduling import SchedulingPolicy, create_policy
+from concurrency import AIMDController, create_controller
+from budget import BudgetLedger
+from result_cache import ResultCache, create_cache, digest
+from leases import LeaseKeeper
+from retry import RetryPolicy, TimerWheel, create_retry_policy
+from hedging import Hedger, create_hedger
+from batching import TaskBatcher, create_batcher
+from executors import AgentExecutor, SimulatedExecutor, create_executor
+from metrics import LoopMetrics
+from tracing import Tracer, create_tracer
+from profiling import LoopProfiler
 
 
 class AgentOrchestrator:
@@ -20,12 +35,41 @@ class AgentOrchestrator:
     - Session Management
     """
     
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, config: Dict = None):
         self.project_path = project_path
+        self.config = config
+        self.executor: Optional[AgentExecutor] = None
         self.active_agents = {}  # agent_id -> process
+        self._cancel: Dict[int, threading.Event] = {}  # task_id -> Abbruch
         self.completed_tasks = []
         self.failed_tasks = []
         
+        # Dispatch-Loop Steuerung (run_loop)
+        self.log_handler: Callable[[str], None] = print
+        self._stop = threading.Event()
+        self._dispatch_allowed = threading.Event()
+        self._dispatch_allowed.set()
+        self.policy: Optional[SchedulingPolicy] = None
+        self._started: Dict[int, float] = {}  # task_id -> monotonic start
+        self.concurrency: Optional[AIMDController] = None
+        self._in_flight_by_type: Dict[str, int] = {}
+        self._monitor: Optional["SafeguardMonitor"] = None
+        self._budget_blocked: set = set()  # Tasks ohne Budget-Zulassung
+        self.cache: Optional[ResultCache] = None
+        self._cache_keys: Dict[int, str] = {}  # task_id -> Cache-Schlüssel
+        self._cache_generation = ""  # project.created_at
+        self.retry_policy: Optional[RetryPolicy] = None
+        self.retries = TimerWheel()  # task_id -> fälliger Retry
+        self.hedger: Optional[Hedger] = None
+        # task_id -> {future: cancel()} solange Original + Duplikat laufen
+        self._twins: Dict[int, Dict] = {}
+        self._hedge_futures: set = set()
+        self._hedge_decided: set = set()  # Gewinner bereits gemeldet
+        self.batcher: Optional[TaskBatcher] = None
+        self.metrics: Optional[LoopMetrics] = None  # nur mit --metrics-port
+        self.tracer: Optional[Tracer] = None  # nur mit tracing.enabled
+        self.profiler: Optional[LoopProfiler] = None  # nur mit --profile
+        
     def select_agent(self, task_type: str) -> str:
         """Wählt besten Agent für Task-Typ"""
         agent_map = {
@@ -48,44 +92,55 @@ class AgentOrchestrator:
         task_id = task["id"]
         title = task["title"]
         
-        print(f"🚀 Spawning {agent_type} für Task #{task_id}: {title}")
+        self._log(f"🚀 Spawning {agent_type} für Task #{task_id}: {title}")
         
-        # Erstelle Sub-Agent Task
-        subagent_task = f"""
+        # Prozess selbst startet der Executor (_execute_task)
+        agent_info = {
+            "task_id": task_id,
+            "agent_type": agent_type,
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            "session_id": f"agent-{task_id}-{int(time.time())}"
+        }
+        
+        self.active_agents[task_id] = agent_info
+        if self.tracer is not None:
+            self.tracer.spawn(task_id)
+        
+        return agent_info
+    
+    def build_prompt(self, task: Dict) -> str:
+        """Prompt für den Sub-Agent (bei Batches: gemeinsamer Prompt)"""
+        if "batch" in task:
+            return self.batcher.build_prompt(task, self.build_prompt)
+        task_id = task["id"]
+        title = task["title"]
+        project = task.get("workdir", self.project_path)  # Hedge: eigene Kopie
+        safeguards = (self.config or {}).get("safeguards", {})
+        max_minutes = safeguards.get("max_time_per_task_min", 30)
+        
+        return f"""
 JARVIS LOOP TASK #{task_id}: {title}
 
 Kontext:
-- Projekt: {self.project_path}
+- Projekt: {project}
 - Task Type: {task['type']}
 - Beschreibung: {task.get('description', title)}
 
 Deine Mission:
 1. Führe diesen Task vollständig aus
-2. Speichere Ergebnisse in {self.project_path}/output/{task_id}/
-3. Aktualisiere {self.project_path}/tasks.json Status auf 'done'
-4. Bei Fehlern: Status auf 'failed' setzen + Fehlermeldung
+2. Speichere Ergebnisse in {project}/output/{task_id}/
+3. tasks.json NICHT selbst bearbeiten - der Orchestrator setzt den Status
+4. Bei Fehlern: mit Fehlermeldung und Exit-Code != 0 beenden
 
 Safeguards:
-- Max 30 Minuten pro Task
+- Max {max_minutes} Minuten pro Task
 - Bei Unklarheiten: Bestätigung einholen
 - Dokumentiere alle Änderungen
 
 Wenn fertig, führe aus:
 openclaw gateway wake --text "Task {task_id} fertig" --mode now
 """
-        
-        # Simuliere Sub-Agent Spawn (in echt: sessions_spawn)
-        agent_info = {
-            "task_id": task_id,
-            "agent_type": agent_type,
-            "status": "running",
-            "started_at": datetime.now().isoformat(),
-            "session_id": f"agent-{task_id}-{int(time.time())}"
-        }
-        
-        self.active_agents[task_id] = agent_info
-        
-        return agent_info
     
     def run_parallel(self, tasks: List[Dict], max_parallel: int = 3) -> Dict:
         """
@@ -97,7 +152,7 @@ openclaw gateway wake --text "Task {task_id} fertig" --mode now
             "running": []
         }
         
-        print(f"🎬 Starting Parallel Execution: {len(tasks)} tasks, max {max_parallel} parallel")
+        self._log(f"🎬 Starting Parallel Execution: {len(tasks)} tasks, max {max_parallel} parallel")
         
         with ThreadPoolExecutor(max_workers=max_parallel) as executor:
             # Submit all tasks
@@ -115,12 +170,12 @@ openclaw gateway wake --text "Task {task_id} fertig" --mode now
                     result = future.result(timeout=1800)  # 30 Min Timeout
                     if result["success"]:
                         results["completed"].append(result)
-                        print(f"✅ Task #{task['id']} completed")
+                        self._log(f"✅ Task #{task['id']} completed")
                     else:
                         results["failed"].append(result)
-                        print(f"❌ Task #{task['id']} failed")
+                        self._log(f"❌ Task #{task['id']} failed")
                 except Exception as e:
-                    print(f"💥 Task #{task['id']} crashed: {e}")
+                    self._log(f"💥 Task #{task['id']} crashed: {e}")
                     results["failed"].append({
                         "task_id": task["id"],
                         "error": str(e)
@@ -128,106 +183,887 @@ openclaw gateway wake --text "Task {task_id} fertig" --mode now
         
         return results
     
-    def _execute_task(self, task: Dict, agent_type: str) -> Dict:
-        """Führt einzelnen Task aus (simuliert)"""
-        task_id = task["id"]
+    def run_loop(self, task_manager, monitor: "SafeguardMonitor" = None,
+                 max_parallel: int = None) -> Dict:
+        """
+        Kontinuierlicher Dispatch-Loop (statt fester Batches):
+        - füllt freie Slots sofort mit bereiten Tasks aus dem TaskManager
+        - schreibt Ergebnisse über complete_task / fail_task zurück
+        - stoppt sauber (laufende Tasks laufen aus) wenn Safeguards greifen
+        """
+        if self.config is None:
+            self.config = task_manager.config
+        config = self.config
+        max_parallel = max_parallel or config["agents"]["parallel_max"]
+        results = self._prepare_run(task_manager, monitor, max_parallel)
+        monitor = self._monitor
         
-        # In echt würde hier sessions_spawn oder subprocess laufen
-        # Für Demo: Simuliere Arbeit
-        time.sleep(2)  # Simuliere 2 Sekunden Arbeit
+        self._log(f"🎬 Starting Dispatch Loop: max {max_parallel} parallel, "
+                  f"policy {self.policy.name}")
         
-        # Update Task Status
+        leases = self._start_lease_keeper(task_manager)
+        try:
+            with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                in_flight = {}  # future -> task
+                
+                while True:
+                    if self.profiler is not None:
+                        self.profiler.tick()
+                    self._requeue_due_retries(task_manager)
+                    if (not self._stop.is_set()
+                            and self._dispatch_allowed.is_set()):
+                        self._fill_slots(task_manager, executor, in_flight,
+                                         max_parallel)
+                        self._launch_hedges(task_manager, executor, in_flight,
+                                            max_parallel)
+                    
+                    if not in_flight:
+                        if self._stop.is_set():
+                            break
+                        if self._dispatch_allowed.is_set():
+                            if not self.retries:
+                                break  # nichts mehr bereit: fertig oder blockiert
+                            self._stop.wait(self.retries.tick_sec)  # Backoff
+                            continue
+                        self._dispatch_allowed.wait(timeout=0.5)  # pausiert
+                        continue
+                    
+                    done, _ = wait(in_flight, timeout=0.5,
+                                   return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task = in_flight.pop(future)
+                        result = self._collect_result(future, task)
+                        if "batch" in task:
+                            self._report_batch(task_manager, task, result,
+                                               results)
+                            continue
+                        if self._resolve_hedge(task_manager, task, future,
+                                               result):
+                            continue  # verworfenes Duplikat
+                        self._report_result(task_manager, task, result,
+                                            results)
+                        
+                        self._check_safeguards(monitor, result, results)
+        finally:
+            leases.stop()
+            self._release_pending_retries(task_manager)
+            if self.hedger is not None:
+                self.hedger.close_all()
+            if self.profiler is not None:
+                self.profiler.detach()
+        
+        self._report_budget_blocked(monitor, results)
+        self._report_hedges(results)
+        self._export_traces(results)
+        task_manager.flush()
+        return results
+    
+    def _prepare_run(self, task_manager, monitor: Optional["SafeguardMonitor"],
+                     max_parallel: int,
+                     type_limits: Dict[str, int] = None) -> Dict:
+        """
+        Gemeinsame Vorbereitung aller Engines (Safeguards, Policy,
+        AIMD-Regler, Result-Cache). Gibt das leere Results-Dict zurück.
+        """
+        config = self.config
+        status = task_manager.get_status()
+        self._monitor = monitor or SafeguardMonitor(
+            config["safeguards"], status["iteration"]["cost_usd"])
+        if self.policy is None:
+            self.policy = create_policy(config)
+        if self.concurrency is None:
+            self.concurrency = create_controller(config, max_parallel,
+                                                 type_limits)
+        if self.cache is None:
+            self.cache = create_cache(self.project_path, config)
+        # Neu angelegtes Projekt: alte Cache-Einträge gelten nicht mehr
+        self._cache_generation = status["project"].get("created_at", "")
+        if self.retry_policy is None:
+            self.retry_policy = create_retry_policy(config)
+        if self.hedger is None:
+            self.hedger = create_hedger(config)
+            if self.hedger.enabled:
+                self.hedger.latency.seed_from_session(
+                    task_manager.store.session_file)
+        if self.batcher is None:
+            self.batcher = create_batcher(config)
+        if self.metrics is not None:
+            self.metrics.bind(self, task_manager)
+        if self.tracer is None and config.get("tracing", {}).get("enabled"):
+            self.tracer = create_tracer(config)
+        if self.tracer is not None:
+            self.tracer.begin_run()
+        if self.profiler is not None:
+            self.profiler.attach("dispatch")
+        self._stop.clear()
+        self._budget_blocked.clear()
         return {
-            "task_id": task_id,
-            "success": True,
-            "agent_type": agent_type,
-            "output": f"Task {task_id} completed by {agent_type}",
-            "cost_usd": 0.10
+            "completed": [],
+            "failed": [],
+            "retried": [],
+            "alerts": []
         }
     
+    def _start_lease_keeper(self, task_manager) -> LeaseKeeper:
+        """
+        Gibt verwaiste Tasks (abgelaufene Leases, tote Prozesse) sofort frei
+        und startet Heartbeat + Reaper im Hintergrund
+        """
+        leases = LeaseKeeper(task_manager, lambda: list(self.active_agents),
+                             self.config.get("leases", {}), self._log)
+        leases.reap()
+        leases.start()
+        return leases
+    
+    def _check_safeguards(self, monitor: "SafeguardMonitor", result: Dict,
+                          results: Dict, iterations: int = 1) -> None:
+        """
+        Stoppt die Annahme neuer Tasks wenn ein Safeguard greift, loggt
+        Warnungen (iterations=0: Batch-Mitglied, die Session zählt einmal)
+        """
+        if result.get("cached"):
+            return  # kein Agent-Lauf: keine Kosten, keine Iteration
+        check = monitor.check_limits(result.get("cost_usd", 0.00),
+                                     result.get("task_id"), iterations)
+        if check["should_stop"] and self._stop.is_set():
+            return
+        for alert in check["alerts"]:
+            self._log(alert)
+        results["alerts"].extend(check["alerts"])
+        if check["should_stop"]:
+            self._log("🛑 Safeguard ausgelöst - keine neuen Tasks")
+            self._stop.set()
+    
+    def stop(self) -> None:
+        """Beendet run_loop nach Abschluss der laufenden Tasks"""
+        self._stop.set()
+        self._dispatch_allowed.set()
+    
+    def _fill_slots(self, task_manager, executor: ThreadPoolExecutor,
+                    in_flight: Dict, max_parallel: int) -> None:
+        """Startet bereite Tasks bis alle Slots belegt sind (laut Policy)"""
+        if len(in_flight) >= max_parallel:
+            return
+        ready = self.policy.order(task_manager.get_ready_tasks(), task_manager)
+        for task in self._group_batches(ready):
+            if len(in_flight) >= max_parallel:
+                break
+            agent_type = self.select_agent(task["type"])
+            if "batch" in task:
+                members = self._claim_batch(task_manager, task, agent_type,
+                                            in_flight)
+                if len(members) > 1:
+                    batch = self._spawn_batch(members, agent_type)
+                    future = executor.submit(self._execute_task, batch,
+                                             agent_type)
+                    in_flight[future] = batch
+                    continue
+                if not members:
+                    continue
+                task = members[0]  # Rest des Batches: einzeln starten
+            elif not self._claim_task(task_manager, task, agent_type,
+                                      in_flight):
+                continue
+            self.spawn_agent(task, agent_type)
+            self._mark_started(task, agent_type)
+            future = executor.submit(self._execute_task, task, agent_type)
+            in_flight[future] = task
+    
+    def _claim_task(self, task_manager, task: Dict, agent_type: str,
+                    in_flight: Dict, slot_free: Callable[[], bool] = None
+                    ) -> bool:
+        """
+        Cache-Treffer, Zulassung (AIMD-Fenster, Budget) und Zuweisung eines
+        bereiten Tasks. True = Agent muss gestartet werden.
+        """
+        if self._dispatch_cached(task_manager, task, agent_type, in_flight):
+            return False  # kein Agent nötig
+        if slot_free is not None and not slot_free():
+            return False
+        if not self._admit(agent_type):
+            return False  # Fenster des Agent-Typs voll
+        if not self._reserve_budget(task):
+            return False  # Budget reicht nicht (mehr) für diesen Task
+        if not task_manager.assign_task(task["id"], agent_type):
+            self._monitor.ledger.release(task["id"])
+            return False  # inzwischen von anderem Prozess übernommen
+        if self.tracer is not None:
+            self.tracer.admit(task, agent_type)
+        return True
+    
+    def _dispatch_cached(self, task_manager, task: Dict, agent_type: str,
+                         in_flight: Dict) -> bool:
+        """Cache-Treffer: Task wird ohne Agent als erledigtes Future gemeldet"""
+        cached = self._cached_result(task_manager, task, agent_type)
+        if cached is None:
+            return False
+        if task_manager.assign_task(task["id"], agent_type):
+            in_flight[self._resolved_future(cached)] = task
+        return True
+    
+    def _resolved_future(self, result: Dict):
+        future = Future()
+        future.set_result(result)
+        return future
+    
+    def _group_batches(self, ready: List[Dict]) -> List[Dict]:
+        if self.batcher is None:
+            return ready
+        return self.batcher.group(ready)
+    
+    def _claim_batch(self, task_manager, batch: Dict, agent_type: str,
+                     in_flight: Dict, slot_free: Callable[[], bool] = None
+                     ) -> List[Dict]:
+        """
+        Wie _claim_task für alle Tasks eines Batches - ein AIMD-Platz für
+        die ganze Session, Budget pro Task. Gibt die zugewiesenen Tasks zurück.
+        """
+        members = [task for task in batch["batch"]
+                   if not self._dispatch_cached(task_manager, task,
+                                                agent_type, in_flight)]
+        if not members or (slot_free is not None and not slot_free()):
+            return []
+        if not self._admit(agent_type):
+            return []
+        claimed = []
+        for task in members:
+            if not self._reserve_budget(task):
+                continue
+            if not task_manager.assign_task(task["id"], agent_type):
+                self._monitor.ledger.release(task["id"])
+                continue
+            if self.tracer is not None:
+                self.tracer.admit(task, agent_type)
+            claimed.append(task)
+        return claimed
+    
+    def _spawn_batch(self, members: List[Dict], agent_type: str) -> Dict:
+        """Eine Agent-Session für mehrere Tasks (gemeinsamer Abbruch)"""
+        lead = members[0]
+        batch = {
+            "id": lead["id"],
+            "type": lead["type"],
+            "title": f"Batch aus {len(members)} Tasks",
+            "batch": members,
+            "started": time.monotonic()
+        }
+        ids = ", ".join(f"#{task['id']}" for task in members)
+        self._log(f"🚀 Spawning {agent_type} für Batch {ids}")
+        cancel = threading.Event()
+        started_at = datetime.now().isoformat()
+        for task in members:
+            self._cancel[task["id"]] = cancel
+            self.active_agents[task["id"]] = {
+                "task_id": task["id"],
+                "agent_type": agent_type,
+                "status": "running",
+                "started_at": started_at,
+                "session_id": f"agent-batch-{lead['id']}-{int(time.time())}",
+                "batch": lead["id"]
+            }
+            if self.tracer is not None:
+                self.tracer.spawn(task["id"])
+        self._in_flight_by_type[agent_type] = \
+            self._in_flight_by_type.get(agent_type, 0) + 1
+        if self.metrics is not None:
+            self.metrics.tasks_started.labels(agent_type).inc(len(members))
+        return batch
+    
+    def _report_batch(self, task_manager, batch: Dict, result: Dict,
+                      results: Dict) -> None:
+        """
+        Teilt das Batch-Ergebnis pro Task auf. Erfolgreiche Tasks werden
+        normal gemeldet, alle anderen laufen danach einzeln (Fallback).
+        """
+        members = batch["batch"]
+        duration = time.monotonic() - batch["started"]
+        # Eine Agent-Session = eine Iteration, egal wie viele Tasks sie
+        # erledigt; die Kosten rechnen die Tasks unten einzeln ab
+        task_manager.increment_iteration()
+        self._check_safeguards(self._monitor, {"cost_usd": 0.00}, results)
+        # Latenz pro Task, sonst hielte der AIMD-Regler Batches für Stau
+        self._adapt_concurrency(task_manager, members[0], result,
+                                duration / len(members))
+        fallback = []
+        for task_id, member_result in self.batcher.split(batch, result).items():
+            task = next(task for task in members if task["id"] == task_id)
+            if member_result["success"]:
+                self.policy.observe(task, duration / len(members))
+                self._report_result(task_manager, task, member_result, results,
+                                    count_iteration=False)
+                self._check_safeguards(self._monitor, member_result, results,
+                                       iterations=0)
+                continue
+            cost = member_result["cost_usd"]
+            self._monitor.ledger.settle(task_id, cost)
+            if cost:
+                task_manager.add_cost(task_id, cost, "batch")
+            if task_id not in self.active_agents:
+                # per kill_agent abgebrochen: kein Fallback
+                self._report_result(task_manager, task, member_result, results,
+                                    count_iteration=False)
+                continue
+            self.active_agents.pop(task_id, None)
+            self._cache_keys.pop(task_id, None)
+            self.batcher.excluded.add(task_id)
+            task_manager.requeue_task(task_id, "batch_fallback")
+            self._finish_trace(task_id, "batch_fallback")
+            fallback.append(task_id)
+        if fallback:
+            ids = ", ".join(f"#{task_id}" for task_id in fallback)
+            self._log(f"📦 Batch #{batch['id']}: {ids} laufen einzeln "
+                      f"({result.get('error') or 'unvollständige Ausgabe'})")
+    
+    def _collect_result(self, future, task: Dict) -> Dict:
+        """Ergebnis eines Futures, Exceptions werden zu Fehlschlägen"""
+        try:
+            return future.result()
+        except Exception as e:
+            self._log(f"💥 Task #{task['id']} crashed: {e}")
+            return {"task_id": task["id"], "success": False, "error": str(e)}
+    
+    def _report_result(self, task_manager, task: Dict, result: Dict,
+                       results: Dict, count_iteration: bool = True) -> None:
+        """
+        Schreibt Ergebnis in den TaskManager zurück (count_iteration=False:
+        Batch-Mitglied, die Iteration zählt _report_batch einmal pro Session)
+        """
+        task_id = task["id"]
+        cost = result.get("cost_usd", 0.00)
+        agent_type = result.get("agent_type") or self.select_agent(task["type"])
+        if self.tracer is not None:
+            self.tracer.report(task, agent_type)
+        self.active_agents.pop(task_id, None)
+        started = self._started.pop(task_id, None)
+        duration = None
+        if started is not None:
+            duration = time.monotonic() - started
+            if result.get("success"):
+                self.policy.observe(task, duration)
+                self.hedger.latency.observe(agent_type, duration)
+            self._adapt_concurrency(task_manager, task, result, duration)
+        if count_iteration and not result.get("cached"):
+            task_manager.increment_iteration()
+        self._store_cached_result(task_id, result)
+        if self.metrics is not None:
+            self._observe_result(agent_type, result, duration)
+        if self.tracer is not None:
+            self.tracer.persist(task_id)
+        
+        if result.get("success"):
+            task_manager.complete_task(task_id, result.get("output"), cost,
+                                       duration, agent_type)
+            self._finish_trace(task_id,
+                               "cached" if result.get("cached") else "done")
+            results["completed"].append(result)
+            if result.get("cached"):
+                self._log(f"♻️  Task #{task_id} aus Cache")
+            else:
+                self._log(f"✅ Task #{task_id} completed")
+        else:
+            error = result.get("error") or result.get("output") or "unknown error"
+            if self._schedule_retry(task_manager, task, result, error):
+                self._finish_trace(task_id, "retry")
+                results["retried"].append(result)
+                return
+            task_manager.fail_task(task_id, error)
+            self._finish_trace(task_id, "failed")
+            results["failed"].append(result)
+            if self.metrics is not None:
+                self.metrics.tasks_failed.labels(agent_type).inc()
+            self._log(f"❌ Task #{task_id} failed: {error}")
+    
+    def _finish_trace(self, task_id: int, outcome: str) -> None:
+        if self.tracer is not None:
+            self.tracer.finish(task_id, outcome)
+    
+    def _export_traces(self, results: Dict) -> None:
+        """Schreibt die Spans des Runs (tracing.export) nach output/traces"""
+        if self.tracer is None:
+            return
+        paths = self.tracer.end_run(self.project_path)
+        if paths:
+            results["traces"] = [str(path) for path in paths]
+            self._log(f"🧭 Traces: {', '.join(path.name for path in paths)}")
+    
+    def _observe_result(self, agent_type: str, result: Dict,
+                        duration: Optional[float]) -> None:
+        """Metriken eines Ergebnisses (Fehlschläge erst nach Retry-Entscheid)"""
+        metrics = self.metrics
+        if result.get("cached"):
+            metrics.cache_hits.labels(agent_type).inc()
+        elif duration is not None:
+            outcome = "ok" if result.get("success") else "error"
+            metrics.task_duration.labels(agent_type, outcome).observe(duration)
+        if result.get("success"):
+            metrics.tasks_completed.labels(agent_type).inc()
+    
+    def _schedule_retry(self, task_manager, task: Dict, result: Dict,
+                        error: str) -> bool:
+        """
+        Plant einen Retry laut RetryPolicy (Fehlerklasse, Versuche pro Typ).
+        Der Slot wird sofort frei, das TimerWheel gibt den Task bei
+        Fälligkeit wieder frei.
+        """
+        if self.retry_policy is None or result.get("error") == "cancelled":
+            return False
+        current = task_manager.get_task(task["id"]) or task
+        decision = self.retry_policy.decide(current, result)
+        if not decision["retry"]:
+            return False
+        if not task_manager.schedule_retry(task["id"], error,
+                                           decision["delay_sec"],
+                                           decision["failure_class"]):
+            return False
+        self.retries.schedule(task["id"], decision["delay_sec"])
+        if self.metrics is not None:
+            self.metrics.retries.labels(
+                result.get("agent_type") or self.select_agent(task["type"]),
+                decision["failure_class"]).inc()
+        self._log(f"🔁 Task #{task['id']} {decision['failure_class']}: Retry in "
+                  f"{decision['delay_sec']:.1f}s (Versuch "
+                  f"{current.get('attempts', 1) + 1}/{decision['max_attempts']})")
+        return True
+    
+    def _launch_hedges(self, task_manager, executor: ThreadPoolExecutor,
+                       in_flight: Dict, max_parallel: int) -> None:
+        """Startet Duplikate für Tasks, die länger als das p95 laufen"""
+        for task, agent_type in self._hedge_candidates(in_flight,
+                                                       max_parallel):
+            primary = next(future for future, running in in_flight.items()
+                           if running["id"] == task["id"])
+            task_id = task["id"]
+            cancel = threading.Event()
+            hedge = executor.submit(self._execute_task, task, agent_type,
+                                    cancel)
+            in_flight[hedge] = task
+            self._register_hedge(task_manager, task, agent_type, {
+                primary: lambda task_id=task_id: self._cancel_primary(task_id),
+                hedge: cancel.set
+            }, hedge)
+    
+    def _hedge_candidates(self, in_flight: Dict, max_parallel: int) -> List:
+        """(task, agent_type) laufender Tasks über der p95-Schwelle"""
+        if self.hedger is None or not self.hedger.enabled:
+            return []
+        free = max_parallel - len(in_flight)
+        if free <= 0:
+            return []
+        running = {task["id"]: task for task in in_flight.values()}
+        now = time.monotonic()
+        candidates = []
+        for task_id, started in list(self._started.items()):
+            if len(candidates) >= free:
+                break
+            agent = self.active_agents.get(task_id)
+            if task_id in self._twins or task_id not in running or not agent:
+                continue
+            if not self._admit(agent["agent_type"]):
+                continue  # AIMD-Fenster voll: Duplikat würde nur warten
+            threshold = self.hedger.threshold(agent["agent_type"])
+            if threshold is None or now - started <= threshold:
+                continue
+            if not self.hedger.reserve(self._monitor.ledger, running[task_id]):
+                continue
+            candidates.append((running[task_id], agent["agent_type"]))
+        return candidates
+    
+    def _register_hedge(self, task_manager, task: Dict, agent_type: str,
+                        twins: Dict, hedge) -> None:
+        task_id = task["id"]
+        self._twins[task_id] = twins
+        self._hedge_futures.add(hedge)
+        if self.metrics is not None:
+            self.metrics.hedges.labels(agent_type).inc()
+        elapsed = time.monotonic() - self._started[task_id]
+        threshold = self.hedger.threshold(agent_type)
+        task_manager.log_event("task_hedged", {
+            "id": task_id, "agent": agent_type,
+            "elapsed_sec": round(elapsed, 3),
+            "threshold_sec": round(threshold, 3)})
+        self._log(f"🪞 Task #{task_id} läuft {elapsed:.1f}s "
+                  f"(p{self.hedger.percentile} {threshold:.1f}s) - "
+                  f"starte Duplikat")
+    
+    def _resolve_hedge(self, task_manager, task: Dict, future,
+                       result: Dict) -> bool:
+        """
+        Erstes erfolgreiches Ergebnis gewinnt, der Zwilling wird
+        abgebrochen. True = dieses Ergebnis wird verworfen (nur Kosten).
+        """
+        task_id = task["id"]
+        twins = self._twins.get(task_id)
+        if twins is None:
+            return False
+        twins.pop(future, None)
+        was_hedge = future in self._hedge_futures
+        self._hedge_futures.discard(future)
+        
+        if task_id in self._hedge_decided or (not result.get("success")
+                                              and twins):
+            # Verlierer (oder Fehlschlag, während der Zwilling noch läuft)
+            if was_hedge:
+                self.hedger.close_workspace(task_id, promote=False)
+            cost = result.get("cost_usd", 0.00) or 0.00
+            self._monitor.ledger.settle(Hedger.key(task_id), cost)
+            self.hedger.record_extra_cost(cost)
+            if cost:
+                task_manager.add_cost(task_id, cost, "hedge")
+            self._log(f"🪞 Task #{task_id}: Ergebnis verworfen "
+                      f"(+${cost:.2f} Hedge-Kosten)")
+            if not twins:
+                del self._twins[task_id]
+                self._hedge_decided.discard(task_id)
+            return True
+        
+        if was_hedge:
+            promoted = self.hedger.close_workspace(
+                task_id, promote=bool(result.get("success")))
+            if result.get("success"):
+                self.hedger.won += 1
+                self._log(f"🪞 Task #{task_id}: Duplikat gewinnt, "
+                          f"{len(promoted)} Dateien übernommen")
+        if twins:
+            self._hedge_decided.add(task_id)
+            for cancel in twins.values():
+                cancel()
+        else:
+            del self._twins[task_id]
+        return False
+    
+    def _report_hedges(self, results: Dict) -> None:
+        """Hedge-Statistik ins Ergebnis (Zusatzkosten) und ins Log"""
+        stats = self.get_hedge_stats()
+        if not stats or not stats["launched"]:
+            return
+        results["hedging"] = stats
+        self._log(f"🪞 Hedging: {stats['launched']} Duplikate, "
+                  f"{stats['won']} gewonnen, Zusatzkosten "
+                  f"${stats['extra_cost_usd']:.2f}")
+    
+    def _cancel_primary(self, task_id: int) -> None:
+        if task_id in self._cancel:
+            self._cancel[task_id].set()
+    
+    def get_hedge_stats(self) -> Dict:
+        """Gestartete/gewonnene Hedges und ihre Zusatzkosten (für TUI)"""
+        if self.hedger is None or not self.hedger.enabled:
+            return {}
+        return self.hedger.stats()
+    
+    def _requeue_due_retries(self, task_manager) -> None:
+        """Gibt fällige Retries wieder frei (pending)"""
+        for task_id in self.retries.advance():
+            task_manager.requeue_task(task_id, "retry")
+    
+    def _release_pending_retries(self, task_manager) -> None:
+        """Beim Beenden: wartende Retries sofort auf 'pending' (für resume)"""
+        for task_id in self.retries.drain():
+            task_manager.requeue_task(task_id, "retry")
+    
+    def _cached_result(self, task_manager, task: Dict,
+                       agent_type: str) -> Optional[Dict]:
+        """
+        Ergebnis aus dem Result-Cache (ohne Agent zu starten).
+        Pro Task wird nur einmal nachgeschlagen; der Schlüssel wird für
+        _store_cached_result gemerkt.
+        """
+        if self.cache is None or task["id"] in self._cache_keys:
+            return None
+        dependency_digests = []
+        for dep_id in task.get("dependencies", []):
+            # output_ref trägt den SHA-256 - der Output selbst bleibt ungelesen
+            dependency_digests.append(task_manager.output_digest(dep_id)
+                                      or digest(None))
+        key = ResultCache.make_key(self.build_prompt(task), task["type"],
+                                   agent_type, dependency_digests,
+                                   self._cache_generation)
+        entry = self.cache.get(key)
+        if entry is None:
+            self._cache_keys[task["id"]] = key
+            return None
+        result = self._get_executor()._result(task, agent_type, True,
+                                              output=entry.get("output"))
+        result["cached"] = True
+        return result
+    
+    def _store_cached_result(self, task_id: int, result: Dict) -> None:
+        """Legt erfolgreiche Agent-Ergebnisse im Result-Cache ab"""
+        key = self._cache_keys.pop(task_id, None)
+        if key is None or self.cache is None or not result.get("success"):
+            return
+        self.cache.put(key, {
+            "output": result.get("output"),
+            "agent_type": result.get("agent_type"),
+            "cost_usd": result.get("cost_usd", 0.00)
+        })
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/Miss-Statistik des Result-Caches (für TUI)"""
+        if self.cache is None:
+            return {}
+        return self.cache.stats()
+    
+    def _admit(self, agent_type: str) -> bool:
+        """Lässt das AIMD-Fenster einen weiteren Agent dieses Typs zu?"""
+        if self.concurrency is None:
+            return True
+        return self.concurrency.can_admit(
+            agent_type, self._in_flight_by_type.get(agent_type, 0))
+    
+    def _reserve_budget(self, task: Dict) -> bool:
+        """Reserviert estimated_cost im Kostenbuch (Admission Control)"""
+        ledger = self._monitor.ledger
+        estimate = task.get("estimated_cost", 0.50)
+        if ledger.reserve(task["id"], estimate):
+            self._budget_blocked.discard(task["id"])
+            return True
+        if task["id"] not in self._budget_blocked:
+            self._budget_blocked.add(task["id"])
+            if ledger.exceeds_task_limit(estimate):
+                reason = f"max ${float(ledger.per_task_limit):.2f} pro Iteration"
+            else:
+                reason = f"frei ${float(ledger.available):.2f}"
+            self._log(f"💰 Task #{task['id']} zurückgestellt: Schätzung "
+                      f"${estimate:.2f}, {reason}")
+        return False
+    
+    def _report_budget_blocked(self, monitor: "SafeguardMonitor",
+                               results: Dict) -> None:
+        """Alert wenn der Loop endet, weil bereite Tasks kein Budget bekamen"""
+        if not self._budget_blocked or self._stop.is_set():
+            return
+        alert = (f"💰 Budget reicht nicht für {len(self._budget_blocked)} "
+                 f"Task(s): ${float(monitor.ledger.committed):.2f} von "
+                 f"${float(monitor.ledger.limit):.2f} verbraucht")
+        self._log(alert)
+        results["alerts"].append(alert)
+    
+    def _mark_started(self, task: Dict, agent_type: str) -> None:
+        self._started[task["id"]] = time.monotonic()
+        self._in_flight_by_type[agent_type] = \
+            self._in_flight_by_type.get(agent_type, 0) + 1
+        if self.metrics is not None:
+            self.metrics.tasks_started.labels(agent_type).inc()
+    
+    def _adapt_concurrency(self, task_manager, task: Dict, result: Dict,
+                           duration: float) -> None:
+        """Meldet Latenz/Erfolg an den AIMD-Regler, loggt Fensteränderungen"""
+        agent_type = self.select_agent(task["type"])
+        self._in_flight_by_type[agent_type] = max(
+            0, self._in_flight_by_type.get(agent_type, 0) - 1)
+        if self.concurrency is None:
+            return
+        change = self.concurrency.record(agent_type, duration,
+                                         bool(result.get("success")),
+                                         self._budget_left_fraction(result))
+        if change:
+            task_manager.log_event("concurrency_window", change)
+            self._log(f"🎚️  {agent_type}: Fenster {change['window']} "
+                      f"({change['reason']})")
+    
+    def _budget_left_fraction(self, result: Dict) -> float:
+        """Anteil des Kostenbudgets der nach diesem Ergebnis noch übrig ist"""
+        if self._monitor is None:
+            return 1.0
+        limit = self._monitor.config.get("max_total_cost_usd", 10.00)
+        if limit <= 0:
+            return 0.0
+        spent = self._monitor.total_cost + result.get("cost_usd", 0.00)
+        return max(0.0, 1.0 - spent / limit)
+    
+    def get_concurrency_windows(self) -> Dict[str, int]:
+        """Aktuelle AIMD-Fenster pro Agent-Typ (für TUI)"""
+        if self.concurrency is None:
+            return {}
+        return self.concurrency.snapshot()
+    
+    def _log(self, message: str) -> None:
+        self.log_handler(message)
+    
+    def _execute_task(self, task: Dict, agent_type: str,
+                      hedge_cancel: threading.Event = None) -> Dict:
+        """
+        Führt einzelnen Task über den konfigurierten Executor aus
+        (hedge_cancel: eigenes Abbruch-Event eines Duplikats)
+        """
+        task_id = task["id"]
+        executor = self._get_executor()
+        cancel = hedge_cancel or self._cancel.setdefault(task_id,
+                                                         threading.Event())
+        
+        def on_output(stream: str, line: str) -> None:
+            marker = "!" if stream == "stderr" else " "
+            self._log(f"  #{task_id}{marker} {line}")
+        
+        tracer = self.tracer if hedge_cancel is None else None
+        if tracer is not None:
+            for member in task.get("batch", [task]):
+                tracer.run_started(member["id"])
+        try:
+            if hedge_cancel is not None:
+                # Duplikat arbeitet in einer eigenen Kopie des Projekts
+                task = self.hedger.open_workspace(self.project_path, task)
+            return executor.run(task, agent_type, self.build_prompt(task),
+                                on_output=on_output, cancel=cancel)
+        finally:
+            if hedge_cancel is None:
+                for member in task.get("batch", [task]):
+                    self._cancel.pop(member["id"], None)
+                    if tracer is not None:
+                        tracer.run_finished(member["id"])
+    
+    def _get_executor(self) -> AgentExecutor:
+        """Executor laut Config (ohne Config: Simulation)"""
+        if self.executor is None:
+            if self.config is None:
+                self.executor = SimulatedExecutor()
+            else:
+                self.executor = create_executor(self.config, self.project_path)
+        return self.executor
+    
     def get_agent_traces(self, task_id: int = None) -> List[Dict]:
         """
-        Gibt Agent Traces zurück (wie 'T' Taste im Ralph Loop Video [09:44])
+        Gibt Agent Traces zurück (wie 'T' Taste im Ralph Loop Video [09:44]).
+        Mit Tracer zusätzlich aktuelle Phase, Versuch und Dauer pro Phase.
         """
         traces = []
         
         if task_id:
             # Spezifischer Task
             if task_id in self.active_agents:
-                agent = self.active_agents[task_id]
-                traces.append({
-                    "task_id": task_id,
-                    "agent": agent["agent_type"],
-                    "status": agent["status"],
-                    "started": agent["started_at"]
-                })
+                traces.append(self._agent_trace(task_id,
+                                                self.active_agents[task_id]))
         else:
             # Alle Agents
-            for tid, agent in self.active_agents.items():
-                traces.append({
-                    "task_id": tid,
-                    "agent": agent["agent_type"],
-                    "status": agent["status"],
-                    "started": agent["started_at"]
-                })
+            for tid, agent in list(self.active_agents.items()):
+                traces.append(self._agent_trace(tid, agent))
         
         return traces
     
+    def _agent_trace(self, task_id: int, agent: Dict) -> Dict:
+        trace = {
+            "task_id": task_id,
+            "agent": agent["agent_type"],
+            "status": agent["status"],
+            "started": agent["started_at"]
+        }
+        span = self.tracer.active(task_id) if self.tracer is not None else None
+        if span is not None:
+            now = time.time_ns()
+            trace["phase"] = span.phase
+            trace["attempt"] = span.attempt
+            trace["elapsed_sec"] = round((now - span.ready) / 1e9, 3)
+            trace["phases"] = {name: round(((end or now) - start) / 1e9, 3)
+                               for name, start, end in span.phases()}
+        return trace
+    
     def pause_all(self) -> None:
         """Pausiert alle laufenden Agents (wie im Video)"""
-        print("⏸️  Pausing all agents...")
-        for task_id, agent in self.active_agents.items():
+        self._log("⏸️  Pausing all agents...")
+        self._dispatch_allowed.clear()
+        for task_id, agent in list(self.active_agents.items()):
             if agent["status"] == "running":
                 agent["status"] = "paused"
-                print(f"  Paused Task #{task_id}")
+                self._log(f"  Paused Task #{task_id}")
     
     def resume_all(self) -> None:
         """Setzt alle pausierten Agents fort"""
-        print("▶️  Resuming all agents...")
-        for task_id, agent in self.active_agents.items():
+        self._log("▶️  Resuming all agents...")
+        self._dispatch_allowed.set()
+        for task_id, agent in list(self.active_agents.items()):
             if agent["status"] == "paused":
                 agent["status"] = "running"
-                print(f"  Resumed Task #{task_id}")
+                self._log(f"  Resumed Task #{task_id}")
+    
+    @property
+    def paused(self) -> bool:
+        return not self._dispatch_allowed.is_set()
     
     def kill_agent(self, task_id: int) -> bool:
         """Beendet spezifischen Agent"""
         if task_id in self.active_agents:
-            print(f"💀 Killing agent for Task #{task_id}")
+            self._log(f"💀 Killing agent for Task #{task_id}")
+            if task_id in self._cancel:
+                self._cancel[task_id].set()
+            for cancel in list(self._twins.get(task_id, {}).values()):
+                cancel()
             del self.active_agents[task_id]
             return True
         return False
 
 
+def create_orchestrator(project_path: str, config: Dict,
+                        engine: str = None,
+                        listen: str = None) -> AgentOrchestrator:
+    """
+    Erstellt Orchestrator laut agents.engine:
+    "thread" (ThreadPool), "async" (asyncio, viele parallele Sessions)
+    oder "coordinator" (verteilt an Worker, listen = Adresse)
+    """
+    engine = engine or config["agents"].get("engine", "thread")
+    if engine == "thread":
+        return AgentOrchestrator(project_path, config)
+    if engine == "async":
+        from async_orchestrator import AsyncAgentOrchestrator
+        return AsyncAgentOrchestrator(project_path, config)
+    if engine == "coordinator":
+        from coordinator import CoordinatorOrchestrator
+        return CoordinatorOrchestrator(project_path, config, listen)
+    raise ValueError(f"Unbekannte Engine: {engine}")
+
+
 class SafeguardMonitor:
     """Überwacht Safeguards wie in Ralph Loop"""
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, spent_usd: float = 0.00):
         self.config = config
-        self.total_cost = 0.00
+        self.ledger = BudgetLedger(config.get("max_total_cost_usd", 10.00),
+                                   config.get("max_cost_per_iteration_usd"),
+                                   spent_usd)
         self.iteration_count = 0
         self.start_time = datetime.now()
     
-    def check_limits(self, current_cost: float = 0.00) -> Dict:
-        """Prüft ob Limits erreicht"""
+    @property
+    def total_cost(self) -> float:
+        return float(self.ledger.committed)
+    
+    def check_limits(self, current_cost: float = 0.00,
+                     task_id: int = None, iterations: int = 1) -> Dict:
+        """
+        Prüft ob Limits erreicht. current_cost wird verbucht - mit task_id
+        als Abrechnung der Reservierung dieses Tasks. iterations: Anzahl
+        Agent-Sessions (0 für weitere Tasks derselben Batch-Session).
+        """
         alerts = []
         should_stop = False
         
         # Cost Limit
-        self.total_cost += current_cost
-        if self.total_cost >= self.config.get("max_total_cost_usd", 10.00):
+        self.ledger.settle(task_id, current_cost)
+        if self.ledger.committed >= self.ledger.limit:
             alerts.append(f"💰 Cost limit reached: ${self.total_cost:.2f}")
             should_stop = True
         
+        # Cost pro Iteration: zugelassen wird vorher (Reservierung), ein
+        # einzelner Ausreißer meldet nur - der Lauf geht weiter
+        if self.ledger.exceeds_task_limit(current_cost):
+            task = f" (Task #{task_id})" if task_id is not None else ""
+            alerts.append(f"💸 Iteration cost ${current_cost:.2f} > "
+                          f"${float(self.ledger.per_task_limit):.2f}{task}")
+        
         # Iteration Limit
-        self.iteration_count += 1
-        if self.iteration_count >= self.config.get("max_iterations", 35):
+        self.iteration_count += iterations
+        if (iterations
+                and self.iteration_count >= self.config.get("max_iterations", 35)):
             alerts.append(f"🔄 Iteration limit reached: {self.iteration_count}")
             should_stop = True
         
-        # Time Limit (pro Iteration)
+        # Laufzeit-Limit für den ganzen Lauf (0 = ohne); das Limit pro Task
+        # (max_time_per_task_min) setzt der Executor durch
         elapsed = (datetime.now() - self.start_time).total_seconds() / 60
-        if elapsed > self.config.get("max_time_per_task_min", 30):
-            alerts.append(f"⏰ Time limit reached: {elapsed:.0f} min")
+        max_run_min = self.config.get("max_run_time_min", 0)
+        if max_run_min and elapsed > max_run_min:
+            alerts.append(f"⏰ Run time limit reached: {elapsed:.0f} min")
             should_stop = True
         
         return {
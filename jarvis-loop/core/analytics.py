@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Run Analytics
+Auswertung von session.jsonl (inkl. Archiven) in einem Durchlauf
+
+- Laufzeit pro Agent-Typ (p50/p90/p95/p99, aus task_completed)
+- Wartezeit in der Queue (bereit -> zugewiesen)
+- Durchsatz (Tasks/Minute) und erreichte Parallelität über die Zeit
+- Kosten pro Task und pro Agent, Retry- und Fehlerraten
+
+Streaming: Events werden einzeln gelesen und sofort verrechnet.
+Laufzeiten landen in log-skalierten Histogrammen (feste Bucket-Zahl,
+Perzentile auf ~2% genau), Zeitreihen in Minuten-Buckets. Der Speicher
+wächst daher nicht mit der Log-Größe, nur mit der Zahl der Tasks
+(Zeitpunkte für Wartezeit und Parallelität).
+"""
+
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from budget import add_usd
+from event_writer import list_archives, open_segment
+
+# Häufigstes Event, für die Auswertung ohne Bedeutung: ohne JSON-Parse skip
+SKIPPED_EVENTS = (b'"type": "lease_renewed"',)
+
+
+class LogHistogram:
+    """Histogramm mit log-skalierten Buckets (relative Genauigkeit)"""
+
+    def __init__(self, precision: float = 0.02):
+        self._base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        value = max(value, 1e-3)  # < 1ms zählt als 1ms
+        bucket = int(math.log(value) / self._base)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                value = math.exp((bucket + 0.5) * self._base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3),
+            "min": round(self.min, 3),
+            "p50": round(self.percentile(50), 3),
+            "p90": round(self.percentile(90), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(self.max, 3)
+        }
+
+
+class SessionAnalytics:
+    """Verrechnet Session-Events nacheinander (consume) zum Report"""
+
+    def __init__(self):
+        self.events = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.durations: Dict[str, LogHistogram] = {}
+        self.queue_wait = LogHistogram()
+        self.agents: Dict[str, Dict] = {}
+        self.completed = 0
+        self.failed = 0
+        self.cost_usd = 0.00
+        self.extra_cost_usd = 0.00
+        self.retries = 0
+        self.retried_tasks = 0
+        self.requeues: Dict[str, int] = {}
+        self.hedges = 0
+        self.per_minute: Dict[int, Dict] = {}  # Minute -> {done, busy_sec}
+
+        # Zustand pro Task (nicht pro Event)
+        self._deps: Dict[int, List[int]] = {}
+        self._pending_since: Dict[int, float] = {}
+        self._done_at: Dict[int, float] = {}
+        self._running: Dict[int, tuple] = {}  # id -> (start, agent)
+        self._retried = set()
+        self._busy_since = 0.0  # letzter Zeitpunkt der Parallelitäts-Kurve
+
+    def consume(self, event: Dict) -> None:
+        timestamp = _epoch(event.get("timestamp"))
+        if timestamp is None:
+            return
+        self.events += 1
+        if self.first_ts is None:
+            self.first_ts = self._busy_since = timestamp
+        self._advance(timestamp)
+        self.last_ts = timestamp
+
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        task_id = data.get("id")
+        handler = getattr(self, "_on_" + str(event_type), None)
+        if handler is not None and task_id is not None:
+            handler(task_id, data, timestamp)
+
+    # --- Event-Handler ---
+
+    def _on_task_added(self, task_id: int, data: Dict, ts: float) -> None:
+        task = data.get("task") or {}
+        self._deps[task_id] = list(task.get("dependencies", []))
+        if task.get("status", "pending") == "pending":
+            self._pending_since[task_id] = ts
+
+    def _on_task_assigned(self, task_id: int, data: Dict, ts: float) -> None:
+        ready = self._pending_since.pop(task_id, None)
+        if ready is not None:
+            for dep in self._deps.get(task_id, ()):
+                ready = max(ready, self._done_at.get(dep, ready))
+            self.queue_wait.add(ts - ready)
+        self._running[task_id] = (ts, data.get("agent") or "unknown")
+
+    def _on_task_completed(self, task_id: int, data: Dict, ts: float) -> None:
+        start, agent = self._stop(task_id)
+        agent = data.get("agent") or agent
+        duration = data.get("duration_sec")
+        if duration is None and start is not None:
+            duration = ts - start
+        if duration is not None:
+            self.durations.setdefault(agent, LogHistogram()).add(duration)
+        cost = data.get("cost", 0.00) or 0.00
+        stats = self._agent(agent)
+        stats["completed"] += 1
+        stats["cost_usd"] = add_usd(stats["cost_usd"], cost)
+        self.cost_usd = add_usd(self.cost_usd, cost)
+        self.completed += 1
+        self._done_at[task_id] = ts
+        self._minute(ts)["done"] += 1
+        self._forget(task_id)
+
+    def _on_task_failed(self, task_id: int, data: Dict, ts: float) -> None:
+        _, agent = self._stop(task_id)
+        self._agent(agent)["failed"] += 1
+        self.failed += 1
+        self._forget(task_id)
+
+    def _on_task_retry_scheduled(self, task_id: int, data: Dict,
+                                 ts: float) -> None:
+        _, agent = self._stop(task_id)
+        self._agent(agent)["retries"] += 1
+        self.retries += 1
+        if task_id not in self._retried:
+            self._retried.add(task_id)
+            self.retried_tasks += 1
+
+    def _on_task_requeued(self, task_id: int, data: Dict, ts: float) -> None:
+        self._stop(task_id)
+        reason = str(data.get("reason", "unknown")).split(":")[0]
+        self.requeues[reason] = self.requeues.get(reason, 0) + 1
+        self._pending_since[task_id] = ts
+
+    def _on_extra_cost(self, task_id: int, data: Dict, ts: float) -> None:
+        cost = data.get("cost", 0.00) or 0.00
+        self.extra_cost_usd = add_usd(self.extra_cost_usd, cost)
+        self.cost_usd = add_usd(self.cost_usd, cost)
+
+    def _on_task_hedged(self, task_id: int, data: Dict, ts: float) -> None:
+        self.hedges += 1
+
+    # --- Hilfen ---
+
+    def _stop(self, task_id: int) -> tuple:
+        """Beendet die laufende Ausführung (falls vorhanden)"""
+        return self._running.pop(task_id, (None, "unknown"))
+
+    def _forget(self, task_id: int) -> None:
+        self._pending_since.pop(task_id, None)
+        self._retried.discard(task_id)
+
+    def _agent(self, agent: str) -> Dict:
+        return self.agents.setdefault(agent, {
+            "completed": 0, "failed": 0, "retries": 0, "cost_usd": 0.00})
+
+    def _minute(self, ts: float) -> Dict:
+        return self.per_minute.setdefault(int(ts // 60),
+                                          {"done": 0, "busy_sec": 0.0})
+
+    def _advance(self, ts: float) -> None:
+        """Integriert die Zahl laufender Tasks bis ts (Minuten-Buckets)"""
+        running = len(self._running)
+        start = self._busy_since
+        while running and start < ts:
+            end = min(ts, (start // 60 + 1) * 60)
+            self._minute(start)["busy_sec"] += running * (end - start)
+            start = end
+        self._busy_since = max(self._busy_since, ts)
+
+    # --- Ergebnis ---
+
+    def report(self) -> Dict:
+        span = ((self.last_ts - self.first_ts)
+                if self.first_ts is not None else 0.0)
+        finished = self.completed + self.failed
+        timeline = []
+        for minute in sorted(self.per_minute):
+            bucket = self.per_minute[minute]
+            # angebrochene erste/letzte Minute: nur der beobachtete Teil
+            covered = (min(self.last_ts, (minute + 1) * 60)
+                       - max(self.first_ts, minute * 60))
+            timeline.append({
+                "minute": datetime.fromtimestamp(minute * 60).isoformat(),
+                "tasks_done": bucket["done"],
+                "parallelism": (round(bucket["busy_sec"] / covered, 2)
+                                if covered > 0 else 0.0)
+            })
+        busy = sum(bucket["busy_sec"] for bucket in self.per_minute.values())
+        agents = {}
+        for agent, stats in sorted(self.agents.items()):
+            agents[agent] = dict(stats)
+            agents[agent]["cost_per_task_usd"] = (
+                round(stats["cost_usd"] / stats["completed"], 4)
+                if stats["completed"] else 0.0)
+            agents[agent]["duration_sec"] = self.durations.get(
+                agent, LogHistogram()).summary()
+        return {
+            "events": self.events,
+            "start": (datetime.fromtimestamp(self.first_ts).isoformat()
+                      if self.first_ts is not None else None),
+            "end": (datetime.fromtimestamp(self.last_ts).isoformat()
+                    if self.last_ts is not None else None),
+            "span_sec": round(span, 1),
+            "tasks": {
+                "completed": self.completed,
+                "failed": self.failed,
+                "failure_rate": (round(self.failed / finished, 3)
+                                 if finished else 0.0),
+                "retried": self.retried_tasks,
+                "retries": self.retries,
+                "retry_rate": (round(self.retried_tasks / finished, 3)
+                               if finished else 0.0),
+                "requeues": dict(self.requeues),
+                "hedges": self.hedges
+            },
+            "throughput": {
+                "tasks_per_minute": (round(self.completed / span * 60, 2)
+                                     if span > 0 else 0.0),
+                "peak_tasks_per_minute": max(
+                    (bucket["done"] for bucket in self.per_minute.values()),
+                    default=0),
+                "avg_parallelism": round(busy / span, 2) if span > 0 else 0.0,
+                "peak_parallelism": max(
+                    (entry["parallelism"] for entry in timeline), default=0.0)
+            },
+            "queue_wait_sec": self.queue_wait.summary(),
+            "cost": {
+                "total_usd": self.cost_usd,
+                "extra_usd": self.extra_cost_usd,
+                "per_task_usd": (round(self.cost_usd / self.completed, 4)
+                                 if self.completed else 0.0)
+            },
+            "agents": agents,
+            "timeline": timeline
+        }
+
+
+def iter_session(session_file: Path, since: str = None,
+                 until: str = None) -> Iterable[Dict]:
+    """Alle Events aus Archiven + session.jsonl, zeilenweise gestreamt"""
+    session_file = Path(session_file)
+    files = list_archives(session_file)
+    if session_file.exists():
+        files.append(session_file)
+    for path in files:
+        with open_segment(path) as f:
+            for line in f:
+                if any(skip in line[:80] for skip in SKIPPED_EVENTS):
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # abgeschnittene letzte Zeile
+                timestamp = event.get("timestamp", "")
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp > until:
+                    return  # Segmente sind zeitlich sortiert
+                yield event
+
+
+def analyze_session(session_file: Path, since: str = None,
+                    until: str = None) -> Dict:
+    """Report über das komplette Session-Log (ein Durchlauf)"""
+    analytics = SessionAnalytics()
+    for event in iter_session(session_file, since, until):
+        analytics.consume(event)
+    return analytics.report()
+
+
+def format_report(report: Dict) -> str:
+    """Report als Text für die Konsole"""
+    tasks = report["tasks"]
+    throughput = report["throughput"]
+    wait = report["queue_wait_sec"]
+    cost = report["cost"]
+    lines = [
+        "📈 JARVIS Loop Report",
+        "=" * 50,
+        f"Zeitraum: {(report['start'] or '-')[:19]} - "
+        f"{(report['end'] or '-')[:19]} "
+        f"({report['span_sec']:.0f}s, {report['events']} Events)",
+        f"Tasks: {tasks['completed']} done, {tasks['failed']} failed "
+        f"(Fehlerrate {tasks['failure_rate']:.1%}), "
+        f"{tasks['retried']} mit Retry ({tasks['retries']} Retries, "
+        f"{tasks['retry_rate']:.1%})",
+        f"Durchsatz: {throughput['tasks_per_minute']:.2f} Tasks/min "
+        f"(Peak {throughput['peak_tasks_per_minute']}), Parallelität "
+        f"Ø {throughput['avg_parallelism']:.2f} / Peak "
+        f"{throughput['peak_parallelism']:.2f}",
+        "Wartezeit Queue: " + _format_histogram(wait),
+        f"Kosten: ${cost['total_usd']:.2f} (${cost['per_task_usd']:.4f}/Task"
+        f", davon Hedges/Extra ${cost['extra_usd']:.2f})",
+    ]
+    if tasks["requeues"]:
+        lines.append("Requeues: " + ", ".join(
+            f"{reason} {count}" for reason, count in
+            sorted(tasks["requeues"].items())))
+    if tasks["hedges"]:
+        lines.append(f"Hedges: {tasks['hedges']}")
+    lines.append("")
+    lines.append("Agents:")
+    for agent, stats in report["agents"].items():
+        lines.append(
+            f"  {agent:<12} {stats['completed']:>5} done "
+            f"{stats['failed']:>4} failed {stats['retries']:>4} retries  "
+            f"${stats['cost_usd']:.2f} (${stats['cost_per_task_usd']:.4f}"
+            f"/Task)")
+        lines.append(f"  {'':<12} Laufzeit: "
+                     + _format_histogram(stats["duration_sec"]))
+    if report["timeline"]:
+        lines.append("")
+        lines.append("Verlauf (Minute: Tasks done | Parallelität):")
+        peak = max(entry["parallelism"] for entry in report["timeline"]) or 1
+        for entry in report["timeline"][-30:]:
+            bar = "█" * int(round(entry["parallelism"] / peak * 30))
+            lines.append(f"  {entry['minute'][11:16]} {entry['tasks_done']:>5}"
+                         f" | {entry['parallelism']:>6.2f} {bar}")
+    return "\n".join(lines)
+
+
+def _format_histogram(summary: Dict) -> str:
+    if not summary.get("count"):
+        return "-"
+    return (f"p50 {summary['p50']:.2f}s, p90 {summary['p90']:.2f}s, "
+            f"p95 {summary['p95']:.2f}s, p99 {summary['p99']:.2f}s, "
+            f"max {summary['max']:.2f}s (n={summary['count']})")
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
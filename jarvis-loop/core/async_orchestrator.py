@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Async Orchestrator
+asyncio-Engine für hunderte gleichzeitige Agent-Sessions
+
+Gleiche API wie AgentOrchestrator.run_loop (TaskManager, SafeguardMonitor,
+Scheduling-Policy), aber eine Coroutine statt eines OS-Threads pro Agent.
+Lohnt sich, wenn Agents überwiegend warten (LLM-Calls, gateway wake).
+
+- Gesamtlimit async.max_concurrent (null = agents.parallel_max, wie die
+  Thread-Engine), pro Agent-Typ asyncio.Semaphore (async.per_agent_type,
+  ohne Eintrag das Gesamtlimit), darunter das AIMD-Fenster (concurrency)
+- Timeout pro Task über asyncio.wait_for (max_time_per_task_min)
+- kill_agent bricht die Coroutine ab (Cancellation)
+- Hedges (hedging.enabled) laufen als zusätzliche Coroutine und belegen
+  wie jeder Agent einen Slot der Semaphore ihres Typs
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from agent_orchestrator import AgentOrchestrator, SafeguardMonitor
+
+
+class AsyncAgentOrchestrator(AgentOrchestrator):
+    """Dispatch-Loop auf asyncio-Basis"""
+    
+    def __init__(self, project_path: str, config: Dict = None):
+        super().__init__(project_path, config)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}  # task_id -> Coroutine-Task
+        self._loop = None
+        self._max_parallel = 0
+    
+    def run_loop(self, task_manager, monitor: SafeguardMonitor = None,
+                 max_parallel: int = None) -> Dict:
+        """Synchroner Einstieg (z.B. aus dem TUI-Thread)"""
+        return asyncio.run(
+            self.run_loop_async(task_manager, monitor, max_parallel))
+    
+    async def run_loop_async(self, task_manager,
+                             monitor: SafeguardMonitor = None,
+                             max_parallel: int = None) -> Dict:
+        """
+        Wie AgentOrchestrator.run_loop: freie Slots sofort füllen,
+        Ergebnisse zurückschreiben, bei Safeguard sauber auslaufen lassen.
+        """
+        if self.config is None:
+            self.config = task_manager.config
+        config = self.config
+        async_config = config.get("async", {})
+        max_parallel = (max_parallel or async_config.get("max_concurrent")
+                        or config["agents"]["parallel_max"])
+        results = self._prepare_run(task_manager, monitor, max_parallel,
+                                    async_config.get("per_agent_type"))
+        monitor = self._monitor
+        timeout_sec = config["safeguards"].get("max_time_per_task_min", 30) * 60
+        self._loop = asyncio.get_running_loop()
+        self._semaphores = {}
+        self._max_parallel = max_parallel
+        
+        self._log(f"🎬 Starting Async Dispatch Loop: max {max_parallel} "
+                  f"parallel, policy {self.policy.name}")
+        
+        in_flight: Dict[asyncio.Task, Dict] = {}
+        leases = self._start_lease_keeper(task_manager)
+        try:
+            while True:
+                if self.profiler is not None:
+                    self.profiler.tick()
+                self._requeue_due_retries(task_manager)
+                if (not self._stop.is_set()
+                        and self._dispatch_allowed.is_set()):
+                    await self._fill_slots_async(task_manager, in_flight,
+                                                 max_parallel, timeout_sec)
+                    await self._launch_hedges_async(task_manager, in_flight,
+                                                    max_parallel, timeout_sec)
+                
+                if not in_flight:
+                    if self._stop.is_set():
+                        break
+                    if self._dispatch_allowed.is_set():
+                        if not self.retries:
+                            break  # nichts mehr bereit: fertig oder blockiert
+                        await asyncio.sleep(self.retries.tick_sec)  # Backoff
+                        continue
+                    await asyncio.sleep(0.5)  # pausiert
+                    continue
+                
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=0.5,
+                    return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    result = self._collect_result(future, task)
+                    if "batch" in task:
+                        self._report_batch(task_manager, task, result,
+                                           results)
+                        continue
+                    if self._resolve_hedge(task_manager, task, future,
+                                           result):
+                        continue  # verworfenes Duplikat
+                    self._report_result(task_manager, task, result, results)
+                    self._check_safeguards(monitor, result, results)
+        finally:
+            leases.stop()
+            self._release_pending_retries(task_manager)
+            if self.hedger is not None:
+                self.hedger.close_all()
+            if self.profiler is not None:
+                self.profiler.detach()
+        
+        self._report_budget_blocked(monitor, results)
+        self._report_hedges(results)
+        self._export_traces(results)
+        task_manager.flush()
+        return results
+    
+    async def _fill_slots_async(self, task_manager, in_flight: Dict,
+                                max_parallel: int, timeout_sec: float) -> None:
+        """Startet bereite Tasks solange globale und Typ-Slots frei sind"""
+        if len(in_flight) >= max_parallel:
+            return
+        ready = self.policy.order(task_manager.get_ready_tasks(), task_manager)
+        for task in self._group_batches(ready):
+            if len(in_flight) >= max_parallel:
+                break
+            agent_type = self.select_agent(task["type"])
+            semaphore = self._semaphore(agent_type)
+            slot_free = lambda: not semaphore.locked()  # Agent-Typ ausgelastet?
+            if "batch" in task:
+                members = self._claim_batch(task_manager, task, agent_type,
+                                            in_flight, slot_free)
+                if not members:
+                    continue
+                if len(members) > 1:
+                    task = self._spawn_batch(members, agent_type)
+                else:
+                    task = members[0]  # Rest des Batches: einzeln starten
+            elif not self._claim_task(task_manager, task, agent_type,
+                                      in_flight, slot_free):
+                continue
+            await semaphore.acquire()
+            if "batch" not in task:
+                self.spawn_agent(task, agent_type)
+                self._mark_started(task, agent_type)
+            coroutine = self._execute_async(task, agent_type, semaphore,
+                                            timeout_sec)
+            future = asyncio.create_task(coroutine)
+            for member in task.get("batch", [task]):
+                self._tasks[member["id"]] = future
+            in_flight[future] = task
+    
+    async def _launch_hedges_async(self, task_manager, in_flight: Dict,
+                                   max_parallel: int,
+                                   timeout_sec: float) -> None:
+        """
+        Startet Duplikate für Tasks, die länger als das p95 laufen - nur
+        mit freiem Slot in der Semaphore ihres Agent-Typs
+        """
+        for task, agent_type in self._hedge_candidates(in_flight,
+                                                       max_parallel):
+            semaphore = self._semaphore(agent_type)
+            if semaphore.locked():  # Agent-Typ ausgelastet: kein Duplikat
+                self.hedger.cancel(self._monitor.ledger, task)
+                continue
+            await semaphore.acquire()
+            hedge = asyncio.create_task(self._execute_async(
+                task, agent_type, semaphore, timeout_sec, hedge=True))
+            in_flight[hedge] = task
+            primary = self._tasks[task["id"]]
+            self._register_hedge(task_manager, task, agent_type, {
+                primary: lambda future=primary: self._cancel_future(future),
+                hedge: lambda future=hedge: self._cancel_future(future)
+            }, hedge)
+    
+    def _resolved_future(self, result: Dict) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(result)
+        return future
+    
+    def _cancel_future(self, future: asyncio.Task) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(future.cancel)
+    
+    async def _execute_async(self, task: Dict, agent_type: str,
+                             semaphore: asyncio.Semaphore, timeout_sec: float,
+                             hedge: bool = False) -> Dict:
+        """
+        Führt Task über executor.run_async aus (mit Timeout) und gibt den
+        Slot der Semaphore danach frei; hedge = Duplikat eines laufenden Tasks
+        """
+        task_id = task["id"]
+        executor = self._get_executor()
+        
+        def on_output(stream: str, line: str) -> None:
+            marker = "!" if stream == "stderr" else " "
+            self._log(f"  #{task_id}{marker} {line}")
+        
+        tracer = self.tracer if not hedge else None
+        if tracer is not None:
+            for member in task.get("batch", [task]):
+                tracer.run_started(member["id"])
+        try:
+            if hedge:
+                # Duplikat arbeitet in einer eigenen Kopie des Projekts
+                task = await asyncio.to_thread(self.hedger.open_workspace,
+                                               self.project_path, task)
+            return await asyncio.wait_for(
+                executor.run_async(task, agent_type, self.build_prompt(task),
+                                   on_output=on_output),
+                timeout=timeout_sec)
+        except asyncio.TimeoutError:
+            return executor._result(task, agent_type, False,
+                                    error=f"Timeout nach {timeout_sec:.0f}s")
+        except asyncio.CancelledError:
+            return executor._result(task, agent_type, False, error="cancelled")
+        finally:
+            semaphore.release()
+            if not hedge:
+                for member in task.get("batch", [task]):
+                    self._tasks.pop(member["id"], None)
+                    if tracer is not None:
+                        tracer.run_finished(member["id"])
+    
+    def _semaphore(self, agent_type: str) -> asyncio.Semaphore:
+        """
+        Semaphore pro Agent-Typ (async.per_agent_type, sonst 'default',
+        sonst das Gesamtlimit)
+        """
+        if agent_type not in self._semaphores:
+            limits = self.config.get("async", {}).get("per_agent_type") or {}
+            limit = limits.get(agent_type,
+                               limits.get("default", self._max_parallel))
+            self._semaphores[agent_type] = asyncio.Semaphore(limit)
+        return self._semaphores[agent_type]
+    
+    def kill_agent(self, task_id: int) -> bool:
+        """Beendet Agent: Coroutine wird (thread-sicher) abgebrochen"""
+        future = self._tasks.get(task_id)
+        if future is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(future.cancel)
+        return super().kill_agent(task_id)
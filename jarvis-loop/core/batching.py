@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Task Batching
+Mehrere kleine Tasks in einer Agent-Session
+
+PDR-Generierung erzeugt viele winzige Tasks (z.B. config: "README
+erstellen", "API Dokumentation"), die jeweils den vollen Agent-Start
+bezahlen. Bereite Tasks gleichen Typs (batching.task_types) mit kleiner
+Schätzung (<= max_task_cost_usd) werden zu einem Batch von höchstens
+max_tasks Tasks bzw. max_batch_cost_usd zusammengefasst: ein Prompt, ein
+Agent, ein Slot.
+
+Der Agent gliedert seine Ausgabe pro Task:
+
+    === JARVIS TASK #<id> ===
+    ...
+    JARVIS_TASK_STATUS=ok | failed
+
+Danach wird die Ausgabe pro Task-ID aufgeteilt, die Kosten anteilig nach
+estimated_cost verteilt. Scheitert der Batch (oder fehlt der Abschnitt
+eines Tasks), laufen die betroffenen Tasks danach einzeln.
+"""
+
+import re
+from decimal import Decimal
+from typing import Callable, Dict, List, Set
+
+from budget import to_decimal
+
+SECTION_PATTERN = re.compile(r"^=== JARVIS TASK #(\d+) ===[ \t]*$",
+                             re.MULTILINE)
+STATUS_PATTERN = re.compile(r"JARVIS_TASK_STATUS=(ok|failed)")
+
+
+class TaskBatcher:
+    """Bildet Batches aus bereiten Tasks und teilt Batch-Ergebnisse auf"""
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.task_types = set(config.get("task_types", ["config"]))
+        self.max_task_cost_usd = config.get("max_task_cost_usd", 0.50)
+        self.min_tasks = max(2, config.get("min_tasks", 2))
+        self.max_tasks = config.get("max_tasks", 5)
+        self.max_batch_cost_usd = config.get("max_batch_cost_usd", 2.50)
+        self.excluded: Set[int] = set()  # nach gescheitertem Batch: einzeln
+
+    def batchable(self, task: Dict) -> bool:
+        return (self.enabled
+                and task["type"] in self.task_types
+                and task.get("estimated_cost", 0.50) <= self.max_task_cost_usd
+                and task["id"] not in self.excluded)
+
+    def group(self, ready: List[Dict]) -> List[Dict]:
+        """
+        Fasst batchfähige Tasks gleichen Typs zusammen. Ein Batch steht an
+        der Stelle seines ersten Tasks: {"type", "batch": [tasks]}.
+        """
+        if not self.enabled:
+            return ready
+        items: List[Dict] = []
+        open_batches: Dict[str, Dict] = {}  # type -> Batch mit freiem Platz
+        for task in ready:
+            if not self.batchable(task):
+                items.append(task)
+                continue
+            batch = open_batches.get(task["type"])
+            estimate = task.get("estimated_cost", 0.50)
+            if batch is None or (batch["cost"] + estimate
+                                 > self.max_batch_cost_usd):
+                batch = {"type": task["type"], "batch": [], "cost": 0.0}
+                open_batches[task["type"]] = batch
+                items.append(batch)
+            batch["batch"].append(task)
+            batch["cost"] += estimate
+            if len(batch["batch"]) >= self.max_tasks:
+                del open_batches[task["type"]]
+
+        grouped = []
+        for item in items:
+            if "batch" not in item:
+                grouped.append(item)
+            elif len(item["batch"]) >= self.min_tasks:
+                grouped.append({"type": item["type"], "batch": item["batch"]})
+            else:
+                grouped.extend(item["batch"])  # zu klein: einzeln
+        return grouped
+
+    def build_prompt(self, batch: Dict,
+                     build_task_prompt: Callable[[Dict], str]) -> str:
+        """Gemeinsamer Prompt: Anleitung + Prompt jedes einzelnen Tasks"""
+        members = batch["batch"]
+        ids = ", ".join(f"#{task['id']}" for task in members)
+        sections = "\n".join(
+            f"=== JARVIS TASK #{task['id']} ===\n{build_task_prompt(task)}"
+            for task in members)
+        return f"""
+JARVIS LOOP BATCH: {len(members)} Tasks ({batch['type']}): {ids}
+
+Bearbeite alle folgenden Tasks nacheinander in dieser Session.
+Gliedere deine Ausgabe pro Task:
+- beginne mit der Zeile: === JARVIS TASK #<id> ===
+- ende mit der Zeile: JARVIS_TASK_STATUS=ok (bzw. =failed mit Grund)
+Ein fehlgeschlagener Task bricht den Batch NICHT ab.
+Kosten einmal für den ganzen Batch melden (JARVIS_COST=<usd>).
+
+{sections}
+"""
+
+    def split(self, batch: Dict, result: Dict) -> Dict[int, Dict]:
+        """
+        Teilt ein Batch-Ergebnis in Ergebnisse pro Task-ID auf.
+        success=False für Tasks ohne Abschnitt oder mit Status 'failed'
+        (bzw. alle, wenn der Batch als Ganzes gescheitert ist).
+        """
+        members = batch["batch"]
+        sections = _sections(result.get("output") or "")
+        shares = _cost_shares(members, result.get("cost_usd", 0.00) or 0.00)
+        split = {}
+        for task in members:
+            section = sections.get(task["id"])
+            statuses = STATUS_PATTERN.findall(section or "")
+            success = bool(result.get("success") and statuses
+                           and statuses[-1] == "ok")
+            if success:
+                error = None
+            elif not result.get("success"):
+                error = result.get("error") or "Batch fehlgeschlagen"
+            elif section is None:
+                error = "Kein Abschnitt in der Batch-Ausgabe"
+            else:
+                error = "Task im Batch fehlgeschlagen"
+            split[task["id"]] = {
+                "task_id": task["id"],
+                "success": success,
+                "agent_type": result.get("agent_type"),
+                "output": section,
+                "error": error,
+                "cost_usd": shares[task["id"]],
+                "exit_code": result.get("exit_code"),
+                "batch": batch["id"]
+            }
+        return split
+
+
+def _sections(output: str) -> Dict[int, str]:
+    """Task-ID -> Ausgabe-Abschnitt (letzter Abschnitt pro ID gewinnt)"""
+    matches = list(SECTION_PATTERN.finditer(output))
+    sections = {}
+    for index, match in enumerate(matches):
+        end = (matches[index + 1].start() if index + 1 < len(matches)
+               else len(output))
+        sections[int(match.group(1))] = output[match.end():end].strip("\n")
+    return sections
+
+
+def _cost_shares(members: List[Dict], cost: float) -> Dict[int, float]:
+    """Verteilt die Batch-Kosten anteilig nach estimated_cost (exakt)"""
+    total = to_decimal(cost)
+    weights = [to_decimal(task.get("estimated_cost", 0.50)) for task in members]
+    weight_sum = sum(weights, Decimal("0"))
+    shares = {}
+    remaining = total
+    for index, (task, weight) in enumerate(zip(members, weights)):
+        if index == len(members) - 1:
+            share = remaining  # Rundungsrest auf den letzten Task
+        elif weight_sum > 0:
+            share = to_decimal(total * weight / weight_sum)
+        else:
+            share = to_decimal(total / len(members))
+        remaining -= share
+        shares[task["id"]] = float(share)
+    return shares
+
+
+def create_batcher(config: Dict) -> TaskBatcher:
+    """Batcher laut batching-Sektion der Config"""
+    return TaskBatcher(config.get("batching", {}))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Blob Store
+Content-addressed Ablage für Task-Outputs
+
+tasks.json (und das Journal) enthalten statt des Output-Strings nur eine
+Referenz: output_ref = {"digest": sha256, "size": Bytes, "codec": ...}.
+Der Inhalt liegt einmalig (dedupliziert) unter output/blobs/<ab>/<digest>,
+ab storage.outputs.compress_min_bytes komprimiert:
+
+- zstd: wenn das Paket 'zstandard' installiert ist (pip install zstandard)
+- gzip: Fallback aus der Standardbibliothek
+- none: kleine Outputs bleiben unkomprimiert
+
+Gelesen wird erst bei Bedarf (TUI, status) über mmap - unkomprimierte
+Blobs nur im angezeigten Ausschnitt.
+"""
+
+import gzip
+import hashlib
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+CODECS = ("none", "gzip", "zstd")
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class BlobStore:
+    """Speichert Strings unter ihrem SHA-256 (einmal pro Inhalt)"""
+
+    def __init__(self, root: Path, codec: str = "zstd",
+                 compress_min_bytes: int = 1024, level: int = 3):
+        if codec not in CODECS:
+            raise ValueError(f"Unbekannter Output-Codec: {codec}")
+        if codec == "zstd" and not ZSTD_AVAILABLE:
+            codec = "gzip"
+        self.root = Path(root)
+        self.codec = codec
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+
+    def put(self, text: str) -> Dict:
+        """Legt text ab (falls neu) und gibt die Referenz zurück"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        codec = self.codec if len(data) >= self.compress_min_bytes else "none"
+        ref = {"digest": digest, "size": len(data), "codec": codec}
+        path = self._path(ref)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._compress(data, codec))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return ref
+
+    def get(self, ref: Dict, max_bytes: int = None,
+            tail: bool = False) -> Optional[str]:
+        """
+        Liest einen Blob (None wenn er fehlt). max_bytes begrenzt auf den
+        Anfang bzw. mit tail=True auf das Ende des Outputs.
+        """
+        path = self._path(ref)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = self._read(view, ref, max_bytes, tail)
+        return data.decode("utf-8", errors="replace")
+
+    def _read(self, view: mmap.mmap, ref: Dict, max_bytes: Optional[int],
+              tail: bool) -> bytes:
+        size = ref["size"]
+        if max_bytes is None or max_bytes >= size:
+            start, end = 0, size
+        elif tail:
+            start, end = size - max_bytes, size
+        else:
+            start, end = 0, max_bytes
+        if ref["codec"] == "none":
+            return view[start:end]  # nur der Ausschnitt wird eingelesen
+        stream = self._decompressor(view, ref["codec"])
+        if start:
+            _skip(stream, start)
+        return stream.read(end - start)
+
+    def _path(self, ref: Dict) -> Path:
+        digest = ref["digest"]
+        return self.root / digest[:2] / (digest + SUFFIXES[ref["codec"]])
+
+    def _compress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        if codec == "gzip":
+            return gzip.compress(data, compresslevel=min(9, self.level * 2))
+        return data
+
+    @staticmethod
+    def _decompressor(view: mmap.mmap, codec: str):
+        if codec == "zstd":
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError("Output ist zstd-komprimiert: "
+                                   "pip install zstandard")
+            return zstandard.ZstdDecompressor().stream_reader(view)
+        return gzip.GzipFile(fileobj=view, mode="rb")
+
+
+def _skip(stream, count: int, chunk: int = 1024 * 1024) -> None:
+    """Überspringt count Bytes eines Dekompressions-Streams"""
+    while count > 0:
+        skipped = len(stream.read(min(chunk, count)))
+        if not skipped:
+            return
+        count -= skipped
+
+
+def create_blob_store(project_path: Path, config: Dict) -> BlobStore:
+    """Blob Store laut storage.outputs (unter <projekt>/output/blobs)"""
+    outputs = config.get("storage", {}).get("outputs", {})
+    return BlobStore(Path(project_path) / outputs.get("dir", "output/blobs"),
+                     outputs.get("codec", "zstd"),
+                     outputs.get("compress_min_bytes", 1024),
+                     outputs.get("level", 3))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Budget Ledger
+Admission Control für parallele Tasks
+
+Vor dem Dispatch wird estimated_cost reserviert, nach dem Lauf mit den
+tatsächlichen Kosten abgerechnet (settle) bzw. bei nie gestarteten Tasks
+freigegeben (release). Ein Task wird nur zugelassen, wenn
+verbucht + reserviert + Schätzung <= max_total_cost_usd bleibt - so
+überschreiten N parallele Tasks das Limit nicht mehr um N x Task-Kosten.
+
+Gerechnet wird mit Decimal (auf Cent-Bruchteile gerundet), damit sich
+Summen wie 0.1 + 0.2 nicht aufschaukeln.
+"""
+
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Hashable, Optional, Union
+
+Amount = Union[Decimal, float, int, str]
+
+# 1/10000 USD - feiner als jede Token-Abrechnung, grob genug gegen Float-Rauschen
+QUANTUM = Decimal("0.0001")
+
+
+def to_decimal(value: Optional[Amount]) -> Decimal:
+    """USD-Betrag als Decimal (Floats über ihre Dezimaldarstellung)"""
+    if value is None:
+        return Decimal("0")
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def add_usd(total: Amount, cost: Amount) -> float:
+    """Exakte Summe zweier USD-Beträge (für JSON-Felder wie cost_usd)"""
+    return float(to_decimal(total) + to_decimal(cost))
+
+
+class BudgetLedger:
+    """Thread-sicheres Kostenbuch: verbucht + reserviert <= Limit"""
+
+    def __init__(self, limit_usd: Amount, per_task_limit_usd: Amount = None,
+                 committed_usd: Amount = 0):
+        self.limit = to_decimal(limit_usd)
+        self.per_task_limit = (to_decimal(per_task_limit_usd)
+                               if per_task_limit_usd is not None else None)
+        self._committed = to_decimal(committed_usd)
+        self._reservations: Dict[Hashable, Decimal] = {}  # meist task_id
+        self._lock = threading.Lock()
+
+    @property
+    def committed(self) -> Decimal:
+        return self._committed
+
+    @property
+    def reserved(self) -> Decimal:
+        with self._lock:
+            return sum(self._reservations.values(), Decimal("0"))
+
+    @property
+    def available(self) -> Decimal:
+        with self._lock:
+            return self.limit - self._committed - sum(
+                self._reservations.values(), Decimal("0"))
+
+    def reservations(self) -> Dict[Hashable, Decimal]:
+        with self._lock:
+            return dict(self._reservations)
+
+    def reserve(self, task_id: Hashable, estimated_usd: Amount) -> bool:
+        """Reserviert die Schätzung; False wenn das Budget nicht reicht"""
+        amount = max(to_decimal(estimated_usd), Decimal("0"))
+        if self.per_task_limit is not None and amount > self.per_task_limit:
+            return False
+        with self._lock:
+            if task_id in self._reservations:
+                return True
+            reserved = sum(self._reservations.values(), Decimal("0"))
+            if self._committed + reserved + amount > self.limit:
+                return False
+            self._reservations[task_id] = amount
+            return True
+
+    def settle(self, task_id: Hashable, actual_usd: Amount) -> Decimal:
+        """Ersetzt die Reservierung durch die tatsächlichen Kosten"""
+        amount = to_decimal(actual_usd)
+        with self._lock:
+            self._reservations.pop(task_id, None)
+            self._committed += amount
+            return self._committed
+
+    def release(self, task_id: Hashable) -> None:
+        """Gibt die Reservierung ohne Kosten frei (Task lief nie)"""
+        with self._lock:
+            self._reservations.pop(task_id, None)
+
+    def exceeds_task_limit(self, actual_usd: Amount) -> bool:
+        return (self.per_task_limit is not None
+                and to_decimal(actual_usd) > self.per_task_limit)
+
+    def snapshot(self) -> Dict:
+        """Stand des Kostenbuchs (Floats, für Status/TUI)"""
+        with self._lock:
+            reserved = sum(self._reservations.values(), Decimal("0"))
+            return {
+                "limit_usd": float(self.limit),
+                "committed_usd": float(self._committed),
+                "reserved_usd": float(reserved),
+                "available_usd": float(self.limit - self._committed - reserved),
+                "reservations": len(self._reservations)
+            }
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Adaptive Concurrency
+AIMD-Regler für die Anzahl paralleler Agents pro Agent-Typ
+
+Wie TCP-Congestion-Control:
+- Additive Increase: pro erfolgreich abgeschlossenem "Fenster" an Tasks
+  steigt das Limit um increase_step
+- Multiplicative Decrease: bei Fehlerquote über error_rate_threshold oder
+  Latenz über latency_tolerance x Basislatenz wird das Limit mit
+  decrease_factor multipliziert (höchstens einmal pro cooldown_sec)
+- Budget: fällt das Restbudget unter budget_low_fraction, wird das Limit
+  proportional gedeckelt
+
+Grenzen: concurrency.min_parallel .. max_parallel (default: Engine-Limit,
+bei der async-Engine das Limit des Agent-Typs aus async.per_agent_type).
+Nur mit concurrency.adaptive = true, sonst gilt fest das Engine-Limit.
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class _TypeState:
+    """Regler-Zustand eines Agent-Typs"""
+
+    def __init__(self, window: float, max_parallel: int, sample_window: int):
+        self.window = window
+        self.max_parallel = max_parallel
+        self.baseline_latency: Optional[float] = None
+        self.outcomes = deque(maxlen=sample_window)  # True = Erfolg
+        self.last_decrease = 0.0
+
+
+class AIMDController:
+    """Hält pro Agent-Typ ein dynamisches Parallelitäts-Fenster"""
+
+    def __init__(self, config: Dict, max_parallel: int,
+                 type_limits: Dict[str, int] = None):
+        self.enabled = config.get("adaptive", False)
+        self.min_parallel = max(1, config.get("min_parallel", 1))
+        self.max_parallel = config.get("max_parallel") or max_parallel
+        self.type_limits = type_limits or {}
+        self.initial_parallel = config.get("initial_parallel")
+        self.increase_step = config.get("increase_step", 1)
+        self.decrease_factor = config.get("decrease_factor", 0.5)
+        self.latency_tolerance = config.get("latency_tolerance", 2.0)
+        self.latency_alpha = config.get("latency_alpha", 0.1)
+        self.error_rate_threshold = config.get("error_rate_threshold", 0.25)
+        self.sample_window = config.get("sample_window", 20)
+        self.cooldown_sec = config.get("cooldown_sec", 10)
+        self.budget_low_fraction = config.get("budget_low_fraction", 0.2)
+        self._budget_share = 1.0
+        self._states: Dict[str, _TypeState] = {}
+        self._lock = threading.Lock()
+
+    def window(self, agent_type: str) -> int:
+        """Aktuell erlaubte Anzahl paralleler Agents dieses Typs"""
+        state = self._state(agent_type)
+        if not self.enabled:
+            return state.max_parallel
+        budget_cap = math.ceil(state.max_parallel * self._budget_share)
+        return max(self.min_parallel, min(int(state.window), budget_cap))
+
+    def can_admit(self, agent_type: str, in_flight: int) -> bool:
+        return in_flight < self.window(agent_type)
+
+    def record(self, agent_type: str, latency_sec: float, success: bool,
+               budget_left_fraction: float = 1.0) -> Optional[Dict]:
+        """
+        Meldet ein Task-Ergebnis. Gibt bei Fensteränderung
+        {agent_type, window, reason} zurück, sonst None.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            state = self._state(agent_type)
+            before = self.window(agent_type)
+            reason = self._adjust(state, latency_sec, success)
+            self._update_budget_cap(budget_left_fraction)
+            after = self.window(agent_type)
+        if after == before:
+            return None
+        if after < before and reason not in ("errors", "latency"):
+            reason = "budget"
+        elif after > before and reason is None:
+            reason = "recovered"
+        return {"agent_type": agent_type, "window": after, "reason": reason}
+
+    def snapshot(self) -> Dict[str, int]:
+        """Fenster aller bekannten Agent-Typen (für TUI / Session-Log)"""
+        return {agent_type: self.window(agent_type)
+                for agent_type in list(self._states)}
+
+    def _adjust(self, state: _TypeState, latency_sec: float,
+                success: bool) -> Optional[str]:
+        state.outcomes.append(success)
+        now = time.monotonic()
+
+        slow = False
+        if success:
+            if state.baseline_latency is None:
+                state.baseline_latency = latency_sec
+            else:
+                slow = latency_sec > self.latency_tolerance * state.baseline_latency
+                if not slow:
+                    state.baseline_latency += self.latency_alpha * (
+                        latency_sec - state.baseline_latency)
+
+        failures = state.outcomes.count(False)
+        error_rate = failures / len(state.outcomes)
+        overloaded = (not success and error_rate > self.error_rate_threshold) or slow
+
+        if overloaded:
+            if now - state.last_decrease < self.cooldown_sec:
+                return None
+            state.last_decrease = now
+            state.window = max(float(self.min_parallel),
+                               state.window * self.decrease_factor)
+            return "latency" if slow else "errors"
+
+        if success:
+            # +increase_step pro vollem Fenster erfolgreicher Tasks
+            state.window = min(float(state.max_parallel),
+                               state.window + self.increase_step / state.window)
+            return "increase"
+        return None
+
+    def _update_budget_cap(self, budget_left_fraction: float) -> None:
+        if budget_left_fraction >= self.budget_low_fraction:
+            self._budget_share = 1.0
+        else:
+            self._budget_share = (max(0.0, budget_left_fraction)
+                                  / self.budget_low_fraction)
+
+    def _state(self, agent_type: str) -> _TypeState:
+        if agent_type not in self._states:
+            limit = self.type_limits.get(
+                agent_type, self.type_limits.get("default", self.max_parallel))
+            maximum = max(self.min_parallel, min(self.max_parallel, limit))
+            initial = min(maximum, self.initial_parallel or maximum)
+            self._states[agent_type] = _TypeState(float(initial), maximum,
+                                                  self.sample_window)
+        return self._states[agent_type]
+
+
+def create_controller(config: Dict, max_parallel: int,
+                      type_limits: Dict[str, int] = None) -> AIMDController:
+    """Erstellt AIMD-Regler laut concurrency-Sektion der Config"""
+    return AIMDController(config.get("concurrency", {}), max_parallel,
+                          type_limits)
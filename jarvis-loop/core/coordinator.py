@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Coordinator
+Orchestrator-Engine, die bereite Tasks an entfernte Worker verteilt
+
+Gleiche Pipeline wie AgentOrchestrator.run_loop (Policy, AIMD-Fenster,
+Budget-Reservierung, Result-Cache, Leases), aber statt eines lokalen
+Thread-Pools holen Worker (`jarvis-loop worker`) die Tasks über das
+Socket-Protokoll aus worker_pool.py.
+
+Alle Zustandsänderungen laufen im Loop-Thread: Verbindungs-Threads lesen
+nur Nachrichten und reichen sie über eine Queue weiter.
+Fällt ein Worker weg (Verbindung zu oder kein Heartbeat seit
+workers.timeout_sec), gehen seine Tasks sofort zurück auf 'pending'.
+"""
+
+import hmac
+import queue
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from agent_orchestrator import AgentOrchestrator, SafeguardMonitor
+from worker_pool import (WorkerConnection, ProtocolError, check_listen_address,
+                         format_address, open_listener, recv_message)
+
+DEFAULT_LISTEN = "tcp://127.0.0.1:7420"
+
+
+class CoordinatorOrchestrator(AgentOrchestrator):
+    """Dispatch-Loop für einen Pool entfernter Worker"""
+
+    def __init__(self, project_path: str, config: Dict = None,
+                 listen: str = None):
+        super().__init__(project_path, config)
+        self.listen = listen
+        self.address: Optional[str] = None  # tatsächliche Adresse (Port 0)
+        self._events: "queue.Queue[Tuple[str, WorkerConnection, Dict]]" = \
+            queue.Queue()
+        self._workers: Dict[int, WorkerConnection] = {}  # id(conn) -> conn
+        self._assigned: Dict[int, Tuple[WorkerConnection, Dict]] = {}
+        self._server: Optional[socket.socket] = None
+        self._listening = threading.Event()
+        self._token: Optional[str] = None
+        self._max_message_bytes = 16 * 1024 * 1024
+        if config is not None:
+            # früh scheitern (vor TUI/Loop), nicht erst beim Start des Servers
+            workers_config = config.get("workers", {})
+            check_listen_address(self._listen_address(workers_config),
+                                 workers_config.get("token"))
+
+    def _listen_address(self, workers_config: Dict) -> str:
+        return self.listen or workers_config.get("listen", DEFAULT_LISTEN)
+
+    def run_loop(self, task_manager, monitor: SafeguardMonitor = None,
+                 max_parallel: int = None) -> Dict:
+        """
+        Verteilt Tasks bis nichts mehr bereit ist und kein Worker mehr
+        an einem Task arbeitet (bzw. ein Safeguard greift)
+        """
+        if self.config is None:
+            self.config = task_manager.config
+        workers_config = self.config.get("workers", {})
+        self._token = workers_config.get("token")
+        address = self._listen_address(workers_config)
+        check_listen_address(address, self._token)
+        max_parallel = max_parallel or workers_config.get("max_outstanding", 64)
+        results = self._prepare_run(task_manager, monitor, max_parallel)
+        monitor = self._monitor
+        timeout_sec = workers_config.get("timeout_sec", 20)
+        self._max_message_bytes = int(
+            workers_config.get("max_message_mb", 16) * 1024 * 1024)
+
+        self._start_server(address)
+        self._log(f"🎬 Coordinator lauscht auf {self.address}: max "
+                  f"{max_parallel} Tasks verteilt, policy {self.policy.name}")
+        disabled = [name for name, feature in (("Batching", self.batcher),
+                                                ("Hedging", self.hedger))
+                    if feature.enabled]
+        if disabled:
+            self._log(f"ℹ️  {' und '.join(disabled)} im Coordinator-Modus "
+                      f"nicht unterstützt - Tasks laufen einzeln, ohne Duplikate")
+
+        leases = self._start_lease_keeper(task_manager)
+        try:
+            while True:
+                if self.profiler is not None:
+                    self.profiler.tick()
+                self._requeue_due_retries(task_manager)
+                try:
+                    event = self._events.get(timeout=0.5)
+                except queue.Empty:
+                    event = None
+                if event is not None:
+                    self._handle_event(task_manager, event, results, monitor,
+                                       max_parallel)
+                self._expire_workers(task_manager, timeout_sec)
+
+                if not self._assigned and self._finished(task_manager):
+                    break
+        finally:
+            leases.stop()
+            self._stop_server()
+            self._release_pending_retries(task_manager)
+            if self.profiler is not None:
+                self.profiler.detach()
+
+        self._report_budget_blocked(monitor, results)
+        self._export_traces(results)
+        task_manager.flush()
+        return results
+
+    def _finished(self, task_manager) -> bool:
+        """Nichts verteilt und nichts (zulassungsfähiges) mehr bereit?"""
+        if self._stop.is_set():
+            return True
+        if not self._dispatch_allowed.is_set() or self.retries:
+            return False  # pausiert bzw. Retries stehen noch aus
+        ready = {task["id"] for task in task_manager.get_ready_tasks()}
+        return not ready or ready <= self._budget_blocked
+
+    def _handle_event(self, task_manager, event: Tuple, results: Dict,
+                      monitor: SafeguardMonitor, max_parallel: int) -> None:
+        kind, worker, message = event
+        if kind == "lost":
+            self._drop_worker(task_manager, worker, message.get("reason"))
+            return
+        if id(worker) not in self._workers and kind != "hello":
+            return  # Nachricht eines bereits entfernten Workers
+
+        if kind == "hello":
+            if self._token and not hmac.compare_digest(
+                    str(message.get("token") or ""), str(self._token)):
+                worker.send({"type": "error", "message": "Ungültiges Token"})
+                worker.close()
+                return
+            worker.worker_id = str(message.get("worker_id") or worker.peer)
+            worker.capacity = int(message.get("capacity", 1))
+            worker.registered = True
+            self._workers[id(worker)] = worker
+            worker.send({"type": "welcome"})
+            self._log(f"🔌 Worker {worker.worker_id} verbunden "
+                      f"({worker.capacity} parallel)")
+        elif kind == "pull":
+            batch = self._dispatch_to_worker(task_manager, worker,
+                                             int(message.get("max", 1)),
+                                             max_parallel, results, monitor)
+            if not worker.send({"type": "tasks", "tasks": batch}):
+                self._drop_worker(task_manager, worker, "send failed")
+        elif kind == "result":
+            self._handle_result(task_manager, worker,
+                                message.get("result") or {}, results, monitor)
+        elif kind == "output":
+            marker = "!" if message.get("stream") == "stderr" else " "
+            self._log(f"  #{message.get('task_id')}{marker} "
+                      f"{message.get('line', '')}")
+
+    def _dispatch_to_worker(self, task_manager, worker: WorkerConnection,
+                            count: int, max_parallel: int, results: Dict,
+                            monitor: SafeguardMonitor) -> List[Dict]:
+        """Weist einem Worker bis zu count bereite Tasks zu (laut Policy)"""
+        if self._stop.is_set() or not self._dispatch_allowed.is_set():
+            return []
+        batch = []
+        ready = self.policy.order(task_manager.get_ready_tasks(), task_manager)
+        for task in ready:
+            if len(batch) >= count or len(self._assigned) >= max_parallel:
+                break
+            agent_type = self.select_agent(task["type"])
+            cached = self._cached_result(task_manager, task, agent_type)
+            if cached is not None:
+                if task_manager.assign_task(task["id"], agent_type):
+                    self._report_result(task_manager, task, cached, results)
+                continue  # kein Worker nötig
+            if not self._admit(agent_type):
+                continue
+            if not self._reserve_budget(task):
+                continue
+            if not task_manager.assign_task(task["id"], agent_type):
+                monitor.ledger.release(task["id"])
+                continue
+            if self.tracer is not None:
+                self.tracer.admit(task, agent_type)
+            agent_info = self.spawn_agent(task, agent_type)
+            agent_info["worker"] = worker.worker_id
+            self._mark_started(task, agent_type)
+            self._assigned[task["id"]] = (worker, task)
+            worker.task_ids.add(task["id"])
+            batch.append({"task": task, "agent_type": agent_type,
+                          "prompt": self.build_prompt(task)})
+        return batch
+
+    def _handle_result(self, task_manager, worker: WorkerConnection,
+                       result: Dict, results: Dict,
+                       monitor: SafeguardMonitor) -> None:
+        task_id = result.get("task_id")
+        assigned = self._assigned.get(task_id)
+        if assigned is None or assigned[0] is not worker:
+            self._log(f"⚠️  Ergebnis für Task #{task_id} von "
+                      f"{worker.worker_id} ignoriert (nicht zugewiesen)")
+            return
+        del self._assigned[task_id]
+        worker.task_ids.discard(task_id)
+        task = assigned[1]
+        self._report_result(task_manager, task, result, results)
+        self._check_safeguards(monitor, result, results)
+
+    def _expire_workers(self, task_manager, timeout_sec: float) -> None:
+        """Worker ohne Heartbeat seit timeout_sec gelten als verloren"""
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            if now - worker.last_seen > timeout_sec:
+                self._drop_worker(task_manager, worker,
+                                  f"kein Heartbeat seit {timeout_sec:.0f}s")
+
+    def _drop_worker(self, task_manager, worker: WorkerConnection,
+                     reason: str) -> None:
+        """Entfernt Worker und gibt seine Tasks zurück an die Warteschlange"""
+        if self._workers.pop(id(worker), None) is None:
+            return
+        worker.close()
+        for task_id in sorted(worker.task_ids):
+            _, task = self._assigned.pop(task_id)
+            agent_type = self.select_agent(task["type"])
+            self.active_agents.pop(task_id, None)
+            self._started.pop(task_id, None)
+            self._in_flight_by_type[agent_type] = max(
+                0, self._in_flight_by_type.get(agent_type, 0) - 1)
+            self._cache_keys.pop(task_id, None)
+            self._monitor.ledger.release(task_id)
+            task_manager.requeue_task(task_id, f"worker_lost:{worker.worker_id}")
+            self._finish_trace(task_id, "worker_lost")
+        self._log(f"💔 Worker {worker.worker_id} verloren ({reason}) - "
+                  f"{len(worker.task_ids)} Tasks wieder pending")
+        worker.task_ids.clear()
+
+    def _start_server(self, address: str) -> None:
+        self._server = open_listener(address)
+        self.address = format_address(self._server.family,
+                                      self._server.getsockname())
+        self._listening.set()
+        threading.Thread(target=self._accept_loop, name="coordinator-accept",
+                         daemon=True).start()
+
+    def _stop_server(self) -> None:
+        for worker in list(self._workers.values()):
+            worker.send({"type": "shutdown"})
+            worker.close()
+        self._workers.clear()
+        if self._server is not None:
+            try:
+                self._server.close()
+            except OSError:
+                pass
+            self._server = None
+        self._listening.clear()
+
+    def wait_listening(self, timeout: float = None) -> Optional[str]:
+        """Wartet bis der Coordinator lauscht, gibt die Adresse zurück"""
+        self._listening.wait(timeout)
+        return self.address
+
+    def _accept_loop(self) -> None:
+        server = self._server
+        while True:
+            try:
+                sock, peer = server.accept()
+            except OSError:
+                return  # Server geschlossen
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            worker = WorkerConnection(sock, str(peer or "unix"))
+            threading.Thread(target=self._read_loop, args=(worker,),
+                             name="coordinator-worker", daemon=True).start()
+
+    def _read_loop(self, worker: WorkerConnection) -> None:
+        """Liest Nachrichten eines Workers und reicht sie an den Loop weiter"""
+        reason = "Verbindung geschlossen"
+        try:
+            while True:
+                message = recv_message(worker.sock, self._max_message_bytes)
+                if message is None:
+                    break
+                worker.last_seen = time.monotonic()
+                if message["type"] != "heartbeat":
+                    self._events.put((message["type"], worker, message))
+        except (OSError, ProtocolError) as e:
+            reason = str(e)
+        self._events.put(("lost", worker, {"reason": reason}))
+
+    def get_workers(self) -> List[Dict]:
+        """Verbundene Worker (für TUI / Status)"""
+        return [{"worker_id": worker.worker_id, "capacity": worker.capacity,
+                 "tasks": sorted(worker.task_ids)}
+                for worker in list(self._workers.values())]
+
+    def kill_agent(self, task_id: int) -> bool:
+        """Beendet Agent: der zuständige Worker bekommt 'cancel'"""
+        assigned = self._assigned.get(task_id)
+        if assigned is not None:
+            assigned[0].send({"type": "cancel", "task_id": task_id})
+        return super().kill_agent(task_id)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Event Writer
+Gepufferter Hintergrund-Writer für session.jsonl
+
+Events landen in einer begrenzten Queue (logging.event_queue_size, volle
+Queue bremst den Aufrufer statt Events zu verlieren). Ein Writer-Thread
+schreibt sie gebündelt in die offen gehaltene Datei. fsync laut
+logging.fsync:
+
+- always:   nach jedem geschriebenen Block (kein Event älter als ein Block)
+- interval: höchstens alle fsync_interval_sec Sekunden (Default)
+- never:    dem Betriebssystem überlassen
+
+Rotation ab journal_max_mb oder journal_max_age_hours: die Datei wird zu
+session.<n>.jsonl und im Hintergrund zu session.<n>.jsonl.gz komprimiert
+(logging.compress_archives). Beim JSON-Store rotiert dessen Kompaktierung
+(Snapshot zuerst), sonst der Writer selbst.
+
+flush() wartet bis alle Events geschrieben sind (vor jedem Snapshot);
+close() läuft zusätzlich per atexit für alle noch offenen Writer, also
+auch nach Exceptions und SIGTERM (siehe jarvis-loop.py). Die Liste der
+offenen Writer hält sie nur schwach, geschlossene fallen heraus.
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
+
+FSYNC_POLICIES = ("always", "interval", "never")
+ARCHIVE_PATTERN = re.compile(r"\.(\d+)\.jsonl(\.gz)?$")
+
+_STOP = object()
+
+# Offene Writer für atexit (schwach: keine Referenz bis Prozessende)
+_open_writers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class EventWriter:
+    """Hängt Zeilen asynchron an eine Datei an (Reihenfolge bleibt)"""
+
+    def __init__(self, path: Path, config: Dict = None,
+                 auto_rotate: bool = True):
+        config = config or {}
+        self.path = Path(path)
+        self.fsync = config.get("fsync", "interval")
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Policy: {self.fsync}")
+        self.fsync_interval_sec = config.get("fsync_interval_sec", 1.0)
+        self.max_bytes = int(config.get("journal_max_mb", 64) * 1024 * 1024)
+        self.max_age_sec = config.get("journal_max_age_hours", 24) * 3600
+        self.compress = config.get("compress_archives", True)
+        self.auto_rotate = auto_rotate
+
+        self._queue: "queue.Queue" = queue.Queue(
+            maxsize=config.get("event_queue_size", 10000))
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._error: Optional[BaseException] = None
+        self._file = None
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._compressors: List[threading.Thread] = []
+        self._closed = False
+        _open_writers.add(self)
+
+    # --- Aufrufer-Seite ---
+
+    def write(self, data: bytes) -> None:
+        """Reiht data ein (blockiert nur, wenn die Queue voll ist)"""
+        self._raise_error()
+        with self._cond:
+            if self._closed:
+                # nach close() (z.B. atexit): synchron schreiben
+                self._write_direct(data)
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="event-writer",
+                                                daemon=True)
+                self._thread.start()
+            self._enqueued += 1
+        self._queue.put(data)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wartet bis alles Eingereihte geschrieben ist (False = Timeout)"""
+        with self._cond:
+            done = self._cond.wait_for(
+                lambda: self._written >= self._enqueued or self._error,
+                timeout)
+        self._raise_error()
+        if done and self.fsync != "never":
+            with self._io_lock:
+                self._sync(force=True)
+        return bool(done)
+
+    def rotate(self, archive: Path) -> Optional[Path]:
+        """
+        Schließt die aktuelle Datei ab: -> archive (+ .gz im Hintergrund).
+        Gibt das Archiv zurück (None wenn es nichts zu rotieren gab).
+        """
+        self.flush()
+        with self._io_lock:
+            return self._rotate_locked(Path(archive))
+
+    @property
+    def age_sec(self) -> float:
+        """Alter des aktuellen Segments (seit dem Öffnen in diesem Prozess)"""
+        return time.monotonic() - self._opened_at if self._opened_at else 0.0
+
+    def close(self) -> None:
+        """Schreibt alles weg, beendet Writer- und Kompressions-Threads"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        _open_writers.discard(self)
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        with self._io_lock:
+            self._sync(force=True)
+            self._close_file()
+        for compressor in list(self._compressors):
+            compressor.join()
+
+    # --- Writer-Thread ---
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 1024:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            lines = [item for item in batch if item is not _STOP]
+            try:
+                with self._io_lock:
+                    if lines:
+                        self._write_locked(b"".join(lines))
+                    self._sync()
+                    if self.auto_rotate and self._rotation_due():
+                        self._rotate_locked(next_archive(self.path))
+            except BaseException as e:
+                self._error = e
+            with self._cond:
+                self._written += len(lines)
+                self._cond.notify_all()
+            if stop:
+                return
+
+    def _write_direct(self, data: bytes) -> None:
+        with self._io_lock:
+            self._write_locked(data)
+            self._sync(force=True)
+
+    def _write_locked(self, data: bytes) -> None:
+        if self._file is not None and self._replaced():
+            self._close_file()  # von anderem Prozess rotiert
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._opened_at = time.monotonic()
+        self._file.write(data)
+        self._file.flush()
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != os.fstat(
+                self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _sync(self, force: bool = False) -> None:
+        if self._file is None or self.fsync == "never":
+            return
+        now = time.monotonic()
+        if (force or self.fsync == "always"
+                or now - self._last_fsync >= self.fsync_interval_sec):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _rotation_due(self) -> bool:
+        if self._file is None:
+            return False
+        return (self._file.tell() >= self.max_bytes
+                or (self.max_age_sec > 0 and self.age_sec >= self.max_age_sec))
+
+    def _rotate_locked(self, archive: Path) -> Optional[Path]:
+        self._sync(force=True)
+        self._close_file()
+        if not self.path.exists():
+            return None
+        os.replace(self.path, archive)
+        if self.compress:
+            compressor = threading.Thread(target=self._compress,
+                                          args=(archive,),
+                                          name="event-compress", daemon=True)
+            self._compressors.append(compressor)
+            compressor.start()
+        return archive
+
+    def _compress(self, archive: Path) -> None:
+        """archive -> archive.gz (atomar), danach Original löschen"""
+        target = archive.with_name(archive.name + ".gz")
+        tmp = archive.with_name(archive.name + ".gz.tmp")
+        try:
+            with open(archive, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp, target)
+            os.unlink(archive)
+        except OSError:
+            pass  # unkomprimiertes Archiv bleibt gültig
+        finally:
+            self._compressors.remove(threading.current_thread())
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._opened_at = 0.0
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise IOError(f"Session-Log nicht schreibbar: {error}") from error
+
+
+def archive_path(path: Path, segment: int) -> Path:
+    """session.jsonl -> session.<segment>.jsonl"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{segment}{path.suffix}")
+
+
+def find_archive(path: Path, segment: int) -> Optional[Path]:
+    """Archiv eines Segments (unkomprimiert bevorzugt, sonst .gz)"""
+    plain = archive_path(path, segment)
+    if plain.exists():
+        return plain
+    packed = plain.with_name(plain.name + ".gz")
+    return packed if packed.exists() else None
+
+
+def list_archives(path: Path) -> List[Path]:
+    """Alle Archive von path, nach Segmentnummer sortiert"""
+    path = Path(path)
+    segments = {}
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}*"):
+        match = ARCHIVE_PATTERN.search(candidate.name)
+        if match and candidate.name.startswith(path.stem + "."):
+            segments.setdefault(int(match.group(1)), candidate)
+    return [find_archive(path, segment) or segments[segment]
+            for segment in sorted(segments)]
+
+
+def next_archive(path: Path) -> Path:
+    """Nächste freie Segmentnummer für eine Rotation ohne Store"""
+    archives = list_archives(path)
+    last = (int(ARCHIVE_PATTERN.search(archives[-1].name).group(1))
+            if archives else -1)
+    return archive_path(path, last + 1)
+
+
+def open_segment(path: Path):
+    """Öffnet ein Journal-Segment binär (gzip transparent)"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _close_open_writers() -> None:
+    """atexit: schließt alle noch offenen Writer"""
+    for writer in list(_open_writers):
+        writer.close()
+
+
+atexit.register(_close_open_writers)
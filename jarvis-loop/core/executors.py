@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Agent Executors
+Austauschbare Ausführung von Agent-Tasks
+
+- simulated:  Demo-Modus (nur warten, wie bisher)
+- subprocess: startet das Agent-Kommando als Kindprozess, Prompt via stdin,
+              stdout/stderr werden zeilenweise gestreamt
+
+Auswahl über executor.backend in default_config.json.
+Kosten meldet der Agent über eine Ausgabezeile "JARVIS_COST=<usd>".
+"""
+
+import os
+import re
+import sys
+import time
+import signal
+import asyncio
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+COST_PATTERN = re.compile(r"JARVIS_COST=([0-9]+(?:\.[0-9]+)?)")
+STREAM_LINE_LIMIT = 1024 * 1024  # max. Zeilenlänge für asyncio-Streams
+
+# on_output(stream, line) mit stream "stdout" | "stderr"
+OutputCallback = Callable[[str, str], None]
+
+
+class AgentExecutor:
+    """Basis-Interface: führt einen Task aus und liefert ein Result-Dict"""
+
+    name = "base"
+
+    def run(self, task: Dict, agent_type: str, prompt: str,
+            on_output: OutputCallback = None,
+            cancel: threading.Event = None) -> Dict:
+        """
+        Führt Task aus. Rückgabe:
+        {task_id, success, agent_type, output, error, cost_usd, exit_code}
+        cancel: wird das Event gesetzt, bricht die Ausführung ab
+        """
+        raise NotImplementedError
+
+    async def run_async(self, task: Dict, agent_type: str, prompt: str,
+                        on_output: OutputCallback = None) -> Dict:
+        """
+        Asyncio-Variante (für AsyncAgentOrchestrator).
+        Abbruch über Task-Cancellation. Default: run() im Thread-Pool.
+        """
+        cancel = threading.Event()
+        try:
+            return await asyncio.to_thread(self.run, task, agent_type, prompt,
+                                           on_output, cancel)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+
+    @staticmethod
+    def _result(task: Dict, agent_type: str, success: bool, output: str = None,
+                error: str = None, cost: float = 0.00,
+                exit_code: int = None) -> Dict:
+        return {
+            "task_id": task["id"],
+            "success": success,
+            "agent_type": agent_type,
+            "output": output,
+            "error": error,
+            "cost_usd": cost,
+            "exit_code": exit_code
+        }
+
+
+class SimulatedExecutor(AgentExecutor):
+    """
+    Simuliert Arbeit (Demo ohne echte Agents). Batches laufen wie bei
+    einem echten Agent in einer Session: ein Abschnitt pro Task
+    (=== JARVIS TASK #<id> === ... JARVIS_TASK_STATUS=ok), Kosten einmal.
+    """
+
+    name = "simulated"
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.duration_sec = config.get("simulated_duration_sec", 2)
+        self.cost_usd = config.get("simulated_cost_usd", 0.10)
+
+    def run(self, task: Dict, agent_type: str, prompt: str,
+            on_output: OutputCallback = None,
+            cancel: threading.Event = None) -> Dict:
+        cancel = cancel or threading.Event()
+        if cancel.wait(self.duration_sec):
+            return self._result(task, agent_type, False, error="cancelled")
+        return self._result(task, agent_type, True,
+                            output=self._output(task, agent_type),
+                            cost=self.cost_usd, exit_code=0)
+
+    async def run_async(self, task: Dict, agent_type: str, prompt: str,
+                        on_output: OutputCallback = None) -> Dict:
+        await asyncio.sleep(self.duration_sec)
+        return self._result(task, agent_type, True,
+                            output=self._output(task, agent_type),
+                            cost=self.cost_usd, exit_code=0)
+
+    @staticmethod
+    def _output(task: Dict, agent_type: str) -> str:
+        if "batch" not in task:
+            return f"Task {task['id']} completed by {agent_type}"
+        return "".join(f"=== JARVIS TASK #{member['id']} ===\n"
+                       f"Task {member['id']} completed by {agent_type}\n"
+                       f"JARVIS_TASK_STATUS=ok\n"
+                       for member in task["batch"])
+
+
+class SubprocessExecutor(AgentExecutor):
+    """
+    Startet das Agent-Kommando als Kindprozess.
+    - Prompt über stdin, stdout/stderr nicht-blockierend über Reader-Threads
+    - harter Kill (Prozessgruppe) nach max_time_per_task_min
+    - max_processes begrenzt gleichzeitige Kindprozesse
+    Platzhalter im Kommando: {task_id} {agent} {project} {jarvis_dir}
+    Arbeitsverzeichnis: task["workdir"] (Hedge-Duplikat), sonst das Projekt
+    """
+
+    name = "subprocess"
+
+    def __init__(self, config: Dict, timeout_sec: float = 1800,
+                 project_path: str = "."):
+        self.command: List[str] = list(config.get("command") or [])
+        if not self.command:
+            raise ValueError("executor.command ist leer")
+        self.timeout_sec = timeout_sec
+        self.kill_grace_sec = config.get("kill_grace_sec", 5)
+        self.output_max_chars = config.get("output_max_chars", 200000)
+        self.project_path = str(project_path)
+        self.max_processes = config.get("max_processes", 3)
+        self._slots = threading.BoundedSemaphore(self.max_processes)
+        self._async_slots = {}  # Event-Loop -> asyncio.Semaphore
+
+    def run(self, task: Dict, agent_type: str, prompt: str,
+            on_output: OutputCallback = None,
+            cancel: threading.Event = None) -> Dict:
+        cancel = cancel or threading.Event()
+        with self._slots:
+            if cancel.is_set():
+                return self._result(task, agent_type, False, error="cancelled")
+            return self._run_process(task, agent_type, prompt, on_output, cancel)
+
+    def _run_process(self, task: Dict, agent_type: str, prompt: str,
+                     on_output: Optional[OutputCallback],
+                     cancel: threading.Event) -> Dict:
+        try:
+            proc = subprocess.Popen(
+                self._build_command(task, agent_type),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self._env(task, agent_type),
+                cwd=self._workdir(task),
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                start_new_session=(sys.platform != "win32")
+            )
+        except OSError as e:
+            return self._result(task, agent_type, False,
+                                error=f"Start fehlgeschlagen: {e}")
+
+        stdout = _StreamCollector(self.output_max_chars)
+        stderr = _StreamCollector(self.output_max_chars // 10 or 1)
+        readers = [
+            threading.Thread(target=self._pump,
+                             args=(proc.stdout, "stdout", stdout, on_output),
+                             daemon=True),
+            threading.Thread(target=self._pump,
+                             args=(proc.stderr, "stderr", stderr, on_output),
+                             daemon=True),
+            threading.Thread(target=self._feed_stdin,
+                             args=(proc, prompt), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        deadline = time.monotonic() + self.timeout_sec
+        reason = None
+        while proc.poll() is None:
+            if cancel.is_set():
+                reason = "cancelled"
+            elif time.monotonic() > deadline:
+                reason = f"Timeout nach {self.timeout_sec:.0f}s"
+            if reason:
+                self._kill(proc)
+                break
+            cancel.wait(0.1)
+
+        exit_code = proc.wait()
+        for reader in readers:
+            reader.join(timeout=self.kill_grace_sec)
+
+        output = stdout.text()
+        cost = stdout.cost if stdout.cost is not None else (stderr.cost or 0.00)
+        if reason:
+            return self._result(task, agent_type, False, output=output,
+                                error=reason, cost=cost, exit_code=exit_code)
+        if exit_code != 0:
+            error = stderr.text().strip() or f"Exit-Code {exit_code}"
+            return self._result(task, agent_type, False, output=output,
+                                error=error, cost=cost, exit_code=exit_code)
+        return self._result(task, agent_type, True, output=output,
+                            cost=cost, exit_code=exit_code)
+
+    async def run_async(self, task: Dict, agent_type: str, prompt: str,
+                        on_output: OutputCallback = None) -> Dict:
+        """
+        Kindprozess über asyncio (kein Thread pro Agent).
+        Timeout setzt der Aufrufer (asyncio.wait_for); bei Cancellation wird
+        die Prozessgruppe beendet.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_slots:
+            self._async_slots = {loop: asyncio.Semaphore(self.max_processes)}
+        async with self._async_slots[loop]:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *self._build_command(task, agent_type),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=self._env(task, agent_type),
+                    cwd=self._workdir(task),
+                    limit=STREAM_LINE_LIMIT,
+                    start_new_session=(sys.platform != "win32")
+                )
+            except OSError as e:
+                return self._result(task, agent_type, False,
+                                    error=f"Start fehlgeschlagen: {e}")
+
+            stdout = _StreamCollector(self.output_max_chars)
+            stderr = _StreamCollector(self.output_max_chars // 10 or 1)
+            try:
+                await asyncio.gather(
+                    self._feed_stdin_async(proc, prompt),
+                    self._pump_async(proc.stdout, "stdout", stdout, on_output),
+                    self._pump_async(proc.stderr, "stderr", stderr, on_output)
+                )
+                exit_code = await proc.wait()
+            except asyncio.CancelledError:
+                await asyncio.shield(self._kill_async(proc))
+                raise
+
+        output = stdout.text()
+        cost = stdout.cost if stdout.cost is not None else (stderr.cost or 0.00)
+        if exit_code != 0:
+            error = stderr.text().strip() or f"Exit-Code {exit_code}"
+            return self._result(task, agent_type, False, output=output,
+                                error=error, cost=cost, exit_code=exit_code)
+        return self._result(task, agent_type, True, output=output,
+                            cost=cost, exit_code=exit_code)
+
+    @staticmethod
+    async def _feed_stdin_async(proc, prompt: str) -> None:
+        try:
+            proc.stdin.write(prompt.encode("utf-8"))
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Agent liest stdin nicht oder ist schon beendet
+
+    @staticmethod
+    async def _pump_async(stream, name: str, collector: "_StreamCollector",
+                          on_output: Optional[OutputCallback]) -> None:
+        async for raw in stream:
+            line = raw.decode("utf-8", errors="replace")
+            collector.add(line)
+            if on_output:
+                on_output(name, line.rstrip("\n"))
+
+    async def _kill_async(self, proc) -> None:
+        """SIGTERM an die Prozessgruppe, nach kill_grace_sec SIGKILL"""
+        if proc.returncode is not None:
+            return
+        if sys.platform == "win32":
+            proc.kill()
+            await proc.wait()
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            await asyncio.wait_for(proc.wait(), self.kill_grace_sec)
+        except asyncio.TimeoutError:
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+        except ProcessLookupError:
+            pass
+
+    def _workdir(self, task: Dict) -> str:
+        return task.get("workdir") or self.project_path
+
+    def _env(self, task: Dict, agent_type: str) -> Dict:
+        env = dict(os.environ,
+                   JARVIS_TASK_ID=str(task["id"]),
+                   JARVIS_AGENT=agent_type,
+                   JARVIS_PROJECT=self._workdir(task))
+        if "batch" in task:
+            env["JARVIS_BATCH_IDS"] = ",".join(
+                str(member["id"]) for member in task["batch"])
+        return env
+
+    def _build_command(self, task: Dict, agent_type: str) -> List[str]:
+        values = {
+            "task_id": task["id"],
+            "agent": agent_type,
+            "project": self._workdir(task),
+            "jarvis_dir": str(Path(__file__).parent.parent)
+        }
+        return [part.format(**values) for part in self.command]
+
+    @staticmethod
+    def _feed_stdin(proc: subprocess.Popen, prompt: str) -> None:
+        try:
+            proc.stdin.write(prompt)
+            proc.stdin.close()
+        except (BrokenPipeError, OSError, ValueError):
+            pass  # Agent liest stdin nicht oder ist schon beendet
+
+    @staticmethod
+    def _pump(stream, name: str, collector: "_StreamCollector",
+              on_output: Optional[OutputCallback]) -> None:
+        for line in stream:
+            collector.add(line)
+            if on_output:
+                on_output(name, line.rstrip("\n"))
+        stream.close()
+
+    def _kill(self, proc: subprocess.Popen) -> None:
+        """SIGTERM an die Prozessgruppe, nach kill_grace_sec SIGKILL"""
+        if sys.platform == "win32":
+            proc.kill()
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=self.kill_grace_sec)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class _StreamCollector:
+    """Sammelt die letzten max_chars Zeichen eines Streams + Kostenmeldung"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.size = 0
+        self.cost: Optional[float] = None
+        self._lines = deque()
+
+    def add(self, line: str) -> None:
+        match = COST_PATTERN.search(line)
+        if match:
+            self.cost = float(match.group(1))
+        self._lines.append(line)
+        self.size += len(line)
+        while self.size > self.max_chars and len(self._lines) > 1:
+            self.size -= len(self._lines.popleft())
+
+    def text(self) -> str:
+        return "".join(self._lines)
+
+
+def create_executor(config: Dict, project_path: str = ".") -> AgentExecutor:
+    """Erstellt Executor laut executor.backend"""
+    executor = config.get("executor", {})
+    backend = executor.get("backend", "simulated")
+    if backend == "simulated":
+        return SimulatedExecutor(executor)
+    if backend == "subprocess":
+        timeout_sec = config["safeguards"].get("max_time_per_task_min", 30) * 60
+        return SubprocessExecutor(executor, timeout_sec, project_path)
+    raise ValueError(f"Unbekanntes Executor-Backend: {backend}")
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Hedged Execution
+Spekulative Zweitausführung für Nachzügler-Tasks
+
+Läuft ein Task länger als das p95 (hedging.percentile) der Laufzeiten
+seines Agent-Typs, startet der Orchestrator ein Duplikat. Das erste
+erfolgreiche Ergebnis gewinnt, das andere wird abgebrochen; seine Kosten
+werden als Hedge-Kosten verbucht und gemeldet.
+
+Laufzeiten kommen aus den task_completed-Events in session.jsonl
+(duration_sec, agent) - beim Start wird das Ende des Logs eingelesen.
+Obergrenze: Hedges dürfen zusammen höchstens max_budget_fraction des
+Kostenlimits verbrauchen (inkl. Reservierungen).
+
+Jedes Duplikat arbeitet in einer eigenen Kopie des Projekts
+(HedgeWorkspace, ohne JARVIS-Zustand laut hedging.workspace_exclude).
+Nur wenn das Duplikat gewinnt, werden die Dateien, die es geändert hat,
+ins Projekt übernommen; sonst wird die Kopie verworfen.
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from decimal import Decimal
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+# JARVIS-Zustand im Projektverzeichnis: wird nicht in die Kopie übernommen
+DEFAULT_WORKSPACE_EXCLUDE = [
+    "tasks.json", "tasks.db*", "session*.jsonl*", "jarvis-loop.json",
+    "output", "profile", ".jarvis-cache", "__pycache__"
+]
+
+from budget import BudgetLedger, to_decimal
+
+
+class LatencyTracker:
+    """Gleitendes Fenster der Laufzeiten pro Agent-Typ"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, agent_type: str, duration_sec: float) -> None:
+        samples = self._samples.setdefault(agent_type,
+                                           deque(maxlen=self.window))
+        samples.append(duration_sec)
+
+    def percentile(self, agent_type: str, percentile: float,
+                   min_samples: int) -> Optional[float]:
+        samples = self._samples.get(agent_type)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def seed_from_session(self, session_file: Path,
+                          max_bytes: int = 4 * 1024 * 1024) -> int:
+        """Liest Laufzeiten aus dem Ende von session.jsonl"""
+        try:
+            with open(session_file, "rb") as f:
+                f.seek(0, 2)
+                size = f.tell()
+                f.seek(max(0, size - max_bytes))
+                if size > max_bytes:
+                    f.readline()  # angeschnittene Zeile
+                lines = f.readlines()
+        except OSError:
+            return 0
+        seeded = 0
+        for line in lines:
+            if b'"task_completed"' not in line or b'"duration_sec"' not in line:
+                continue
+            try:
+                data = json.loads(line)["data"]
+            except (ValueError, KeyError):
+                continue
+            if data.get("agent") and data.get("duration_sec") is not None:
+                self.observe(data["agent"], float(data["duration_sec"]))
+                seeded += 1
+        return seeded
+
+
+class HedgeWorkspace:
+    """
+    Arbeitsverzeichnis eines Duplikats: Kopie des Projekts (ohne exclude)
+    in einem temporären Verzeichnis. promote() übernimmt nur Dateien, die
+    das Duplikat angelegt, geändert oder gelöscht hat - was andere Tasks
+    inzwischen im Projekt geschrieben haben, bleibt unberührt.
+    """
+
+    def __init__(self, project_path: str, task_id: int, exclude: List[str]):
+        self.project_path = Path(project_path)
+        self.path = Path(tempfile.mkdtemp(prefix=f"jarvis-hedge-{task_id}-"))
+        self.exclude = exclude
+        self._manifest: Dict[str, tuple] = {}  # relativer Pfad -> Stat
+
+    def populate(self) -> None:
+        """Kopiert das Projekt und merkt sich den Stand jeder Datei"""
+        shutil.copytree(self.project_path, self.path, symlinks=True,
+                        ignore=shutil.ignore_patterns(*self.exclude),
+                        dirs_exist_ok=True)
+        self._manifest = self._scan()
+
+    def promote(self) -> List[str]:
+        """Änderungen des Duplikats ins Projekt übernehmen (relative Pfade)"""
+        current = self._scan()
+        changed = [name for name, stat in current.items()
+                   if self._manifest.get(name) != stat]
+        for name in changed:
+            target = self.project_path / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self.path / name, target, follow_symlinks=False)
+        removed = [name for name in self._manifest if name not in current]
+        for name in removed:
+            try:
+                (self.project_path / name).unlink()
+            except FileNotFoundError:
+                pass
+        return sorted(changed + removed)
+
+    def discard(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _scan(self) -> Dict[str, tuple]:
+        files = {}
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                path = Path(root) / name
+                stat = path.lstat()
+                files[path.relative_to(self.path).as_posix()] = (
+                    stat.st_size, stat.st_mtime_ns)
+        return files
+
+
+class Hedger:
+    """Entscheidet über Hedges und führt Buch über ihre Kosten"""
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.percentile = config.get("percentile", 95)
+        self.min_samples = config.get("min_samples", 20)
+        self.max_budget_fraction = config.get("max_budget_fraction", 0.10)
+        self.latency = LatencyTracker(config.get("window", 200))
+        self.workspace_exclude = config.get("workspace_exclude",
+                                            DEFAULT_WORKSPACE_EXCLUDE)
+        self._workspaces: Dict[int, HedgeWorkspace] = {}
+        self._lock = threading.Lock()
+        self.spent = Decimal("0")
+        self.launched = 0
+        self.won = 0
+
+    def threshold(self, agent_type: str) -> Optional[float]:
+        """Laufzeit ab der gehedged wird (None = zu wenig Daten)"""
+        return self.latency.percentile(agent_type, self.percentile,
+                                       self.min_samples)
+
+    def reserve(self, ledger: BudgetLedger, task: Dict) -> bool:
+        """
+        Reserviert Budget für ein Duplikat - nur wenn der Hedge-Anteil
+        (verbraucht + reserviert) unter max_budget_fraction bleibt
+        """
+        estimate = to_decimal(task.get("estimated_cost", 0.50))
+        cap = ledger.limit * to_decimal(self.max_budget_fraction)
+        reserved = sum((amount for key, amount in ledger.reservations().items()
+                        if isinstance(key, tuple) and key[0] == "hedge"),
+                       Decimal("0"))
+        if self.spent + reserved + estimate > cap:
+            return False
+        if not ledger.reserve(self.key(task["id"]), estimate):
+            return False
+        self.launched += 1
+        return True
+
+    def cancel(self, ledger: BudgetLedger, task: Dict) -> None:
+        """Gibt die Reservierung eines doch nicht gestarteten Duplikats frei"""
+        ledger.release(self.key(task["id"]))
+        self.launched -= 1
+
+    def open_workspace(self, project_path: str, task: Dict) -> Dict:
+        """
+        Legt das Arbeitsverzeichnis des Duplikats an (im Worker, nicht im
+        Dispatch-Loop) und gibt den Task mit workdir für den Executor zurück
+        """
+        workspace = HedgeWorkspace(project_path, task["id"],
+                                   self.workspace_exclude)
+        with self._lock:
+            self._workspaces[task["id"]] = workspace
+        workspace.populate()
+        with self._lock:
+            if self._workspaces.get(task["id"]) is not workspace:
+                workspace.discard()  # während des Kopierens verworfen
+        return dict(task, workdir=str(workspace.path))
+
+    def close_workspace(self, task_id: int, promote: bool) -> List[str]:
+        """Gewinner: Änderungen übernehmen; danach Kopie löschen"""
+        with self._lock:
+            workspace = self._workspaces.pop(task_id, None)
+        if workspace is None:
+            return []
+        try:
+            return workspace.promote() if promote else []
+        finally:
+            workspace.discard()
+
+    def close_all(self) -> None:
+        """Übrig gebliebene Kopien löschen (Ende des Laufs)"""
+        for task_id in list(self._workspaces):
+            self.close_workspace(task_id, promote=False)
+
+    def record_extra_cost(self, cost_usd: float) -> None:
+        self.spent += to_decimal(cost_usd)
+
+    @staticmethod
+    def key(task_id: int):
+        """Ledger-Schlüssel der Hedge-Reservierung"""
+        return ("hedge", task_id)
+
+    def stats(self) -> Dict:
+        return {
+            "launched": self.launched,
+            "won": self.won,
+            "extra_cost_usd": float(self.spent)
+        }
+
+
+def create_hedger(config: Dict) -> Hedger:
+    """Hedger laut hedging-Sektion der Config"""
+    return Hedger(config.get("hedging", {}))
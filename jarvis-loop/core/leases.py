@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Task Leases
+Wiederherstellung hängengebliebener in_progress Tasks
+
+assign_task vergibt eine Lease (lease_owner = host:pid, lease_expires_at).
+Solange ein Agent läuft, verlängert der LeaseKeeper sie per Heartbeat.
+Stirbt der Prozess, läuft die Lease ab - der Reaper setzt den Task zurück
+auf 'pending' (bzw. 'failed' wenn leases.max_attempts erreicht ist).
+Leases von toten Prozessen auf demselben Host gelten sofort als abgelaufen,
+damit `resume` direkt weitermachen kann.
+"""
+
+import os
+import socket
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """
+    Lebt der Prozess, der die Lease hält? Für fremde Hosts unbekannt
+    (True - dort entscheidet nur der Ablaufzeitpunkt).
+    """
+    if not owner or ":" not in owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def lease_expired(task: Dict, now: float) -> bool:
+    """Ist die Lease eines in_progress Tasks verfallen?"""
+    owner = task.get("lease_owner")
+    if owner != LEASE_OWNER and not owner_alive(owner):
+        return True
+    return (task.get("lease_expires_at") or 0) < now
+
+
+class LeaseKeeper:
+    """
+    Hintergrund-Thread pro Dispatch-Loop:
+    - Heartbeat: verlängert Leases der laufenden Tasks
+    - Reaper: gibt abgelaufene Leases (auch anderer Prozesse) frei
+    """
+
+    def __init__(self, task_manager, active_task_ids: Callable[[], Iterable[int]],
+                 config: Dict, log: Callable[[str], None] = print):
+        self.task_manager = task_manager
+        self.active_task_ids = active_task_ids
+        self.heartbeat_sec = config.get("heartbeat_sec", 30)
+        self.reap_interval_sec = config.get("reap_interval_sec", 15)
+        self.log = log
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        tick = min(self.heartbeat_sec, self.reap_interval_sec)
+        since_heartbeat = since_reap = 0.0
+        while not self._stop.wait(tick):
+            since_heartbeat += tick
+            since_reap += tick
+            try:
+                if since_heartbeat >= self.heartbeat_sec:
+                    since_heartbeat = 0.0
+                    self.task_manager.renew_leases(list(self.active_task_ids()))
+                if since_reap >= self.reap_interval_sec:
+                    since_reap = 0.0
+                    self.reap()
+            except Exception as e:
+                self.log(f"⚠️  Lease-Keeper: {e}")
+
+    def reap(self) -> Dict:
+        """Gibt abgelaufene Leases frei und loggt das Ergebnis"""
+        reaped = self.task_manager.reap_expired_leases()
+        for task_id in reaped["requeued"]:
+            self.log(f"♻️  Lease von Task #{task_id} abgelaufen - wieder pending")
+        for task_id in reaped["failed"]:
+            self.log(f"❌ Lease von Task #{task_id} abgelaufen - "
+                     f"max. Versuche erreicht")
+        return reaped
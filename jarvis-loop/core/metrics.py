@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Metrics
+Counter, Gauges und Histogramme im Prometheus-Textformat
+
+    python jarvis-loop.py start --metrics-port 9464
+    curl http://127.0.0.1:9464/metrics
+
+Im Hot Path ist ein Event nur ein list.append (unter dem GIL atomar, kein
+Lock); verrechnet wird beim Scrape bzw. alle FOLD_AT Events. Werte,
+die ohnehin irgendwo stehen (Ready-Queue, laufende Agents, Iteration,
+Kosten), werden erst beim Scrape über Callbacks gelesen. Ohne
+--metrics-port gibt es keine Registry und keinen Aufruf.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+FOLD_AT = 1024  # ausstehende Events je Kind, danach wird verrechnet
+
+
+class _Metric:
+    """Gemeinsame Basis: Name, Hilfetext, Labels, Kinder pro Label-Wert"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str,
+                 labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], object]] = None
+
+    def labels(self, *values) -> "_Metric":
+        """Kind für diese Label-Werte (einmal anlegen, dann wiederverwenden)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        """
+        Wert erst beim Scrape berechnen: function() liefert eine Zahl bzw.
+        mit Labels ein Dict {Label-Wert(e): Zahl}
+        """
+        self._function = function
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        if self._function is not None:
+            return self._function_samples()
+        samples = []
+        for key, child in list(self._children.items()):
+            for suffix, extra, value in child._values():
+                labels = dict(zip(self.label_names, map(str, key)))
+                labels.update(extra)
+                samples.append((self.name + suffix, labels, value))
+        return samples
+
+    def _function_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        value = self._function()
+        if not self.label_names:
+            return [(self.name, {}, float(value))]
+        samples = []
+        for key, child_value in value.items():
+            key = key if isinstance(key, tuple) else (key,)
+            samples.append((self.name,
+                            dict(zip(self.label_names, map(str, key))),
+                            float(child_value)))
+        return samples
+
+    def _new_child(self):
+        raise NotImplementedError
+
+
+class _Pending:
+    """
+    Sammelt Events lock-frei (list.append) und verrechnet sie gebündelt.
+    del pending[:n] entfernt atomar genau die verrechneten Einträge -
+    parallele appends gehen nicht verloren.
+    """
+
+    __slots__ = ("_pending", "_lock")
+
+    def __init__(self):
+        self._pending: List[float] = []
+        self._lock = threading.Lock()
+
+    def _add(self, value: float) -> None:
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= FOLD_AT:
+            self._fold()
+
+    def _fold(self) -> None:
+        with self._lock:
+            pending = self._pending
+            count = len(pending)
+            if count:
+                self._apply(pending[:count])
+                del pending[:count]
+
+    def _apply(self, values: List[float]) -> None:
+        raise NotImplementedError
+
+
+class _Value(_Pending):
+    """Zahl eines Counters/Gauges (inc/dec im Hot Path lock-frei)"""
+
+    __slots__ = ("_value",)
+
+    def __init__(self):
+        super().__init__()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._add(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._add(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            del self._pending[:]
+            self._value = float(value)
+
+    @property
+    def value(self) -> float:
+        self._fold()
+        return self._value
+
+    def _apply(self, values: List[float]) -> None:
+        self._value += sum(values)
+
+    def _values(self):
+        return [("", {}, self.value)]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _HistogramValue(_Pending):
+    """Bucket-Zähler + Summe (einsortiert wird erst beim Verrechnen)"""
+
+    __slots__ = ("_bounds", "_counts", "_sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        super().__init__()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # letzter: +Inf
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._add(value)
+
+    def _apply(self, values: List[float]) -> None:
+        for value in values:
+            self._counts[bisect_left(self._bounds, value)] += 1
+        self._sum += sum(values)
+
+    def _values(self):
+        self._fold()
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        values, cumulative = [], 0
+        for bound, count in zip(self._bounds + (math.inf,), counts):
+            cumulative += count
+            values.append(("_bucket", {"le": _format_value(bound)},
+                           cumulative))
+        values.append(("_sum", {}, total))
+        values.append(("_count", {}, cumulative))
+        return values
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+
+class MetricsRegistry:
+    """Sammelt Metriken und rendert sie im Prometheus-Textformat"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str,
+                labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str,
+              labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik existiert bereits: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue  # Callback gerade nicht lesbar: Metrik auslassen
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class LoopMetrics:
+    """Die Metriken des Dispatch-Loops (Instrumentierung im Orchestrator)"""
+
+    def __init__(self, registry: MetricsRegistry = None,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.tasks_started = r.counter(
+            "jarvis_tasks_started_total", "Gestartete Agent-Ausführungen",
+            ["agent_type"])
+        self.tasks_completed = r.counter(
+            "jarvis_tasks_completed_total", "Erfolgreich beendete Tasks",
+            ["agent_type"])
+        self.tasks_failed = r.counter(
+            "jarvis_tasks_failed_total", "Endgültig fehlgeschlagene Tasks",
+            ["agent_type"])
+        self.retries = r.counter(
+            "jarvis_task_retries_total", "Geplante Retries",
+            ["agent_type", "failure_class"])
+        self.hedges = r.counter(
+            "jarvis_task_hedges_total", "Gestartete Duplikate (Hedging)",
+            ["agent_type"])
+        self.cache_hits = r.counter(
+            "jarvis_cache_hits_total", "Tasks aus dem Result-Cache",
+            ["agent_type"])
+        self.task_duration = r.histogram(
+            "jarvis_task_duration_seconds", "Laufzeit pro Task",
+            ["agent_type", "outcome"], buckets)
+        self.ready_tasks = r.gauge(
+            "jarvis_ready_tasks", "Bereite Tasks (Ready-Queue)")
+        self.in_flight = r.gauge(
+            "jarvis_agents_in_flight", "Laufende Agents pro Typ",
+            ["agent_type"])
+        self.iteration = r.gauge(
+            "jarvis_iteration", "Aktuelle Iteration")
+        self.spend = r.gauge(
+            "jarvis_spend_usd", "Verbrauchte Kosten in USD")
+        self.budget = r.gauge(
+            "jarvis_budget_usd", "safeguards.max_total_cost_usd")
+
+    def bind(self, orchestrator, task_manager) -> None:
+        """Scrape-Zeit-Werte aus Orchestrator und TaskManager lesen"""
+        self.ready_tasks.set_function(
+            lambda: len(task_manager.get_ready_tasks()))
+        self.in_flight.set_function(
+            lambda: dict(orchestrator._in_flight_by_type))
+        self.iteration.set_function(
+            lambda: task_manager.store.get_meta()["iteration"]["current"])
+        self.spend.set_function(
+            lambda: (orchestrator._monitor.total_cost
+                     if orchestrator._monitor is not None
+                     else task_manager.store.get_meta()["iteration"]
+                     .get("cost_usd", 0.00)))
+        self.budget.set_function(
+            lambda: task_manager.config["safeguards"].get(
+                "max_total_cost_usd", 0.00))
+
+
+class MetricsServer:
+    """GET /metrics auf einem lokalen Port (Daemon-Thread)"""
+
+    def __init__(self, registry: MetricsRegistry, port: int,
+                 host: str = "127.0.0.1"):
+        self.registry = registry
+        handler = _handler(registry)
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics-server", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _handler(registry: MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # kein Request-Log auf stderr (TUI)
+
+    return MetricsHandler
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape_label(str(value))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def start_metrics_server(port: int, config: Dict) -> Tuple[LoopMetrics,
+                                                           MetricsServer]:
+    """Registry mit Loop-Metriken + HTTP-Endpoint laut metrics-Sektion"""
+    settings = config.get("metrics", {})
+    metrics = LoopMetrics(buckets=settings.get("latency_buckets_sec",
+                                               DEFAULT_BUCKETS))
+    server = MetricsServer(metrics.registry, port,
+                           settings.get("host", "127.0.0.1")).start()
+    return metrics, server
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Profiling
+cProfile + tracemalloc für start / status (--profile)
+
+    python jarvis-loop.py start --profile
+    python jarvis-loop.py status --profile
+
+Jeder Thread, der attach() aufruft (TUI/CLI im Hauptthread, Dispatch-Loop),
+bekommt einen eigenen cProfile-Profiler. tracemalloc läuft für den ganzen
+Prozess. Snapshots (CPU-Stats + Allokationen) laut profiling.mode:
+
+- iteration: alle profiling.every_iterations Loop-Iterationen (tick())
+- interval:  alle profiling.interval_sec Sekunden (Hintergrund-Thread)
+
+Alles landet in <projekt>/profile/<zeit>/:
+
+    <thread>.prof     pstats-Format (python -m pstats, snakeviz)
+    mem-<n>.snapshot  tracemalloc.Snapshot.load()
+    summary.txt       Top-N Funktionen und Allokationsstellen
+
+Beim Beenden gibt close() dieselbe Zusammenfassung aus. Ohne --profile
+gibt es keinen Profiler: kein Hook, kein Aufruf.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROFILE_MODES = ("iteration", "interval")
+
+
+class _Frozen:
+    """Stand eines Profilers für pstats (ohne ihn anzuhalten)"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class LoopProfiler:
+    """CPU- und Speicher-Profil eines Laufs"""
+
+    def __init__(self, project_path: Path, config: Dict = None):
+        config = config or {}
+        self.mode = config.get("mode", "iteration")
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unbekannter Profiling-Modus: {self.mode}")
+        self.every_iterations = max(1, config.get("every_iterations", 100))
+        self.interval_sec = config.get("interval_sec", 30)
+        self.top_n = config.get("top_n", 15)
+        self.frames = config.get("tracemalloc_frames", 1)
+        self.keep_snapshots = config.get("keep_snapshots", 20)
+        self.directory = _run_directory(
+            Path(project_path) / config.get("dir", "profile"))
+
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._owners: Dict[int, cProfile.Profile] = {}  # thread ident -> aktiv
+        self._lock = threading.Lock()
+        self._iterations = 0
+        self._snapshots: List[Path] = []
+        self._first: Optional[tracemalloc.Snapshot] = None
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> "LoopProfiler":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        if self.mode == "interval":
+            self._sampler = threading.Thread(target=self._sample,
+                                             name="profiler", daemon=True)
+            self._sampler.start()
+        return self
+
+    # --- Hooks ---
+
+    def attach(self, name: str) -> None:
+        """Profiliert ab jetzt den aufrufenden Thread (unter name)"""
+        ident = threading.get_ident()
+        if self._closed or ident in self._owners:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # Python 3.12+: ein Profiler deckt bereits alle Threads ab
+        with self._lock:
+            self._owners[ident] = profile
+            self._profiles.setdefault(name, []).append(profile)
+
+    def detach(self) -> None:
+        """Beendet das Profil des aufrufenden Threads (Daten bleiben)"""
+        profile = self._owners.pop(threading.get_ident(), None)
+        if profile is not None:
+            profile.disable()
+
+    def tick(self) -> None:
+        """Eine Loop-Iteration (Modus iteration: ggf. Snapshot)"""
+        self._iterations += 1
+        if (self.mode == "iteration"
+                and self._iterations % self.every_iterations == 0):
+            self.snapshot()
+
+    # --- Snapshots ---
+
+    def snapshot(self) -> None:
+        """
+        CPU-Stats und Allokationen jetzt auf Platte schreiben (der Snapshot
+        selbst taucht im Profil des aufrufenden Threads nicht auf)
+        """
+        own = self._owners.get(threading.get_ident())
+        if own is not None:
+            own.disable()
+        try:
+            with self._lock:
+                self._write_snapshot()
+        finally:
+            if own is not None:
+                own.enable()
+
+    def _write_snapshot(self) -> None:
+        self._dump_stats()
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._first is None:
+                self._first = snapshot
+            self._last = snapshot
+            path = self.directory / f"mem-{len(self._snapshots) + 1:04d}.snapshot"
+            snapshot.dump(str(path))
+            self._snapshots.append(path)
+            while len(self._snapshots) > self.keep_snapshots:
+                self._snapshots.pop(0).unlink(missing_ok=True)
+
+    def close(self, log=print) -> Optional[Path]:
+        """Letzter Snapshot, summary.txt schreiben und ausgeben"""
+        if self._closed:
+            return None
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.detach()
+        self.snapshot()
+        self._closed = True
+        tracemalloc.stop()
+        summary = self.summary()
+        path = self.directory / "summary.txt"
+        path.write_text(summary, encoding="utf-8")
+        log(summary)
+        log(f"🔬 Profil: {self.directory}")
+        return path
+
+    def summary(self) -> str:
+        """Top-N Funktionen (eigene Zeit) pro Thread und Allokationsstellen"""
+        lines = [f"🔬 Profil ({self._iterations} Loop-Iterationen)"]
+        for name in sorted(self._profiles):
+            stats = self._stats(name)
+            if stats is None:
+                continue
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats("tottime").print_stats(self.top_n)
+            lines.append(f"\n=== CPU: {name} (Top {self.top_n} nach tottime) ===")
+            lines.extend(_trim_pstats(stream.getvalue()))
+        if self._last is not None:
+            lines.append(f"\n=== Speicher: Top {self.top_n} Allokationsstellen ===")
+            for stat in _own(self._last.statistics("lineno"))[:self.top_n]:
+                lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d}x  "
+                             f"{stat.traceback[0]}")
+            if self._first is not None and self._first is not self._last:
+                lines.append("\n=== Speicher: Zuwachs seit erstem Snapshot ===")
+                growth = [stat for stat in _own(self._last.compare_to(
+                    self._first, "lineno")) if stat.size_diff > 0]
+                if not growth:
+                    lines.append("(kein Zuwachs)")
+                for stat in growth[:self.top_n]:
+                    lines.append(f"{stat.size_diff / 1024:+10.1f} KiB "
+                                 f"{stat.count_diff:+8d}x  {stat.traceback[0]}")
+        return "\n".join(lines)
+
+    # --- Hilfen ---
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self.snapshot()
+
+    def _stats(self, name: str) -> Optional[pstats.Stats]:
+        """Stand aller Profiler eines Namens (laufende werden nicht gestoppt)"""
+        frozen = []
+        for profile in self._profiles.get(name, []):
+            profile.snapshot_stats()
+            if profile.stats:
+                frozen.append(_Frozen(profile.stats))
+        if not frozen:
+            return None
+        stats = pstats.Stats(frozen[0])
+        for other in frozen[1:]:
+            stats.add(other)
+        return stats
+
+    def _dump_stats(self) -> None:
+        for name in self._profiles:
+            stats = self._stats(name)
+            if stats is None:
+                continue
+            with open(self.directory / f"{name}.prof", "wb") as f:
+                marshal.dump(stats.stats, f)
+
+
+def _own(stats: List) -> List:
+    """Statistiken ohne Allokationen von tracemalloc/Profiler selbst"""
+    ignored = {tracemalloc.__file__, cProfile.__file__, pstats.__file__,
+               __file__, "<frozen importlib._bootstrap>", "<unknown>"}
+    return [stat for stat in stats
+            if stat.traceback[0].filename not in ignored]
+
+
+def _run_directory(base: Path) -> Path:
+    """<base>/<zeit> (bei mehreren Läufen pro Sekunde mit Suffix)"""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    directory, suffix = base / stamp, 1
+    while directory.exists():
+        suffix += 1
+        directory = base / f"{stamp}-{suffix}"
+    return directory
+
+
+def _trim_pstats(text: str) -> List[str]:
+    """print_stats-Ausgabe ohne Kopfzeilen bis zur Tabelle"""
+    lines = text.rstrip().splitlines()
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return lines[index:]
+    return lines
+
+
+def create_profiler(project_path: Path, config: Dict) -> LoopProfiler:
+    """Profiler laut profiling-Sektion der Config (gestartet)"""
+    return LoopProfiler(project_path, config.get("profiling", {})).start()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Result Cache
+Content-adressierter Cache für Agent-Ergebnisse
+
+Schlüssel = SHA-256 über Prompt, Task-Typ, Agent-Typ, die Output-Digests
+der Dependencies und die Projekt-Generation (project.created_at, neu nach
+jedem Anlegen des Projekts). Ändert sich nichts davon, wird ein Task (z.B.
+nach `resume`) aus dem Cache bedient statt erneut einen Agent zu bezahlen.
+
+Ein Treffer spielt nur den gespeicherten Output ein - Seiteneffekte des
+Agents (geänderte Dateien im Projekt) werden NICHT wiederholt. Deshalb ist
+der Cache opt-in (cache.enabled); nur für Tasks mit reinem Text-Ergebnis
+oder einen unveränderten Arbeitsbaum einschalten.
+
+Ablage: <projekt>/<cache.dir>/<ab>/<key>.json - eine Datei pro Eintrag,
+die mtime dient als LRU-Zeitstempel (Treffer "touchen" die Datei).
+Überschreitet der Cache cache.max_mb, fliegen die ältesten Einträge raus.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_VERSION = "1"
+
+
+def digest(text: Optional[str]) -> str:
+    """SHA-256 eines Outputs (None = leerer Output)"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Persistenter LRU-Cache mit Größenlimit"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> Bytes
+        self._bytes = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(prompt: str, task_type: str, agent_type: str,
+                 dependency_digests: List[str], generation: str = "") -> str:
+        hasher = hashlib.sha256()
+        for part in (CACHE_VERSION, generation, prompt, task_type, agent_type,
+                     *dependency_digests):
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Eintrag zum Schlüssel (zählt Hit/Miss, aktualisiert LRU)"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        """Speichert Eintrag (atomar) und verdrängt bei Bedarf alte"""
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def stats(self) -> Dict:
+        """Trefferstatistik (für TUI)"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes
+        }
+
+    def _load_index(self) -> None:
+        """Baut den LRU-Index aus den vorhandenen Dateien (nach mtime)"""
+        if not self.cache_dir.exists():
+            return
+        found = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+
+def create_cache(project_path: str, config: Dict) -> Optional[ResultCache]:
+    """Result-Cache laut cache-Sektion (None wenn deaktiviert)"""
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+    cache_dir = Path(project_path) / cache_config.get("dir", ".jarvis-cache")
+    max_bytes = int(cache_config.get("max_mb", 256) * 1024 * 1024)
+    return ResultCache(cache_dir, max_bytes)
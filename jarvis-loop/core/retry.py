@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Retry Policy
+Wiederholung fehlgeschlagener Tasks mit Backoff + Jitter
+
+Fehlerklassen (classify_failure):
+- rate_limit: 429 / "rate limit" / "too many requests" (ggf. Retry-After)
+- transient:  Timeouts, Verbindungsabbrüche, 5xx, Exit-Code 75 (EX_TEMPFAIL)
+- permanent:  alles andere (retry.default_class), sowie "cancelled"
+
+Wartezeit = Full Jitter: zufällig in [0, min(max_delay, base * multiplier^n)]
+- parallele Agents laufen nach einem gemeinsamen Fehler nicht im Gleichschritt
+wieder los. Wartende Tasks belegen keinen Slot: sie liegen im TimerWheel und
+werden bei Fälligkeit wieder auf 'pending' gesetzt.
+"""
+
+import math
+import random
+import re
+import time
+from typing import Dict, Hashable, List, Optional
+
+TRANSIENT = "transient"
+RATE_LIMIT = "rate_limit"
+PERMANENT = "permanent"
+
+EX_TEMPFAIL = 75
+
+RATE_LIMIT_PATTERN = re.compile(
+    r"\b429\b|rate.?limit|too many requests|overloaded", re.IGNORECASE)
+TRANSIENT_PATTERN = re.compile(
+    r"timeout|timed out|connection (reset|refused|aborted)|"
+    r"temporar(il)?y|unavailable|\b50[234]\b|ECONNRESET|EPIPE|worker_lost",
+    re.IGNORECASE)
+RETRY_AFTER_PATTERN = re.compile(r"retry.?after[:= ]+(\d+(?:\.\d+)?)",
+                                 re.IGNORECASE)
+
+
+def classify_failure(result: Dict, default_class: str = PERMANENT) -> str:
+    """Ordnet ein fehlgeschlagenes Result einer Fehlerklasse zu"""
+    error = result.get("error") or ""
+    if error == "cancelled":
+        return PERMANENT  # vom Benutzer abgebrochen
+    text = f"{error}\n{(result.get('output') or '')[-2000:]}"
+    if RATE_LIMIT_PATTERN.search(text):
+        return RATE_LIMIT
+    if (result.get("exit_code") == EX_TEMPFAIL
+            or TRANSIENT_PATTERN.search(text)):
+        return TRANSIENT
+    return default_class
+
+
+class RetryPolicy:
+    """Entscheidet ob und wann ein fehlgeschlagener Task wiederholt wird"""
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.base_delay_sec = config.get("base_delay_sec", 2)
+        self.rate_limit_delay_sec = config.get("rate_limit_delay_sec", 10)
+        self.multiplier = config.get("multiplier", 2)
+        self.max_delay_sec = config.get("max_delay_sec", 120)
+        self.max_attempts = config.get("max_attempts", {"default": 3})
+        self.default_class = config.get("default_class", PERMANENT)
+        self._random = random.Random()
+
+    def attempts_for(self, task_type: str) -> int:
+        """Maximale Versuche für einen Task-Typ (retry.max_attempts)"""
+        return self.max_attempts.get(task_type,
+                                     self.max_attempts.get("default", 3))
+
+    def decide(self, task: Dict, result: Dict) -> Dict:
+        """
+        {"failure_class", "retry", "delay_sec"} - retry False wenn der
+        Fehler permanent ist oder die Versuche aufgebraucht sind
+        """
+        failure_class = classify_failure(result, self.default_class)
+        attempts = task.get("attempts", 1)
+        decision = {"failure_class": failure_class, "retry": False,
+                    "delay_sec": 0.0,
+                    "max_attempts": self.attempts_for(task.get("type"))}
+        if (not self.enabled or failure_class == PERMANENT
+                or attempts >= decision["max_attempts"]):
+            return decision
+
+        base = (self.rate_limit_delay_sec if failure_class == RATE_LIMIT
+                else self.base_delay_sec)
+        cap = min(self.max_delay_sec,
+                  base * self.multiplier ** max(0, attempts - 1))
+        delay = self._random.uniform(0, cap)
+        retry_after = self._retry_after(result)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        decision["retry"] = True
+        decision["delay_sec"] = delay
+        return decision
+
+    @staticmethod
+    def _retry_after(result: Dict) -> Optional[float]:
+        text = f"{result.get('error') or ''}\n{result.get('output') or ''}"
+        match = RETRY_AFTER_PATTERN.search(text[-2000:])
+        return float(match.group(1)) if match else None
+
+
+class TimerWheel:
+    """
+    Hashed Timer Wheel: O(1) schedule, advance nur über abgelaufene Ticks.
+    Wird vom Dispatch-Loop getrieben (kein eigener Thread).
+    """
+
+    def __init__(self, tick_sec: float = 0.25, slots: int = 512):
+        self.tick_sec = tick_sec
+        self._slots: List[List] = [[] for _ in range(slots)]
+        self._tick: Optional[int] = None  # zuletzt verarbeiteter Tick
+        self._due: Dict[Hashable, int] = {}  # key -> fälliger Tick
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, key: Hashable, delay_sec: float,
+                 now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        if self._tick is None:
+            self._tick = int(now / self.tick_sec)
+        due = max(self._tick + 1,
+                  math.ceil((now + delay_sec) / self.tick_sec))
+        self._due[key] = due
+        self._slots[due % len(self._slots)].append((due, key))
+
+    def cancel(self, key: Hashable) -> bool:
+        """Entfernt Timer (Slot-Eintrag wird beim Erreichen verworfen)"""
+        return self._due.pop(key, None) is not None
+
+    def advance(self, now: float = None) -> List[Hashable]:
+        """Fällige Keys seit dem letzten Aufruf"""
+        if self._tick is None or not self._due:
+            self._tick = None
+            return []
+        now = time.monotonic() if now is None else now
+        target = int(now / self.tick_sec)
+        if target <= self._tick:
+            return []
+        count = len(self._slots)
+        ticks = range(self._tick + 1, target + 1)
+        if len(ticks) > count:
+            ticks = range(target - count + 1, target + 1)  # jeder Slot einmal
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % count]
+            keep = []
+            for due, key in slot:
+                if self._due.get(key) != due:
+                    continue  # abgebrochen oder neu geplant
+                if due <= target:
+                    del self._due[key]
+                    expired.append(key)
+                else:
+                    keep.append((due, key))
+            slot[:] = keep
+        self._tick = target
+        return expired
+
+    def drain(self) -> List[Hashable]:
+        """Alle noch wartenden Keys (z.B. beim Beenden des Loops)"""
+        keys = list(self._due)
+        self._due.clear()
+        for slot in self._slots:
+            slot.clear()
+        self._tick = None
+        return keys
+
+
+def create_retry_policy(config: Dict) -> RetryPolicy:
+    """Retry-Policy laut retry-Sektion der Config"""
+    return RetryPolicy(config.get("retry", {}))
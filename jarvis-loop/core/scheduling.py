@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Scheduling Policies
+Reihenfolge in der bereite Tasks dispatcht werden
+
+- fifo:           nach Task-ID, also Reihenfolge des Anlegens (bisheriges
+                  Verhalten, bei JSON und SQLite gleich)
+- critical_path:  längster verbleibender Pfad zuerst (Makespan minimieren)
+- cheapest_first: günstigste/schnellste Tasks zuerst
+
+Gewicht eines Tasks = beobachtete Durchschnittsdauer seines Typs (Sekunden),
+für unbeobachtete Typen die Gesamt-Durchschnittsdauer; solange noch gar
+nichts beobachtet wurde: estimated_cost.
+Aging: Tasks die länger als scheduling.aging_sec warten, kommen nach vorne.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+
+class SchedulingPolicy:
+    """Basis: FIFO + Aging + Dauer-Beobachtung"""
+
+    name = "fifo"
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.aging_sec = config.get("aging_sec", 300)
+        self._ready_since: Dict[int, float] = {}
+        # type -> [summe, anzahl], None = alle Typen
+        self._durations: Dict[Optional[str], List[float]] = {}
+
+    def order(self, ready: List[Dict], task_manager=None) -> List[Dict]:
+        """Sortiert bereite Tasks; wartende Tasks (Aging) zuerst"""
+        now = time.monotonic()
+        ready_ids = set()
+        for task in ready:
+            ready_ids.add(task["id"])
+            self._ready_since.setdefault(task["id"], now)
+        for task_id in list(self._ready_since):
+            if task_id not in ready_ids:
+                del self._ready_since[task_id]
+
+        ranked = self._rank(ready, task_manager)
+        if self.aging_sec <= 0:
+            return ranked
+
+        starving = [task for task in ranked
+                    if now - self._ready_since[task["id"]] >= self.aging_sec]
+        if not starving:
+            return ranked
+        starving.sort(key=lambda task: self._ready_since[task["id"]])
+        starving_ids = {task["id"] for task in starving}
+        return starving + [task for task in ranked
+                           if task["id"] not in starving_ids]
+
+    def observe(self, task: Dict, duration_sec: float) -> None:
+        """Meldet beobachtete Laufzeit eines abgeschlossenen Tasks"""
+        for key in (task["type"], None):
+            stats = self._durations.setdefault(key, [0.0, 0])
+            stats[0] += duration_sec
+            stats[1] += 1
+
+    def weight(self, task: Dict) -> float:
+        """Erwartete Kosten eines Tasks (Dauer falls beobachtet)"""
+        stats = (self._durations.get(task.get("type"))
+                 or self._durations.get(None))
+        if stats and stats[1]:
+            return stats[0] / stats[1]
+        return task.get("estimated_cost", 0.50)
+
+    def _rank(self, ready: List[Dict], task_manager) -> List[Dict]:
+        return list(ready)
+
+
+class FifoPolicy(SchedulingPolicy):
+    name = "fifo"
+
+
+class CheapestFirstPolicy(SchedulingPolicy):
+    name = "cheapest_first"
+
+    def _rank(self, ready: List[Dict], task_manager) -> List[Dict]:
+        return sorted(ready, key=self.weight)
+
+
+class CriticalPathPolicy(SchedulingPolicy):
+    """
+    Priorität = Gewicht des Tasks + längster Pfad über seine Dependents.
+    Pfadlängen werden gecacht und höchstens alle refresh_sec (oder wenn
+    Tasks hinzukommen) neu berechnet - O(V+E) pro Berechnung.
+    """
+
+    name = "critical_path"
+
+    def __init__(self, config: Dict = None):
+        super().__init__(config)
+        config = config or {}
+        self.refresh_sec = config.get("critical_path_refresh_sec", 5)
+        self._path_length: Dict[int, float] = {}
+        self._computed_at = 0.0
+        self._computed_for: Optional[int] = None
+
+    def _rank(self, ready: List[Dict], task_manager) -> List[Dict]:
+        if task_manager is None:
+            return list(ready)
+        self._refresh(task_manager)
+        return sorted(ready,
+                      key=lambda task: -self._path_length.get(
+                          task["id"], self.weight(task)))
+
+    def _refresh(self, task_manager) -> None:
+        total = task_manager.get_status()["tasks"]["total"]
+        now = time.monotonic()
+        if (self._computed_for == total
+                and now - self._computed_at < self.refresh_sec):
+            return
+
+        tasks = task_manager.get_tasks()
+        by_id = {task["id"]: task for task in tasks}
+        dependents: Dict[int, List[int]] = {}
+        indegree = {task_id: 0 for task_id in by_id}
+        for task in tasks:
+            for dep in task.get("dependencies", []):
+                if dep in by_id:
+                    dependents.setdefault(dep, []).append(task["id"])
+                    indegree[task["id"]] += 1
+
+        # Topologische Reihenfolge, dann rückwärts die Pfadlängen
+        order = [task_id for task_id, degree in indegree.items() if degree == 0]
+        for task_id in order:
+            for dependent in dependents.get(task_id, ()):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    order.append(dependent)
+
+        length: Dict[int, float] = {}
+        for task_id in reversed(order):
+            task = by_id[task_id]
+            own = 0.0 if task["status"] in ("done", "failed") else self.weight(task)
+            length[task_id] = own + max(
+                (length[d] for d in dependents.get(task_id, ())), default=0.0)
+
+        self._path_length = length
+        self._computed_at = now
+        self._computed_for = total
+
+
+POLICIES = {
+    "fifo": FifoPolicy,
+    "critical_path": CriticalPathPolicy,
+    "cheapest_first": CheapestFirstPolicy
+}
+
+
+def create_policy(config: Dict) -> SchedulingPolicy:
+    """Erstellt Policy laut scheduling.policy"""
+    scheduling = config.get("scheduling", {})
+    name = scheduling.get("policy", "fifo")
+    if name not in POLICIES:
+        raise ValueError(f"Unbekannte Scheduling-Policy: {name}")
+    return POLICIES[name](scheduling)
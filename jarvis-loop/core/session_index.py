@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Session Index
+Offset-Index und Abfragen über session.jsonl (inkl. rotierter Segmente)
+
+Jedes Segment wird in Blöcke von ca. logging.index_block_kb zerlegt
+(Blockgrenzen auf Zeilenanfängen). Der Index (session.jsonl.idx) hält pro
+Segment:
+
+- blocks: [Start-Offset, erster Timestamp, letzter Timestamp] je Block
+- tasks:  Task-ID  -> Blöcke mit Events dieses Tasks
+- types:  Event-Typ -> Blöcke mit Events dieses Typs
+
+Eine Abfrage schneidet die Kandidaten-Blöcke (Task, Typ, Zeitraum) und
+liest nur diese - per mmap bzw. seek im .gz-Archiv. Segmente werden über
+ihre erste Zeile erkannt, ein Index überlebt also Rotation und gzip. Der
+Index wächst inkrementell: nachindiziert wird nur, was seit dem letzten
+Aufruf angehängt wurde.
+"""
+
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from event_writer import list_archives, open_segment
+
+INDEX_VERSION = 1
+
+TimeBound = Union[str, datetime, None]
+
+
+class SessionIndex:
+    """Sidecar-Index über session.jsonl und seine Archive"""
+
+    def __init__(self, session_file: Path, block_kb: int = 64):
+        self.session_file = Path(session_file)
+        self.index_file = self.session_file.with_name(
+            self.session_file.name + ".idx")
+        self.block_size = block_kb * 1024
+        self._segments: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    def query(self, task_id: int = None, types: Iterable[str] = None,
+              since: TimeBound = None, until: TimeBound = None,
+              limit: int = None, newest: bool = False) -> List[Dict]:
+        """
+        Events (zeitlich sortiert), gefiltert nach Task, Typ(en) und
+        Zeitraum [since, until]. limit mit newest=True liefert die letzten
+        limit Treffer, sonst die ersten.
+        """
+        types = set(types) if types else None
+        since, until = _iso(since), _iso(until)
+        with self._lock:
+            segments = self._refresh()
+
+        events: List[Dict] = []
+        for path, entry in (reversed(segments) if newest else segments):
+            blocks = _candidates(entry, task_id, types, since, until)
+            ranges = _byte_ranges(entry, blocks)
+            for chunk in _read_ranges(path, ranges, newest):
+                matches = [event for event in _parse(chunk)
+                           if _matches(event, task_id, types, since, until)]
+                events.extend(reversed(matches) if newest else matches)
+                if limit is not None and len(events) >= limit:
+                    break
+            if limit is not None and len(events) >= limit:
+                break
+
+        events = events[:limit] if limit is not None else events
+        return list(reversed(events)) if newest else events
+
+    def refresh(self) -> int:
+        """Bringt den Index auf Stand, gibt die Anzahl Segmente zurück"""
+        with self._lock:
+            return len(self._refresh())
+
+    # --- Index pflegen ---
+
+    def _refresh(self) -> List[Tuple[Path, Dict]]:
+        if self._segments is None:
+            self._segments = self._load()
+        files = list_archives(self.session_file)
+        if self.session_file.exists():
+            files.append(self.session_file)
+
+        segments, seen, changed = [], set(), False
+        for path in files:
+            fingerprint = _fingerprint(path)
+            if fingerprint is None or fingerprint in seen:
+                continue  # leer, gerade rotiert bzw. .gz noch nicht fertig
+            seen.add(fingerprint)
+            entry = self._segments.setdefault(fingerprint, {
+                "indexed": 0, "complete": False,
+                "blocks": [], "tasks": {}, "types": {}})
+            if not entry["complete"]:
+                changed |= self._extend(path, entry)
+            segments.append((path, entry))
+
+        stale = set(self._segments) - seen
+        for fingerprint in stale:
+            del self._segments[fingerprint]
+        if changed or stale:
+            self._save()
+        return segments
+
+    def _extend(self, path: Path, entry: Dict) -> bool:
+        """Indiziert neue, vollständige Zeilen ab entry['indexed']"""
+        archived = path != self.session_file
+        if not archived and path.stat().st_size <= entry["indexed"]:
+            return False
+        offset = entry["indexed"]
+        with open_segment(path) as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Writer schreibt gerade
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    offset += len(line)
+                    continue
+                self._add(entry, offset, event)
+                offset += len(line)
+        changed = offset != entry["indexed"] or archived
+        entry["indexed"] = offset
+        entry["complete"] = archived
+        return changed
+
+    def _add(self, entry: Dict, offset: int, event: Dict) -> None:
+        blocks = entry["blocks"]
+        timestamp = event.get("timestamp", "")
+        if not blocks or offset - blocks[-1][0] >= self.block_size:
+            blocks.append([offset, timestamp, timestamp])
+        else:
+            blocks[-1][2] = max(blocks[-1][2], timestamp)
+        block = len(blocks) - 1
+
+        _post(entry["types"], event.get("type", ""), block)
+        data = event.get("data")
+        if isinstance(data, dict) and isinstance(data.get("id"), int):
+            _post(entry["tasks"], str(data["id"]), block)
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (index.get("version") != INDEX_VERSION
+                or index.get("block_size") != self.block_size):
+            return {}  # anderes Format: neu aufbauen
+        return index["segments"]
+
+    def _save(self) -> None:
+        """Speichert den Index atomar (fehlende Schreibrechte: nur im RAM)"""
+        tmp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION,
+                           "block_size": self.block_size,
+                           "segments": self._segments}, f)
+            os.replace(tmp_file, self.index_file)
+        except OSError:
+            pass
+
+
+def _post(postings: Dict[str, List[int]], key: str, block: int) -> None:
+    blocks = postings.setdefault(key, [])
+    if not blocks or blocks[-1] != block:
+        blocks.append(block)
+
+
+def _fingerprint(path: Path) -> Optional[str]:
+    """Identität eines Segments: Hash seiner ersten Zeile"""
+    try:
+        with open_segment(path) as f:
+            first = f.readline(4096)
+    except (OSError, EOFError):
+        return None
+    if not first.endswith(b"\n") and len(first) < 4096:
+        return None  # erste Zeile noch unvollständig
+    return hashlib.sha1(first).hexdigest()
+
+
+def _candidates(entry: Dict, task_id: Optional[int], types: Optional[set],
+                since: Optional[str], until: Optional[str]) -> List[int]:
+    """Blöcke, die Treffer enthalten können (Schnitt der Postings)"""
+    candidates = set(range(len(entry["blocks"])))
+    if task_id is not None:
+        candidates &= set(entry["tasks"].get(str(task_id), ()))
+    if types is not None:
+        candidates &= {block for event_type in types
+                       for block in entry["types"].get(event_type, ())}
+    if since is not None or until is not None:
+        candidates = {block for block in candidates
+                      if (since is None or entry["blocks"][block][2] >= since)
+                      and (until is None or entry["blocks"][block][1] <= until)}
+    return sorted(candidates)
+
+
+def _byte_ranges(entry: Dict, blocks: List[int]) -> List[Tuple[int, int]]:
+    """Kandidaten-Blöcke -> zusammenhängende Byte-Bereiche"""
+    starts = entry["blocks"]
+    ranges: List[List[int]] = []
+    for block in blocks:
+        start = starts[block][0]
+        end = (starts[block + 1][0] if block + 1 < len(starts)
+               else entry["indexed"])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return [(start, end) for start, end in ranges]
+
+
+def _read_ranges(path: Path, ranges: List[Tuple[int, int]],
+                 newest: bool) -> Iterable[bytes]:
+    """Liest Byte-Bereiche (unkomprimiert per mmap, .gz per seek)"""
+    if not ranges:
+        return
+    if str(path).endswith(".gz"):
+        # gzip kann nur vorwärts effizient seeken
+        with gzip.open(path, "rb") as f:
+            chunks = []
+            for start, end in ranges:
+                f.seek(start)
+                chunks.append(f.read(end - start))
+        yield from (reversed(chunks) if newest else chunks)
+        return
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for start, end in (reversed(ranges) if newest else ranges):
+                yield view[start:min(end, size)]
+
+
+def _parse(chunk: bytes) -> Iterable[Dict]:
+    for line in chunk.splitlines():
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def _matches(event: Dict, task_id: Optional[int], types: Optional[set],
+             since: Optional[str], until: Optional[str]) -> bool:
+    if types is not None and event.get("type") not in types:
+        return False
+    timestamp = event.get("timestamp", "")
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp > until:
+        return False
+    if task_id is not None:
+        data = event.get("data")
+        return isinstance(data, dict) and data.get("id") == task_id
+    return True
+
+
+def _iso(bound: TimeBound) -> Optional[str]:
+    """Zeitgrenze als ISO-String (vergleichbar mit den Event-Timestamps)"""
+    if bound is None or isinstance(bound, str):
+        return bound
+    return bound.isoformat()
+
+
+def parse_time(text: Optional[str]) -> Optional[str]:
+    """
+    Zeitgrenze für die CLI: ISO-Zeitpunkt ("2026-10-18T09:30") oder
+    relativ zu jetzt ("90s", "15m", "2h", "1d")
+    """
+    if not text:
+        return None
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text[-1] in units and text[:-1].replace(".", "", 1).isdigit():
+        seconds = float(text[:-1]) * units[text[-1]]
+        return (datetime.now() - timedelta(seconds=seconds)).isoformat()
+    return datetime.fromisoformat(text).isoformat()
+
+
+def format_event(event: Dict) -> str:
+    """Eine Zeile pro Event: Zeit, Typ, Task, wichtigste Felder"""
+    data = event.get("data") or {}
+    fields = []
+    status = (data.get("changes") or {}).get("status")
+    if status:
+        fields.append(f"-> {status}")
+    for key, value in data.items():
+        if key in ("id", "changes", "task") or value is None:
+            continue
+        fields.append(f"{key}={value}")
+    task = f"#{data['id']}" if isinstance(data.get("id"), int) else ""
+    line = " ".join(fields).replace("\n", " ")
+    return (f"{event.get('timestamp', '')[:19]}  {event.get('type', ''):<22} "
+            f"{task:<6} {line[:100]}").rstrip()
+
+
+def create_session_index(session_file: Path, config: Dict) -> SessionIndex:
+    """Index laut logging.index_block_kb"""
+    return SessionIndex(session_file,
+                        config.get("logging", {}).get("index_block_kb", 64))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Task Graph
+Dependency-Graph (DAG) mit Restzählern und Rückwärtskanten
+
+Statt bei jedem get_ready_tasks alle Dependencies aller Tasks zu prüfen
+(O(N²·D)), zählt der Graph pro Task die noch offenen Dependencies.
+Wird ein Task 'done', werden nur seine Dependents dekrementiert; Tasks
+deren Zähler auf 0 fällt, landen in der Ready-Queue.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class TaskGraph:
+    """Inkrementeller DAG-Index über Task-IDs"""
+
+    def __init__(self):
+        self._deps: Dict[int, List[int]] = {}
+        self._dependents: Dict[int, Set[int]] = {}
+        self._remaining: Dict[int, int] = {}
+        self._status: Dict[int, str] = {}
+        # Ready-Queue: pending + keine offenen Dependencies
+        self._ready: Dict[int, None] = {}
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._status
+
+    def add(self, task_id: int, dependencies: Iterable[int],
+            status: str = "pending") -> None:
+        """Fügt Task hinzu (Dependencies dürfen noch fehlen, s. find_invalid)"""
+        deps = list(dict.fromkeys(dependencies))
+        self._deps[task_id] = deps
+        self._status[task_id] = status
+        self._remaining[task_id] = sum(
+            1 for dep in deps if self._status.get(dep) != "done")
+        for dep in deps:
+            self._dependents.setdefault(dep, set()).add(task_id)
+
+        # Bereits eingetragene Dependents, die auf diesen Task warten
+        if status == "done":
+            for dependent in self._dependents.get(task_id, ()):
+                if dependent != task_id:
+                    self._decrement(dependent)
+        self._update_ready(task_id)
+
+    def set_status(self, task_id: int, status: str) -> None:
+        """Status-Übergang, hält Zähler und Ready-Queue aktuell"""
+        old = self._status.get(task_id)
+        if old is None or old == status:
+            return
+        self._status[task_id] = status
+
+        if status == "done":
+            for dependent in self._dependents.get(task_id, ()):
+                self._decrement(dependent)
+        elif old == "done":
+            for dependent in self._dependents.get(task_id, ()):
+                self._remaining[dependent] += 1
+                self._ready.pop(dependent, None)
+        self._update_ready(task_id)
+
+    def ready(self) -> List[int]:
+        """
+        IDs aller bereiten Tasks nach ID - dieselbe Reihenfolge wie
+        SqliteTaskStore (ORDER BY id), unabhängig vom Bereitwerden
+        """
+        return sorted(self._ready)
+
+    def ready_count(self) -> int:
+        return len(self._ready)
+
+    def first_ready(self) -> Optional[int]:
+        """Kleinste bereite ID (ohne zu sortieren)"""
+        return min(self._ready, default=None)
+
+    def dependents(self, task_id: int) -> Set[int]:
+        return self._dependents.get(task_id, set())
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def _decrement(self, task_id: int) -> None:
+        self._remaining[task_id] -= 1
+        self._update_ready(task_id)
+
+    def _update_ready(self, task_id: int) -> None:
+        if (self._status.get(task_id) == "pending"
+                and self._remaining.get(task_id) == 0):
+            self._ready[task_id] = None
+        else:
+            self._ready.pop(task_id, None)
+
+    @staticmethod
+    def find_invalid(tasks: Iterable[Dict]) -> Dict[int, str]:
+        """
+        Findet Tasks die nie bereit werden können:
+        unbekannte Dependency-IDs und Zyklen (inkl. ihrer Dependents).
+        Gibt {task_id: Grund} zurück. Laufzeit O(V+E) (Kahn).
+        """
+        deps = {task["id"]: list(dict.fromkeys(task.get("dependencies", [])))
+                for task in tasks}
+        invalid: Dict[int, str] = {}
+        for task_id, task_deps in deps.items():
+            missing = [dep for dep in task_deps if dep not in deps]
+            if missing:
+                invalid[task_id] = "Unbekannte Dependency: " + ", ".join(
+                    f"#{dep}" for dep in missing)
+
+        # Topologische Sortierung: was übrig bleibt, hängt an einem Zyklus
+        indegree = {task_id: 0 for task_id in deps}
+        dependents: Dict[int, List[int]] = {}
+        for task_id, task_deps in deps.items():
+            for dep in task_deps:
+                if dep in deps:
+                    indegree[task_id] += 1
+                    dependents.setdefault(dep, []).append(task_id)
+
+        queue = [task_id for task_id, degree in indegree.items() if degree == 0]
+        visited = 0
+        while queue:
+            task_id = queue.pop()
+            visited += 1
+            for dependent in dependents.get(task_id, ()):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+
+        if visited < len(deps):
+            for task_id, degree in indegree.items():
+                if degree > 0 and task_id not in invalid:
+                    invalid[task_id] = "Dependency-Zyklus"
+        return invalid
@@ -2,15 +2,35 @@
 """
 JARVIS Loop - Task Manager
 JSON-basierter Task Manager wie Ralph Loop
+
+Persistenz über austauschbare Storage-Backends (task_store.py):
+- json:   In-Memory + Journal (session.jsonl) + Snapshot (tasks.json)
+- sqlite: tasks.db im WAL-Modus (mehrere Prozesse)
+
+Outputs liegen im Blob Store (blob_store.py), Tasks tragen nur output_ref.
+Die Event-History ist über session_index.py abfragbar (query_history).
 """
 
 import json
 import os
+import hashlib
 import time
+import atexit
+import weakref
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from task_store import create_store, TASK_STATUSES
+from blob_store import create_blob_store
+from session_index import create_session_index
+from task_graph import TaskGraph
+from leases import LEASE_OWNER, lease_expired
+
+# Offene Manager für den Snapshot bei exit (schwach gehalten)
+_open_managers: "weakref.WeakSet" = weakref.WeakSet()
+
+
 class TaskManager:
     """Verwaltet Tasks im JSON Format (wie Ralph Loop)"""
     
@@ -18,10 +38,27 @@ class TaskManager:
         self.project_path = Path(project_path)
         self.tasks_file = self.project_path / "tasks.json"
         self.session_file = self.project_path / "session.jsonl"
-        self.tasks = []
         self.current_iteration = 0
         self.config = self._load_config()
         
+        # Storage-Backend (json | sqlite), siehe task_store.py
+        self.store = create_store(self.project_path, self.config)
+        self.blobs = create_blob_store(self.project_path, self.config)
+        self.history = create_session_index(self.store.session_file,
+                                            self.config)
+        self._fail_invalid_tasks()
+        _open_managers.add(self)
+    
+    @property
+    def tasks(self) -> List[Dict]:
+        """Alle Tasks (in Datei-Reihenfolge)"""
+        return self.store.all_tasks()
+    
+    @property
+    def replayed_events(self) -> int:
+        """Anzahl beim Laden nachgespielter Journal-Events"""
+        return self.store.replayed_events
+        
     def _load_config(self) -> Dict:
         """Lädt Loop Konfiguration"""
         config_path = Path(__file__).parent.parent / "config" / "default_config.json"
@@ -49,112 +86,236 @@ class TaskManager:
             "agents": self.config["agents"]
         }
         
-        self._save_tasks(project_data)
-        self._log_event("project_created", {"name": name})
+        self.store.log_event("project_created", {"name": name})
+        self.store.reset(project_data)
         
     def add_task(self, title: str, task_type: str = "coding", 
                  dependencies: List[int] = None, 
                  estimated_cost: float = 0.50) -> int:
-        """Fügt neuen Task hinzu"""
-        task_id = len(self.tasks) + 1
+        """
+        Fügt neuen Task hinzu.
+        Dependencies müssen existieren (ValueError), so können weder
+        Zyklen noch hängende Referenzen entstehen.
+        """
+        dependencies = list(dict.fromkeys(dependencies or []))
+        missing = [dep for dep in dependencies
+                   if self.store.get_task(dep) is None]
+        if missing:
+            raise ValueError(
+                f"Task '{title}': unbekannte Dependency " +
+                ", ".join(f"#{dep}" for dep in missing))
         
         task = {
-            "id": task_id,
+            "id": None,
             "title": title,
             "type": task_type,
             "status": "pending",  # pending, in_progress, done, failed
             "assigned_agent": None,
             "estimated_cost": estimated_cost,
             "actual_cost": 0.00,
-            "dependencies": dependencies or [],
+            "dependencies": dependencies,
             "created_at": datetime.now().isoformat(),
             "started_at": None,
             "completed_at": None,
             "attempts": 0,
             "output": None
         }
-        
-        data = self._load_tasks()
-        data["tasks"].append(task)
-        self._save_tasks(data)
-        
-        self._log_event("task_added", {"id": task_id, "title": title})
-        return task_id
+        return self.store.insert_task(task)
+    
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        """Gibt einzelnen Task zurück"""
+        return self.store.get_task(task_id)
+    
+    def get_tasks(self) -> List[Dict]:
+        """Gibt alle Tasks zurück"""
+        return self.store.all_tasks()
     
     def get_ready_tasks(self) -> List[Dict]:
         """Gibt Tasks zurück die bereit sind (Dependencies erfüllt)"""
-        data = self._load_tasks()
-        tasks = data["tasks"]
-        
-        ready = []
-        for task in tasks:
-            if task["status"] != "pending":
-                continue
-                
-            # Prüfe Dependencies
-            deps_satisfied = all(
-                any(t["id"] == dep and t["status"] == "done" 
-                    for t in tasks)
-                for dep in task["dependencies"]
-            )
-            
-            if deps_satisfied:
-                ready.append(task)
-        
-        return ready
+        return self.store.ready_tasks()
+    
+    def get_tasks_page(self, limit: Optional[int],
+                       offset: int = 0) -> List[Dict]:
+        """Ausschnitt der Tasks in Datei-Reihenfolge (z.B. sichtbare Zeilen)"""
+        return self.store.tasks_page(limit, offset)
+    
+    def get_active_position(self) -> int:
+        """Position des ersten laufenden oder bereiten Tasks (für das TUI)"""
+        return self.store.active_position()
+    
+    def get_status_changes(self, since: int = None) -> Tuple[int, List[Dict]]:
+        """
+        Tasks mit Statuswechsel seit Cursor since -> (neuer Cursor, Tasks).
+        Ohne since nur der aktuelle Cursor (Startpunkt).
+        """
+        return self.store.status_changes(since)
     
     def assign_task(self, task_id: int, agent: str) -> bool:
-        """Weist Task einem Agenten zu"""
-        data = self._load_tasks()
-        
-        for task in data["tasks"]:
-            if task["id"] == task_id:
-                task["assigned_agent"] = agent
-                task["status"] = "in_progress"
-                task["started_at"] = datetime.now().isoformat()
-                task["attempts"] += 1
-                break
-        
-        self._save_tasks(data)
-        self._log_event("task_assigned", {"id": task_id, "agent": agent})
-        return True
+        """Weist Task einem Agenten zu (nur aus 'pending'), mit Lease"""
+        return self.store.transition(
+            task_id, "task_assigned",
+            lambda task: {
+                "status": "in_progress",
+                "assigned_agent": agent,
+                "started_at": datetime.now().isoformat(),
+                "attempts": task["attempts"] + 1,
+                "lease_owner": LEASE_OWNER,
+                "lease_expires_at": time.time() + self._lease_sec()
+            },
+            allowed=("pending",),
+            info={"agent": agent}
+        )
+    
+    def schedule_retry(self, task_id: int, error: str, delay_sec: float,
+                       failure_class: str) -> bool:
+        """
+        Merkt einen fehlgeschlagenen Task zur Wiederholung vor. Er bleibt
+        'in_progress' (Lease bis retry_at + Lease-Dauer), bis der
+        Orchestrator ihn bei Fälligkeit mit requeue_task freigibt.
+        """
+        retry_at = time.time() + delay_sec
+        return self.store.transition(
+            task_id, "task_retry_scheduled",
+            {
+                "last_error": error,
+                "failure_class": failure_class,
+                "retry_at": retry_at,
+                "lease_owner": LEASE_OWNER,
+                "lease_expires_at": retry_at + self._lease_sec()
+            },
+            allowed=("in_progress",),
+            info={"error": error, "delay_sec": round(delay_sec, 3)}
+        )
+    
+    def renew_leases(self, task_ids: List[int]) -> int:
+        """Heartbeat: verlängert Leases laufender Tasks dieses Prozesses"""
+        expires_at = time.time() + self._lease_sec()
+        renewed = 0
+        for task_id in task_ids:
+            if self.store.transition(
+                    task_id, "lease_renewed",
+                    {"lease_owner": LEASE_OWNER, "lease_expires_at": expires_at},
+                    allowed=("in_progress",)):
+                renewed += 1
+        return renewed
+    
+    def requeue_task(self, task_id: int, reason: str) -> bool:
+        """Gibt einen in_progress Task zurück an die Warteschlange"""
+        return self.store.transition(
+            task_id, "task_requeued",
+            {
+                "status": "pending",
+                "assigned_agent": None,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "retry_at": None
+            },
+            allowed=("in_progress",),
+            info={"reason": reason}
+        )
+    
+    def reap_expired_leases(self) -> Dict[str, List[int]]:
+        """
+        Setzt in_progress Tasks mit abgelaufener Lease zurück auf 'pending'
+        bzw. auf 'failed', wenn leases.max_attempts verbraucht sind.
+        """
+        max_attempts = self.config.get("leases", {}).get("max_attempts", 3)
+        now = time.time()
+        reaped = {"requeued": [], "failed": []}
+        for task in self.store.all_tasks():
+            if task["status"] != "in_progress" or not lease_expired(task, now):
+                continue
+            if task.get("attempts", 0) >= max_attempts:
+                if self.fail_task(task["id"], f"Lease abgelaufen nach "
+                                  f"{task.get('attempts', 0)} Versuchen"):
+                    reaped["failed"].append(task["id"])
+            elif self.requeue_task(task["id"], "lease_expired"):
+                reaped["requeued"].append(task["id"])
+        return reaped
+    
+    def _lease_sec(self) -> float:
+        return self.config.get("leases", {}).get("duration_sec", 120)
     
     def complete_task(self, task_id: int, output: str = None, 
-                     cost: float = 0.00) -> bool:
-        """Markiert Task als erledigt"""
-        data = self._load_tasks()
-        
-        for task in data["tasks"]:
-            if task["id"] == task_id:
-                task["status"] = "done"
-                task["completed_at"] = datetime.now().isoformat()
-                task["actual_cost"] = cost
-                task["output"] = output
-                break
-        
-        data["iteration"]["cost_usd"] += cost
-        self._save_tasks(data)
-        
-        self._log_event("task_completed", {"id": task_id, "cost": cost})
-        return True
+                     cost: float = 0.00, duration_sec: float = None,
+                     agent: str = None) -> bool:
+        """
+        Markiert Task als erledigt. duration_sec/agent landen im
+        Session-Log (Laufzeit-Statistik, z.B. für Hedging).
+        """
+        info = {"cost": cost}
+        if duration_sec is not None:
+            info["duration_sec"] = round(duration_sec, 3)
+            info["agent"] = agent
+        return self.store.transition(
+            task_id, "task_completed",
+            {
+                "status": "done",
+                "completed_at": datetime.now().isoformat(),
+                "actual_cost": cost,
+                "output": None,
+                "output_ref": self._store_output(output)
+            },
+            allowed=("pending", "in_progress"),
+            cost=cost,
+            info=info
+        )
+    
+    def add_cost(self, task_id: int, cost: float, reason: str) -> bool:
+        """Verbucht zusätzliche Kosten eines Tasks (z.B. verworfener Hedge)"""
+        return self.store.transition(
+            task_id, "extra_cost", {}, cost=cost,
+            info={"cost": cost, "reason": reason})
     
     def fail_task(self, task_id: int, error: str) -> bool:
         """Markiert Task als fehlgeschlagen"""
-        data = self._load_tasks()
-        
-        for task in data["tasks"]:
-            if task["id"] == task_id:
-                task["status"] = "failed"
-                task["output"] = error
-                break
-        
-        self._save_tasks(data)
-        self._log_event("task_failed", {"id": task_id, "error": error})
-        return True
+        return self.store.transition(
+            task_id, "task_failed",
+            {"status": "failed", "output": None,
+             "output_ref": self._store_output(error)},
+            allowed=("pending", "in_progress"),
+            info={"error": error}
+        )
+    
+    def _store_output(self, output: Optional[str]) -> Optional[Dict]:
+        """Legt Output im Blob Store ab, gibt {digest, size, codec} zurück"""
+        if output is None:
+            return None
+        return self.blobs.put(output)
+    
+    def get_output(self, task_id: int, max_bytes: int = None,
+                   tail: bool = False) -> Optional[str]:
+        """
+        Lädt den Output eines Tasks erst bei Bedarf (optional nur Anfang
+        bzw. Ende). Alte tasks.json mit eingebettetem Output gehen weiter.
+        """
+        task = self.store.get_task(task_id)
+        if task is None:
+            return None
+        ref = task.get("output_ref")
+        if ref is None:
+            output = task.get("output")
+            if output is None or max_bytes is None:
+                return output
+            return output[-max_bytes:] if tail else output[:max_bytes]
+        return self.blobs.get(ref, max_bytes, tail)
+    
+    def output_digest(self, task_id: int) -> Optional[str]:
+        """SHA-256 des Outputs ohne ihn zu laden (None = kein Output)"""
+        task = self.store.get_task(task_id)
+        if task is None:
+            return None
+        ref = task.get("output_ref")
+        if ref is not None:
+            return ref["digest"]
+        output = task.get("output")
+        if output is None:
+            return None
+        return hashlib.sha256(output.encode("utf-8")).hexdigest()
     
     def check_safeguards(self) -> Dict:
         """Prüft ob Safeguards ausgelöst werden"""
-        data = self._load_tasks()
+        data = self.store.get_meta()
         iteration = data["iteration"]
         safeguards = data["safeguards"]
         
@@ -181,21 +342,18 @@ class TaskManager:
     
     def increment_iteration(self) -> int:
         """Erhöht Iterations-Zähler"""
-        data = self._load_tasks()
-        data["iteration"]["current"] += 1
-        self._save_tasks(data)
-        return data["iteration"]["current"]
+        return self.store.increment_iteration()
     
     def get_status(self) -> Dict:
         """Gibt aktuellen Status zurück"""
-        data = self._load_tasks()
-        tasks = data["tasks"]
+        data = self.store.get_meta()
+        counts = self.store.count_by_status()
         
-        total = len(tasks)
-        done = sum(1 for t in tasks if t["status"] == "done")
-        failed = sum(1 for t in tasks if t["status"] == "failed")
-        in_progress = sum(1 for t in tasks if t["status"] == "in_progress")
-        pending = sum(1 for t in tasks if t["status"] == "pending")
+        total = sum(counts.values())
+        done = counts.get("done", 0)
+        failed = counts.get("failed", 0)
+        in_progress = counts.get("in_progress", 0)
+        pending = counts.get("pending", 0)
         
         return {
             "project": data["project"],
@@ -210,29 +368,73 @@ class TaskManager:
             "progress_percent": (done / total * 100) if total > 0 else 0
         }
     
-    def _load_tasks(self) -> Dict:
-        """Lädt tasks.json"""
-        if not self.tasks_file.exists():
-            return {"tasks": [], "iteration": {}, "project": {}}
-        
-        with open(self.tasks_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    def flush(self) -> None:
+        """Schreibt ausstehende Änderungen (Snapshot) sofort weg"""
+        self.store.flush()
+    
+    def close(self) -> None:
+        """Snapshot schreiben und Store schließen (kein flush mehr bei exit)"""
+        _open_managers.discard(self)
+        self.store.close()
     
-    def _save_tasks(self, data: Dict) -> None:
-        """Speichert tasks.json"""
-        with open(self.tasks_file, 'w', encoding='utf-8') as f:
+    def has_project(self) -> bool:
+        """Existiert ein Projekt im konfigurierten Backend?"""
+        return self.store.exists()
+    
+    def export_json(self, path: str = None) -> Path:
+        """Exportiert alle Tasks im tasks.json Format"""
+        target = Path(path) if path else self.tasks_file
+        data = self.store.export_data()
+        tmp_file = target.with_name(target.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, target)
+        return target
+    
+    def import_json(self, path: str = None) -> int:
+        """Importiert tasks.json in das konfigurierte Backend"""
+        source = Path(path) if path else self.tasks_file
+        with open(source, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.store.reset(data)
+        self.store.log_event("tasks_imported", {
+            "file": str(source), "count": len(data.get("tasks", []))})
+        self._fail_invalid_tasks()
+        return len(data.get("tasks", []))
     
-    def _log_event(self, event_type: str, data: Dict) -> None:
+    def _fail_invalid_tasks(self) -> None:
+        """
+        Pending Tasks mit Zyklus oder unbekannter Dependency würden nie
+        bereit - sie werden mit Grund auf 'failed' gesetzt.
+        """
+        tasks = self.store.all_tasks()
+        invalid = TaskGraph.find_invalid(tasks)
+        for task in tasks:
+            if task["status"] == "pending" and task["id"] in invalid:
+                self.fail_task(task["id"], invalid[task["id"]])
+    
+    def log_event(self, event_type: str, data: Dict) -> None:
         """Schreibt Event in Session Log (JSONL)"""
-        event = {
-            "timestamp": datetime.now().isoformat(),
-            "type": event_type,
-            "data": data
-        }
-        
-        with open(self.session_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self.store.log_event(event_type, data)
+    
+    def query_history(self, task_id: int = None, types: List[str] = None,
+                      since=None, until=None, limit: int = None,
+                      newest: bool = False) -> List[Dict]:
+        """
+        Events aus session.jsonl (inkl. Archiven) über den Offset-Index,
+        gefiltert nach Task, Typ(en) und Zeitraum (ISO-String/datetime).
+        """
+        self.store.flush_log()
+        return self.history.query(task_id, types, since, until, limit, newest)
+
+
+def _flush_open_managers() -> None:
+    """atexit: Snapshot aller noch offenen Manager"""
+    for manager in list(_open_managers):
+        manager.flush()
+
+
+atexit.register(_flush_open_managers)
 
 
 if __name__ == "__main__":
@@ -241,5 +443,6 @@ if __name__ == "__main__":
     tm.create_project("Test", "Test Projekt")
     tm.add_task("Setup Projekt", "coding")
     tm.add_task("API bauen", "coding", dependencies=[1])
+    tm.flush()
     
     print(json.dumps(tm.get_status(), indent=2))
@@ -0,0 +1,796 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Task Store
+Storage-Backends für den TaskManager
+
+- JsonTaskStore:   In-Memory + Journal (session.jsonl) + Snapshot (tasks.json)
+- SqliteTaskStore: SQLite im WAL-Modus, für mehrere schreibende Prozesse
+
+Auswahl über storage.backend in default_config.json ("json" | "sqlite").
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+
+from task_graph import TaskGraph
+from budget import add_usd
+from event_writer import EventWriter, archive_path, find_archive, open_segment
+
+TASK_STATUSES = ("pending", "in_progress", "done", "failed")
+
+# Änderungen an einem Task: fertiges Dict oder Funktion(task) -> Dict
+Changes = Union[Dict, Callable[[Dict], Dict]]
+
+
+class TaskStore:
+    """
+    Basis-Interface für Storage-Backends.
+    Jede Mutation wird zusätzlich als Event in session.jsonl geloggt
+    (asynchron über den EventWriter, siehe core/event_writer.py).
+    """
+
+    # Writer rotiert selbst nach Größe/Alter (JSON: über compact())
+    AUTO_ROTATE = True
+
+    def __init__(self, project_path: Path, config: Dict):
+        self.project_path = Path(project_path)
+        self.config = config
+        self.session_file = self.project_path / config["logging"].get(
+            "session_file", "session.jsonl")
+        self.replayed_events = 0
+        self._writer = EventWriter(self.session_file, config["logging"],
+                                   auto_rotate=self.AUTO_ROTATE)
+
+    # --- Projekt ---
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def reset(self, data: Dict) -> None:
+        """Ersetzt kompletten Inhalt (neues Projekt oder Import)"""
+        raise NotImplementedError
+
+    def get_meta(self) -> Dict:
+        """project, iteration, safeguards, agents"""
+        raise NotImplementedError
+
+    def export_data(self) -> Dict:
+        """Kompletter Inhalt im tasks.json Format"""
+        meta = self.get_meta()
+        meta["tasks"] = self.all_tasks()
+        return meta
+
+    # --- Lesen ---
+
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def all_tasks(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def count_by_status(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def ready_tasks(self) -> List[Dict]:
+        """Pending Tasks deren Dependencies alle 'done' sind"""
+        raise NotImplementedError
+
+    def tasks_page(self, limit: Optional[int], offset: int = 0) -> List[Dict]:
+        """Tasks in Datei-Reihenfolge ab offset (limit None = alle)"""
+        raise NotImplementedError
+
+    def active_position(self) -> int:
+        """
+        Position (Datei-Reihenfolge) des ersten laufenden oder bereiten
+        Tasks, 0 wenn keiner - Anfang des Ausschnitts im TUI
+        """
+        raise NotImplementedError
+
+    def status_changes(self, since: int = None) -> Tuple[int, List[Dict]]:
+        """
+        Tasks mit Statuswechsel nach Cursor since (in Reihenfolge der
+        Wechsel) und der neue Cursor. since=None: nur der aktuelle Cursor.
+        """
+        raise NotImplementedError
+
+    # --- Schreiben ---
+
+    def insert_task(self, task: Dict) -> int:
+        """Legt Task an, vergibt ID"""
+        raise NotImplementedError
+
+    def transition(self, task_id: int, event_type: str, changes: Changes,
+                   allowed: Optional[Tuple[str, ...]] = None,
+                   cost: float = 0.00, info: Dict = None) -> bool:
+        """
+        Ändert einen Task atomar.
+        allowed: erlaubte Ausgangs-Status (None = alle)
+        cost:    wird auf iteration.cost_usd addiert
+        info:    zusätzliche Felder für das Session-Event
+        """
+        raise NotImplementedError
+
+    def increment_iteration(self) -> int:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+    # --- Session Log ---
+
+    def flush_log(self) -> None:
+        """Wartet bis alle eingereihten Events in session.jsonl stehen"""
+        self._writer.flush()
+
+    def log_event(self, event_type: str, data: Dict) -> None:
+        """Reiht Event für den Session Log (JSONL) ein"""
+        self._writer.write(self._encode_event(event_type, data))
+
+    @staticmethod
+    def _encode_event(event_type: str, data: Dict) -> bytes:
+        event = {
+            "timestamp": datetime.now().isoformat(),
+            "type": event_type,
+            "data": data
+        }
+        return (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _event_data(task_id: int, changes: Dict, info: Optional[Dict],
+                    total_cost: Optional[float]) -> Dict:
+        data = dict(info or {})
+        data["id"] = task_id
+        data["changes"] = changes
+        if total_cost is not None:
+            data["total_cost_usd"] = total_cost
+        return data
+
+
+class JsonTaskStore(TaskStore):
+    """
+    Tasks im Speicher (Index nach ID und Status).
+    Jede Mutation ist ein Append an session.jsonl (Journal); tasks.json ist
+    ein periodischer Snapshot mit Journal-Offset (Write-Behind, siehe
+    safeguards.auto_save_interval_sec). Beim Laden wird nur der Journal-Tail
+    nach dem Snapshot nachgespielt.
+    """
+
+    AUTO_ROTATE = False
+
+    def __init__(self, project_path: Path, config: Dict):
+        super().__init__(project_path, config)
+        self.tasks_file = self.project_path / "tasks.json"
+
+        # Write-Behind: Änderungen sammeln, gebündelt speichern
+        self.auto_save_interval = config["safeguards"].get(
+            "auto_save_interval_sec", 30)
+        self.journal_max_bytes = int(config["logging"].get(
+            "journal_max_mb", 64) * 1024 * 1024)
+        self.journal_max_age_sec = config["logging"].get(
+            "journal_max_age_hours", 24) * 3600
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+        # In-Memory Store: Snapshot (tasks.json) + Journal-Tail (session.jsonl)
+        self._lock = threading.RLock()
+        self._data = self._read_tasks_file()
+        position = self._data.pop("journal", None)
+        self._by_id: Dict[int, Dict] = {}
+        self._positions: Dict[int, int] = {}  # ID -> Index in tasks
+        self._by_status: Dict[str, Dict[int, Dict]] = {}
+        self._graph = TaskGraph()
+        self._status_seq = 0  # Zähler der Statuswechsel (Cursor)
+        self._status_changed: "OrderedDict[int, int]" = OrderedDict()
+        self._reindex()
+        self._journal_segment = 0
+        self._journal_offset = 0
+        self._replay_journal(position)
+
+    def exists(self) -> bool:
+        return self.tasks_file.exists()
+
+    def reset(self, data: Dict) -> None:
+        with self._lock:
+            self._data = dict(data)
+            self._data.pop("journal", None)
+            self._reindex()
+            self._dirty = True
+            self.flush()
+
+    def get_meta(self) -> Dict:
+        """Tiefe Kopie - Änderungen laufen nur über das Journal"""
+        with self._lock:
+            return copy.deepcopy({key: value for key, value in self._data.items()
+                                  if key != "tasks"})
+
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        with self._lock:
+            task = self._by_id.get(task_id)
+            return _copy_task(task) if task is not None else None
+
+    def all_tasks(self) -> List[Dict]:
+        with self._lock:
+            return [_copy_task(task) for task in self._data["tasks"]]
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            return {status: len(tasks)
+                    for status, tasks in self._by_status.items()}
+
+    def ready_tasks(self) -> List[Dict]:
+        """Aus der Ready-Queue des DAG-Index, ohne Dependency-Scan"""
+        with self._lock:
+            return [_copy_task(self._by_id[task_id])
+                    for task_id in self._graph.ready()]
+
+    def tasks_page(self, limit: Optional[int], offset: int = 0) -> List[Dict]:
+        with self._lock:
+            end = None if limit is None else offset + limit
+            return [_copy_task(task) for task in self._data["tasks"][offset:end]]
+
+    def active_position(self) -> int:
+        """Aus Status-Index und Ready-Queue, ohne Durchlauf über alle Tasks"""
+        with self._lock:
+            first = [task_id for task_id in (
+                min(self._by_status.get("in_progress", {}), default=None),
+                self._graph.first_ready()) if task_id is not None]
+            return self._positions[min(first)] if first else 0
+
+    def status_changes(self, since: int = None) -> Tuple[int, List[Dict]]:
+        """Vom jüngsten Wechsel rückwärts, bis zum Cursor (O(Wechsel))"""
+        with self._lock:
+            if since is None:
+                return self._status_seq, []
+            changed = []
+            for task_id, seq in reversed(self._status_changed.items()):
+                if seq <= since:
+                    break
+                changed.append(_copy_task(self._by_id[task_id]))
+            changed.reverse()
+            return self._status_seq, changed
+
+    def insert_task(self, task: Dict) -> int:
+        with self._lock:
+            task = dict(task, id=self._max_id + 1)
+            self._record("task_added",
+                         {"id": task["id"], "title": task["title"], "task": task})
+            return task["id"]
+
+    def transition(self, task_id: int, event_type: str, changes: Changes,
+                   allowed: Optional[Tuple[str, ...]] = None,
+                   cost: float = 0.00, info: Dict = None) -> bool:
+        with self._lock:
+            task = self._by_id.get(task_id)
+            if task is None:
+                return False
+            if allowed is not None and task["status"] not in allowed:
+                return False
+            if callable(changes):
+                changes = changes(task)
+            total_cost = None
+            if cost:
+                total_cost = add_usd(self._data["iteration"]["cost_usd"], cost)
+            self._record(event_type,
+                         self._event_data(task_id, changes, info, total_cost))
+            return True
+
+    def increment_iteration(self) -> int:
+        with self._lock:
+            current = self._data["iteration"]["current"] + 1
+            self._record("iteration_incremented", {"current": current})
+            return current
+
+    def flush(self) -> None:
+        """
+        Schreibt Snapshot nach tasks.json (mit Journal-Offset).
+        Wird das Journal zu groß oder zu alt, folgt eine Kompaktierung.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._write_snapshot()
+            if (self._journal_offset > self.journal_max_bytes
+                    or (self.journal_max_age_sec > 0 and
+                        self._writer.age_sec > self.journal_max_age_sec)):
+                self.compact()
+
+    def compact(self) -> None:
+        """
+        Kompaktiert das Journal: Snapshot schreiben, session.jsonl als
+        session.<segment>.jsonl archivieren (gzip im Hintergrund), neues
+        Segment beginnen.
+        """
+        with self._lock:
+            self._write_snapshot()
+            archive = archive_path(self.session_file, self._journal_segment)
+            self._writer.rotate(archive)
+            self._journal_segment += 1
+            self._journal_offset = 0
+            self.log_event("journal_compacted", {"archive": archive.name})
+            self._write_snapshot()
+
+    def log_event(self, event_type: str, data: Dict) -> None:
+        """Schreibt Event in Session Log (JSONL, zugleich Journal)"""
+        with self._lock:
+            lines = []
+            if self._journal_offset == 0:
+                lines.append(self._encode_event(
+                    "journal_segment", {"segment": self._journal_segment}))
+            lines.append(self._encode_event(event_type, data))
+
+            data = b"".join(lines)
+            self._writer.write(data)
+            self._journal_offset += len(data)  # logisch, Writer holt auf
+
+    def _write_snapshot(self) -> None:
+        """Speichert tasks.json inkl. Journal-Position"""
+        self._writer.flush()  # Offset im Snapshot nie vor der Datei
+        snapshot = dict(self._data)
+        snapshot["journal"] = {
+            "segment": self._journal_segment,
+            "offset": self._journal_offset
+        }
+        self._save_tasks(snapshot)
+        self._dirty = False
+
+    def _record(self, event_type: str, data: Dict) -> None:
+        """Mutation: auf In-Memory State anwenden + ans Journal anhängen"""
+        self._apply_event(event_type, data)
+        self.log_event(event_type, data)
+        self._mark_dirty()
+
+    def _apply_event(self, event_type: str, data: Dict) -> None:
+        """
+        Wendet ein Journal-Event auf den State an.
+        Events tragen absolute Werte, Replay ist daher idempotent.
+        """
+        if event_type == "iteration_incremented":
+            self._data["iteration"]["current"] = data["current"]
+            return
+
+        if event_type == "task_added":
+            task = dict(data["task"])
+            existing = self._by_id.get(task["id"])
+            if existing is None:
+                self._data["tasks"].append(task)
+                self._index_task(task)
+            else:
+                status = task.pop("status")
+                existing.update(task)
+                self._set_status(existing, status)
+            return
+
+        task = self._by_id.get(data.get("id"))
+        if task is None or "changes" not in data:
+            return
+
+        changes = dict(data["changes"])
+        status = changes.pop("status", None)
+        task.update(changes)
+        if status is not None:
+            self._set_status(task, status)
+        if "total_cost_usd" in data:
+            self._data["iteration"]["cost_usd"] = data["total_cost_usd"]
+
+    def _mark_dirty(self) -> None:
+        """Merkt Änderung vor, Speichern spätestens nach auto_save_interval"""
+        self._dirty = True
+        if self.auto_save_interval <= 0:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.auto_save_interval,
+                                                self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _replay_journal(self, position: Optional[Dict]) -> None:
+        """
+        Stellt State aus Snapshot + Journal-Tail wieder her.
+        Ohne Position (alte tasks.json) ist der Snapshot vollständig.
+        """
+        segment, size = self._read_segment_header()
+        self._journal_segment = segment
+        self._journal_offset = size
+        if position is None:
+            return
+
+        if position["segment"] == segment:
+            self._journal_offset = self._replay_file(
+                self.session_file, position["offset"], truncate=True)
+            return
+
+        # Snapshot stammt aus älterem Segment: dessen Rest + aktuelles Segment
+        archive = find_archive(self.session_file, position["segment"])
+        if archive is not None:
+            self._replay_file(archive, position["offset"])
+        if self.session_file.exists():
+            self._journal_offset = self._replay_file(
+                self.session_file, 0, truncate=True)
+
+    def _replay_file(self, path: Path, offset: int,
+                     truncate: bool = False) -> int:
+        """Spielt Events ab Byte-Offset nach, gibt End-Offset zurück"""
+        if not path.exists():
+            return 0
+        with open_segment(path) as f:
+            f.seek(offset)  # .gz: Offset im entpackten Journal
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # abgeschnittene Zeile (Absturz beim Schreiben)
+                event = json.loads(line)
+                if event["type"] != "journal_segment":
+                    self._apply_event(event["type"], event["data"])
+                    self.replayed_events += 1
+                offset += len(line)
+        if truncate and path.stat().st_size > offset:
+            os.truncate(path, offset)
+        if self.replayed_events:
+            self._dirty = True
+        return offset
+
+    def _read_segment_header(self):
+        """Liest Segment-Nummer und Größe von session.jsonl"""
+        if not self.session_file.exists():
+            return 0, 0
+        with open(self.session_file, 'rb') as f:
+            first = f.readline()
+            size = os.fstat(f.fileno()).st_size
+        try:
+            header = json.loads(first)
+        except ValueError:
+            return 0, size
+        if header.get("type") == "journal_segment":
+            return header["data"]["segment"], size
+        return 0, size
+
+    def _reindex(self) -> None:
+        """Baut ID- und Status-Index neu auf"""
+        self._by_id = {}
+        self._positions = {}
+        self._by_status = {status: {} for status in TASK_STATUSES}
+        self._max_id = 0
+        self._graph.clear()
+        self._status_changed.clear()
+        for task in self._data["tasks"]:
+            self._index_task(task)
+
+    def _index_task(self, task: Dict) -> None:
+        self._by_id[task["id"]] = task
+        self._positions[task["id"]] = len(self._positions)  # angehängt
+        self._max_id = max(self._max_id, task["id"])
+        self._by_status.setdefault(task["status"], {})[task["id"]] = task
+        self._graph.add(task["id"], task.get("dependencies", []),
+                        task["status"])
+
+    def _set_status(self, task: Dict, status: str) -> None:
+        """Ändert Status und hält Status-Index und Wechsel-Zähler aktuell"""
+        if task["status"] != status:
+            self._status_seq += 1
+            self._status_changed[task["id"]] = self._status_seq
+            self._status_changed.move_to_end(task["id"])
+        self._by_status[task["status"]].pop(task["id"], None)
+        task["status"] = status
+        self._by_status.setdefault(status, {})[task["id"]] = task
+        self._graph.set_status(task["id"], status)
+
+    def _read_tasks_file(self) -> Dict:
+        """Lädt tasks.json"""
+        if not self.tasks_file.exists():
+            return {"tasks": [], "iteration": {}, "project": {}}
+
+        with open(self.tasks_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_tasks(self, data: Dict) -> None:
+        """Speichert tasks.json (atomar über temporäre Datei)"""
+        tmp_file = self.tasks_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.tasks_file)
+
+
+class SqliteTaskStore(TaskStore):
+    """
+    SQLite Backend (WAL-Modus) für mehrere schreibende Prozesse.
+    Jeder Status-Übergang ist eine kurze IMMEDIATE-Transaktion, Übergänge
+    werden gegen den aktuellen Status geprüft (kein Lost Update).
+
+    Schema:
+      tasks(id, status, data, status_seq)
+                                    - data = Task als JSON, Index auf status;
+                                      status_seq = Nummer des letzten
+                                      Statuswechsels (status_changes)
+      task_deps(task_id, dep_id)    - Index auf dep_id
+      meta(key, value)              - project, iteration, safeguards, agents
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id      INTEGER PRIMARY KEY,
+            status  TEXT NOT NULL,
+            data    TEXT NOT NULL,
+            status_seq INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+        CREATE TABLE IF NOT EXISTS task_deps (
+            task_id INTEGER NOT NULL,
+            dep_id  INTEGER NOT NULL,
+            PRIMARY KEY (task_id, dep_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_task_deps_dep ON task_deps(dep_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key     TEXT PRIMARY KEY,
+            value   TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, project_path: Path, config: Dict):
+        super().__init__(project_path, config)
+        storage = config.get("storage", {})
+        self.db_file = self.project_path / storage.get("sqlite_file", "tasks.db")
+        self.tasks_file = self.project_path / "tasks.json"
+        self._lock = threading.RLock()
+
+        fresh = not self.db_file.exists()
+        self.project_path.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_file),
+            timeout=storage.get("sqlite_busy_timeout_sec", 10),
+            isolation_level=None,  # Transaktionen explizit (BEGIN IMMEDIATE)
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+
+        # Migration: bestehende tasks.json beim ersten Öffnen übernehmen
+        if fresh and self.tasks_file.exists():
+            with open(self.tasks_file, 'r', encoding='utf-8') as f:
+                self.reset(json.load(f))
+
+    def _transaction(self):
+        return _SqliteTransaction(self._conn, self._lock)
+
+    def _read(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """
+        Lesen unter dem Store-Lock: die Verbindung wird von allen Threads
+        geteilt, ohne Lock sähe ein Leser halb angewendete Transaktionen
+        """
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _migrate(self) -> None:
+        """Ältere tasks.db: Spalte status_seq nachrüsten"""
+        with self._transaction() as cur:
+            columns = {row[1] for row in cur.execute("PRAGMA table_info(tasks)")}
+            if "status_seq" not in columns:
+                cur.execute("ALTER TABLE tasks ADD COLUMN "
+                            "status_seq INTEGER NOT NULL DEFAULT 0")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_seq "
+                        "ON tasks(status_seq)")
+
+    def exists(self) -> bool:
+        return bool(self._read("SELECT 1 FROM meta WHERE key = 'project'"))
+
+    def reset(self, data: Dict) -> None:
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM tasks")
+            cur.execute("DELETE FROM task_deps")
+            cur.execute("DELETE FROM meta")
+            for key, value in data.items():
+                if key in ("tasks", "journal"):
+                    continue
+                cur.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                            (key, json.dumps(value, ensure_ascii=False)))
+            for task in data.get("tasks", []):
+                self._insert_row(cur, task)
+
+    def get_meta(self) -> Dict:
+        rows = self._read("SELECT key, value FROM meta")
+        meta = {"iteration": {}, "project": {}}
+        meta.update({key: json.loads(value) for key, value in rows})
+        return meta
+
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        rows = self._read("SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def all_tasks(self) -> List[Dict]:
+        rows = self._read("SELECT data FROM tasks ORDER BY id")
+        return [json.loads(data) for (data,) in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts = {status: 0 for status in TASK_STATUSES}
+        counts.update(dict(self._read(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status")))
+        return counts
+
+    def ready_tasks(self) -> List[Dict]:
+        rows = self._read("""
+            SELECT t.data FROM tasks t
+            WHERE t.status = 'pending'
+              AND NOT EXISTS (
+                  SELECT 1 FROM task_deps d
+                  LEFT JOIN tasks dep ON dep.id = d.dep_id
+                  WHERE d.task_id = t.id
+                    AND (dep.status IS NULL OR dep.status != 'done')
+              )
+            ORDER BY t.id
+        """)
+        return [json.loads(data) for (data,) in rows]
+
+    def tasks_page(self, limit: Optional[int], offset: int = 0) -> List[Dict]:
+        rows = self._read(
+            "SELECT data FROM tasks ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset))
+        return [json.loads(data) for (data,) in rows]
+
+    def active_position(self) -> int:
+        ((position,),) = self._read("""
+            SELECT COUNT(*) FROM tasks WHERE id < (
+                SELECT MIN(t.id) FROM tasks t
+                WHERE t.status = 'in_progress'
+                   OR (t.status = 'pending' AND NOT EXISTS (
+                       SELECT 1 FROM task_deps d
+                       LEFT JOIN tasks dep ON dep.id = d.dep_id
+                       WHERE d.task_id = t.id
+                         AND (dep.status IS NULL OR dep.status != 'done')))
+            )
+        """)
+        return position
+
+    def status_changes(self, since: int = None) -> Tuple[int, List[Dict]]:
+        """Über den Index auf status_seq (auch Wechsel anderer Prozesse)"""
+        if since is None:
+            ((cursor,),) = self._read(
+                "SELECT COALESCE(MAX(status_seq), 0) FROM tasks")
+            return cursor, []
+        rows = self._read(
+            "SELECT status_seq, data FROM tasks WHERE status_seq > ? "
+            "ORDER BY status_seq", (since,))
+        cursor = rows[-1][0] if rows else since
+        return cursor, [json.loads(data) for _, data in rows]
+
+    def insert_task(self, task: Dict) -> int:
+        with self._transaction() as cur:
+            (max_id,) = cur.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()
+            task = dict(task, id=max_id + 1)
+            self._insert_row(cur, task)
+        self.log_event("task_added",
+                       {"id": task["id"], "title": task["title"], "task": task})
+        return task["id"]
+
+    def transition(self, task_id: int, event_type: str, changes: Changes,
+                   allowed: Optional[Tuple[str, ...]] = None,
+                   cost: float = 0.00, info: Dict = None) -> bool:
+        with self._transaction() as cur:
+            row = cur.execute("SELECT data FROM tasks WHERE id = ?",
+                              (task_id,)).fetchone()
+            if row is None:
+                return False
+            task = json.loads(row[0])
+            previous = task["status"]
+            if allowed is not None and previous not in allowed:
+                return False
+            if callable(changes):
+                changes = changes(task)
+            task.update(changes)
+            if task["status"] != previous:
+                cur.execute("""
+                    UPDATE tasks SET status = ?, data = ?,
+                        status_seq = (SELECT MAX(status_seq) + 1 FROM tasks)
+                    WHERE id = ?
+                """, (task["status"], json.dumps(task, ensure_ascii=False),
+                      task_id))
+            else:
+                cur.execute("UPDATE tasks SET data = ? WHERE id = ?",
+                            (json.dumps(task, ensure_ascii=False), task_id))
+            total_cost = None
+            if cost:
+                iteration = self._get_meta_value(cur, "iteration")
+                iteration["cost_usd"] = add_usd(iteration.get("cost_usd", 0.00), cost)
+                self._set_meta_value(cur, "iteration", iteration)
+                total_cost = iteration["cost_usd"]
+        self.log_event(event_type,
+                       self._event_data(task_id, changes, info, total_cost))
+        return True
+
+    def increment_iteration(self) -> int:
+        with self._transaction() as cur:
+            iteration = self._get_meta_value(cur, "iteration")
+            iteration["current"] = iteration.get("current", 0) + 1
+            self._set_meta_value(cur, "iteration", iteration)
+        self.log_event("iteration_incremented",
+                       {"current": iteration["current"]})
+        return iteration["current"]
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _insert_row(cur, task: Dict) -> None:
+        cur.execute("INSERT INTO tasks (id, status, data) VALUES (?, ?, ?)",
+                    (task["id"], task["status"],
+                     json.dumps(task, ensure_ascii=False)))
+        cur.executemany(
+            "INSERT OR IGNORE INTO task_deps (task_id, dep_id) VALUES (?, ?)",
+            [(task["id"], dep) for dep in task.get("dependencies", [])])
+
+    @staticmethod
+    def _get_meta_value(cur, key: str) -> Dict:
+        row = cur.execute("SELECT value FROM meta WHERE key = ?",
+                          (key,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    @staticmethod
+    def _set_meta_value(cur, key: str, value: Dict) -> None:
+        cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False)))
+
+
+def _copy_task(task: Dict) -> Dict:
+    """
+    Kopie eines Index-Eintrags für Aufrufer (inkl. Listen/Dicts wie
+    dependencies, output_ref) - Änderungen laufen nur über transition()
+    """
+    return {key: value.copy() if isinstance(value, (list, dict)) else value
+            for key, value in task.items()}
+
+
+class _SqliteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK als Context Manager"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.lock.acquire()
+        try:
+            self.cursor = self.conn.cursor()
+            self.cursor.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            # z.B. "database is locked" nach busy_timeout: Lock freigeben,
+            # sonst hängen alle anderen Threads beim nächsten Schreiben
+            self.lock.release()
+            raise
+        return self.cursor
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+        return False
+
+
+STORE_BACKENDS = {
+    "json": JsonTaskStore,
+    "sqlite": SqliteTaskStore
+}
+
+
+def create_store(project_path: Path, config: Dict) -> TaskStore:
+    """Erstellt Storage-Backend laut storage.backend"""
+    backend = config.get("storage", {}).get("backend", "json")
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unbekanntes Storage-Backend: {backend}")
+    return STORE_BACKENDS[backend](project_path, config)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Tracing
+Spans für den Lebenszyklus jedes Tasks, Export als Chrome-Trace / OTLP
+
+Pro Ausführung eines Tasks (Versuch) entsteht ein Task-Span mit Phasen:
+
+    queued    bereit (Start bzw. letzte Dependency fertig) -> zugelassen
+    admitted  zugelassen (AIMD, Budget, Zuweisung) -> Agent gestartet
+    spawned   Agent gestartet -> Executor läuft
+    running   Executor (Agent-Prozess)
+    reported  Ergebnis da -> Auswertung (Cache, Retry, AIMD)
+    persisted complete_task / fail_task / schedule_retry
+
+Task-Spans hängen am Span des Runs und verlinken die Spans ihrer
+Dependencies. Am Ende von run_loop schreibt der Tracer laut
+tracing.export nach output/traces/:
+
+- chrome: trace_event JSON (chrome://tracing, https://ui.perfetto.dev),
+          eine Zeile pro Slot, Pfeile von Dependencies
+- otlp:   OTLP-JSON (resourceSpans), z.B. für otel-collector / Jaeger
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+PHASES = ("queued", "admitted", "spawned", "running", "reported",
+          "persisted")
+
+
+class TaskTrace:
+    """Zeitpunkte (ns seit Epoch) einer Task-Ausführung"""
+
+    __slots__ = ("task_id", "title", "task_type", "agent_type", "attempt",
+                 "dependencies", "span_id", "lane", "ready", "admitted",
+                 "spawned", "run_start", "run_end", "reported", "persisted",
+                 "end", "outcome")
+
+    def __init__(self, task: Dict, agent_type: str, attempt: int,
+                 span_id: int, ready: int, now: int):
+        self.task_id = task["id"]
+        self.title = task.get("title", "")
+        self.task_type = task.get("type", "")
+        self.agent_type = agent_type
+        self.attempt = attempt
+        self.dependencies = list(task.get("dependencies", []))
+        self.span_id = span_id
+        self.lane = 0
+        self.ready = ready
+        self.admitted = now
+        self.spawned = None
+        self.run_start = None
+        self.run_end = None
+        self.reported = None
+        self.persisted = None
+        self.end = None
+        self.outcome = None
+
+    @property
+    def phase(self) -> str:
+        """Aktuelle Phase (für get_agent_traces / TUI)"""
+        if self.persisted is not None:
+            return "persisted"
+        if self.reported is not None:
+            return "reported"
+        if self.run_start is not None:
+            return "running" if self.run_end is None else "reported"
+        return "spawned" if self.spawned is not None else "admitted"
+
+    def phases(self) -> List[tuple]:
+        """(Phase, Start, Ende) der bereits begonnenen Phasen"""
+        marks = [self.ready, self.admitted, self.spawned, self.run_start,
+                 self.run_end or self.reported, self.persisted, self.end]
+        spans = []
+        for index, name in enumerate(PHASES):
+            start = marks[index]
+            if start is None:
+                continue
+            end = next((mark for mark in marks[index + 1:] if mark is not None),
+                       None)
+            spans.append((name, start, end))
+        return spans
+
+
+class Tracer:
+    """Sammelt TaskTraces eines Runs (begrenzt auf max_tasks)"""
+
+    def __init__(self, config: Dict = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.export = list(config.get("export", ["chrome"]))
+        self.directory = config.get("dir", "output/traces")
+        self.finished: Deque[TaskTrace] = deque(
+            maxlen=config.get("max_tasks", 50000))
+        self._open: Dict[int, TaskTrace] = {}
+        self._latest_end: Dict[int, tuple] = {}  # task_id -> (end, span_id)
+        self._attempts: Dict[int, int] = {}  # Ausführungen pro Task im Run
+        self._free_lanes: List[int] = []
+        self._lanes = 0
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.trace_id = ""
+        self.run_span_id = 0
+        self.run_start = 0
+        self.run_end = None
+
+    def begin_run(self) -> None:
+        """Neuer Run: neue Trace-ID, Run-Span beginnt jetzt"""
+        self.trace_id = os.urandom(16).hex()
+        self.run_span_id = self._next_id()
+        self.run_start = time.time_ns()
+        self.run_end = None
+        self.finished.clear()
+        self._open.clear()
+        self._attempts.clear()
+
+    # --- Hooks (Orchestrator) ---
+
+    def admit(self, task: Dict, agent_type: str) -> None:
+        """Task zugelassen und zugewiesen: queued endet, admitted beginnt"""
+        if not self.enabled:
+            return
+        now = time.time_ns()
+        with self._lock:
+            ready = self.run_start or now
+            for dep in task.get("dependencies", []):
+                ready = max(ready, self._latest_end.get(dep, (0, 0))[0])
+            ready = max(ready, self._latest_end.get(task["id"], (0, 0))[0])
+            attempt = self._attempts.get(task["id"], 0) + 1
+            self._attempts[task["id"]] = attempt
+            trace = TaskTrace(task, agent_type, attempt, self._next_id(),
+                              min(ready, now), now)
+            trace.lane = (heapq.heappop(self._free_lanes)
+                          if self._free_lanes else self._new_lane())
+            self._open[task["id"]] = trace
+
+    def spawn(self, task_id: int) -> None:
+        trace = self._open.get(task_id)
+        if trace is not None:
+            trace.spawned = time.time_ns()
+
+    def run_started(self, task_id: int) -> None:
+        trace = self._open.get(task_id)
+        if trace is not None and trace.run_start is None:
+            trace.run_start = time.time_ns()
+
+    def run_finished(self, task_id: int) -> None:
+        trace = self._open.get(task_id)
+        if trace is not None and trace.run_end is None:
+            trace.run_end = time.time_ns()
+
+    def report(self, task: Dict, agent_type: str) -> None:
+        """Ergebnis wird ausgewertet (Cache-Treffer: Trace entsteht hier)"""
+        if not self.enabled:
+            return
+        if task["id"] not in self._open:
+            self.admit(task, agent_type)
+        self._open[task["id"]].reported = time.time_ns()
+
+    def persist(self, task_id: int) -> None:
+        trace = self._open.get(task_id)
+        if trace is not None:
+            trace.persisted = time.time_ns()
+
+    def finish(self, task_id: int, outcome: str) -> None:
+        """Ausführung abgeschlossen (done, failed, retry, requeued, ...)"""
+        with self._lock:
+            trace = self._open.pop(task_id, None)
+            if trace is None:
+                return
+            trace.end = time.time_ns()
+            trace.outcome = outcome
+            self.finished.append(trace)
+            self._latest_end[task_id] = (trace.end, trace.span_id)
+            heapq.heappush(self._free_lanes, trace.lane)
+
+    def active(self, task_id: int) -> Optional[TaskTrace]:
+        return self._open.get(task_id)
+
+    # --- Export ---
+
+    def end_run(self, project_path: Path) -> List[Path]:
+        """Run-Span schließen und laut tracing.export schreiben"""
+        if not self.enabled or not self.export:
+            return []
+        self.run_end = time.time_ns()
+        directory = Path(project_path) / self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        paths = []
+        if "chrome" in self.export:
+            paths.append(self._write(directory / f"trace-{stamp}.json",
+                                     self.chrome_trace()))
+        if "otlp" in self.export:
+            paths.append(self._write(directory / f"trace-{stamp}.otlp.json",
+                                     self.otlp_trace()))
+        return paths
+
+    def chrome_trace(self) -> Dict:
+        """
+        trace_event JSON: Slots als Threads (Task ab Zulassung, Phasen
+        darunter), Wartezeit als Async-Slice, Dependencies als Pfeile
+        """
+        events = [{"name": "process_name", "ph": "M", "pid": 1,
+                   "args": {"name": "jarvis-loop"}}]
+        for lane in range(self._lanes):
+            events.append({"name": "thread_name", "ph": "M", "pid": 1,
+                           "tid": lane + 1, "args": {"name": f"slot {lane}"}})
+        traces = list(self.finished)
+        spans = {trace.span_id: trace for trace in traces}
+        flow = 0
+        for trace in traces:
+            tid = trace.lane + 1
+            events.append(_slice(f"#{trace.task_id} {trace.title}"[:80],
+                                 trace.task_type, tid, trace.admitted,
+                                 trace.end, self._attributes(trace)))
+            for name, start, end in trace.phases():
+                if name == "queued":
+                    # überlappt andere Tasks: eigene Async-Zeile
+                    queued = {"name": f"queued #{trace.task_id}",
+                              "cat": "queued", "id": trace.span_id, "pid": 1,
+                              "tid": tid}
+                    events.append(dict(queued, ph="b", ts=_us(start)))
+                    events.append(dict(queued, ph="e", ts=_us(end)))
+                    continue
+                events.append(_slice(name, "phase", tid, start,
+                                     end or trace.end,
+                                     {"task_id": trace.task_id}))
+            for dep_span in self._links(trace):
+                dep = spans.get(dep_span)
+                if dep is None:
+                    continue
+                flow += 1
+                events.append({"name": "dependency", "cat": "dependency",
+                               "ph": "s", "id": flow, "pid": 1,
+                               "tid": dep.lane + 1, "ts": _us(dep.end) - 1})
+                events.append({"name": "dependency", "cat": "dependency",
+                               "ph": "f", "bp": "e", "id": flow, "pid": 1,
+                               "tid": tid, "ts": _us(trace.admitted)})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"trace_id": self.trace_id}}
+
+    def otlp_trace(self) -> Dict:
+        """OTLP-JSON (ExportTraceServiceRequest)"""
+        run_end = self.run_end or time.time_ns()
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": _span_id(self.run_span_id),
+            "name": "run_loop",
+            "kind": 1,
+            "startTimeUnixNano": str(self.run_start),
+            "endTimeUnixNano": str(run_end),
+            "attributes": _otlp_attributes({"tasks": len(self.finished)})
+        }]
+        for trace in list(self.finished):
+            task_span = _span_id(trace.span_id)
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": task_span,
+                "parentSpanId": _span_id(self.run_span_id),
+                "name": f"task #{trace.task_id}",
+                "kind": 1,
+                "startTimeUnixNano": str(trace.ready),
+                "endTimeUnixNano": str(trace.end),
+                "attributes": _otlp_attributes(self._attributes(trace)),
+                "links": [{"traceId": self.trace_id,
+                           "spanId": _span_id(span_id)}
+                          for span_id in self._links(trace)],
+                "status": {"code": 2 if trace.outcome == "failed" else 1}
+            })
+            for index, (name, start, end) in enumerate(trace.phases()):
+                spans.append({
+                    "traceId": self.trace_id,
+                    "spanId": _span_id(trace.span_id, index + 1),
+                    "parentSpanId": task_span,
+                    "name": name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(start),
+                    "endTimeUnixNano": str(end or trace.end)
+                })
+        return {"resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes(
+                {"service.name": "jarvis-loop"})},
+            "scopeSpans": [{"scope": {"name": "jarvis-loop.tracing"},
+                            "spans": spans}]
+        }]}
+
+    # --- Hilfen ---
+
+    def _links(self, trace: TaskTrace) -> List[int]:
+        """Span-IDs der (letzten) Ausführungen der Dependencies"""
+        links = []
+        for dep in trace.dependencies:
+            latest = self._latest_end.get(dep)
+            if latest is not None and latest[0] <= trace.ready:
+                links.append(latest[1])
+        return links
+
+    @staticmethod
+    def _attributes(trace: TaskTrace) -> Dict:
+        return {"task_id": trace.task_id, "task_type": trace.task_type,
+                "agent_type": trace.agent_type, "attempt": trace.attempt,
+                "outcome": trace.outcome,
+                "dependencies": ",".join(map(str, trace.dependencies))}
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def _new_lane(self) -> int:
+        self._lanes += 1
+        return self._lanes - 1
+
+    @staticmethod
+    def _write(path: Path, data: Dict) -> Path:
+        tmp_file = path.with_name(path.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+        return path
+
+
+def _us(ns: int) -> int:
+    return ns // 1000
+
+
+def _slice(name: str, category: str, tid: int, start: int, end: int,
+           args: Dict) -> Dict:
+    """Complete-Event (ph X); Dauer aus gerundeten Grenzen, damit Phasen
+    exakt im Task-Slice liegen"""
+    return {"name": name, "cat": category, "ph": "X", "pid": 1, "tid": tid,
+            "ts": _us(start), "dur": _us(end) - _us(start), "args": args}
+
+
+def _span_id(span: int, phase: int = 0) -> str:
+    """16 Hex-Zeichen: Task-Span-Nummer + Phasen-Index"""
+    return f"{span:012x}{phase:04x}"
+
+
+def _otlp_attributes(values: Dict) -> List[Dict]:
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+def create_tracer(config: Dict) -> Tracer:
+    """Tracer laut tracing-Sektion der Config"""
+    return Tracer(config.get("tracing", {}))
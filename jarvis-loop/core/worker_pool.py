@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Worker Pool
+Verteilte Agent-Ausführung über eine Socket-Work-Queue
+
+Protokoll: jede Nachricht = 4 Byte Länge (big endian) + JSON (UTF-8).
+Adressen: "tcp://host:port", "host:port" oder "unix:///pfad/zum/socket".
+
+Worker -> Coordinator:
+  hello     {worker_id, capacity, token}
+  pull      {max}                     - bis zu max Tasks anfordern
+  heartbeat {task_ids}                - lebt noch, arbeitet an task_ids
+  output    {task_id, stream, line}   - Live-Ausgabe eines Agents
+  result    {result}                  - Result-Dict wie AgentExecutor.run
+Coordinator -> Worker:
+  welcome   {}
+  tasks     {tasks: [{task, agent_type, prompt}]}  - Antwort auf pull
+  cancel    {task_id}
+  shutdown  {}
+
+Der Coordinator ist CoordinatorOrchestrator (coordinator.py), der Worker
+WorkerClient (hier) - gestartet über `jarvis-loop worker --connect ...`.
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from executors import AgentExecutor
+
+HEADER = struct.Struct("!I")
+DEFAULT_MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Ungültige oder zu große Nachricht"""
+
+
+def send_message(sock: socket.socket, message: Dict) -> None:
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket,
+                 max_bytes: int = DEFAULT_MAX_MESSAGE_BYTES) -> Optional[Dict]:
+    """Nächste Nachricht, None wenn die Gegenseite die Verbindung schließt"""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > max_bytes:
+        raise ProtocolError(f"Nachricht zu groß: {length} Bytes")
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        return None
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError(f"Ungültiges JSON: {e}")
+    if not isinstance(message, dict) or "type" not in message:
+        raise ProtocolError("Nachricht ohne 'type'")
+    return message
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """Adresse -> (Socket-Familie, bind/connect-Adresse)"""
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Ungültige Worker-Adresse: {address}")
+    return socket.AF_INET, (host, int(port))
+
+
+def format_address(family: int, address) -> str:
+    if family == socket.AF_UNIX:
+        return f"unix://{address}"
+    return f"tcp://{address[0]}:{address[1]}"
+
+
+def is_local_address(address: str) -> bool:
+    """Unix-Socket oder TCP nur auf Loopback (nicht aus dem Netz erreichbar)"""
+    family, bind_address = parse_address(address)
+    if family == socket.AF_UNIX:
+        return True
+    host = bind_address[0]
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except OSError:
+        return False
+    return bool(infos) and all(
+        ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+
+
+def check_listen_address(address: str, token: Optional[str]) -> None:
+    """
+    Ohne workers.token nur lokal lauschen - sonst kann jeder im Netz Tasks
+    abholen und Ergebnisse melden (ValueError)
+    """
+    if not token and not is_local_address(address):
+        raise ValueError(f"Coordinator auf {address} braucht workers.token "
+                         f"(ohne Token nur 127.0.0.1/localhost oder unix://)")
+
+
+def open_listener(address: str) -> socket.socket:
+    """Server-Socket (Port 0 = freier Port, siehe getsockname)"""
+    family, bind_address = parse_address(address)
+    if family == socket.AF_UNIX and os.path.exists(bind_address):
+        os.unlink(bind_address)  # Socket-Datei eines alten Laufs
+    server = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(bind_address)
+    server.listen()
+    return server
+
+
+def connect(address: str, timeout: float = 10) -> socket.socket:
+    family, connect_address = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(connect_address)
+    sock.settimeout(None)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class WorkerClient:
+    """
+    Worker-Prozess: holt Tasks beim Coordinator (bis zur eigenen
+    concurrency), führt sie mit dem lokalen Executor aus und meldet
+    Ergebnisse + Heartbeats zurück.
+    """
+
+    def __init__(self, address: str, executor: AgentExecutor,
+                 concurrency: int = 2, worker_id: str = None,
+                 config: Dict = None, log: Callable[[str], None] = print):
+        config = config or {}
+        self.address = address
+        self.executor = executor
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.token = config.get("token")
+        self.heartbeat_sec = config.get("heartbeat_sec", 5)
+        self.poll_interval_sec = config.get("poll_interval_sec", 0.5)
+        self.max_message_bytes = int(config.get("max_message_mb", 16)
+                                     * 1024 * 1024)
+        self.log = log
+        self.completed = 0
+
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._running: Dict[int, threading.Event] = {}  # task_id -> cancel
+        self._assignments: List[Dict] = []  # empfangen, noch nicht gestartet
+        self._awaiting_tasks = False
+        self._next_pull = 0.0
+        self._wake = threading.Event()
+        self._shutdown = threading.Event()
+        self._lost = threading.Event()
+
+    def run(self) -> int:
+        """Arbeitet bis der Coordinator 'shutdown' sendet oder wegfällt"""
+        self._sock = connect(self.address)
+        self._send({"type": "hello", "worker_id": self.worker_id,
+                    "capacity": self.concurrency, "token": self.token})
+        reader = threading.Thread(target=self._read_loop, name="worker-reader",
+                                  daemon=True)
+        reader.start()
+        self.log(f"🔌 Worker {self.worker_id} verbunden mit {self.address} "
+                 f"({self.concurrency} parallel)")
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        last_heartbeat = time.monotonic()
+        try:
+            while not self._shutdown.is_set() and not self._lost.is_set():
+                now = time.monotonic()
+                self._request_work(now)
+                if now - last_heartbeat >= self.heartbeat_sec:
+                    last_heartbeat = now
+                    self._send({"type": "heartbeat",
+                                "task_ids": list(self._running)})
+                self._drain_assignments(pool)
+                self._wake.wait(timeout=min(self.poll_interval_sec,
+                                            self.heartbeat_sec))
+                self._wake.clear()
+
+            if self._lost.is_set():
+                self.log("💔 Verbindung zum Coordinator verloren - "
+                         "breche laufende Tasks ab")
+                for cancel in list(self._running.values()):
+                    cancel.set()
+        finally:
+            pool.shutdown(wait=True)
+            self._close()
+        self.log(f"👋 Worker {self.worker_id}: {self.completed} Tasks erledigt")
+        return self.completed
+
+    def _request_work(self, now: float) -> None:
+        with self._state_lock:
+            free = self.concurrency - len(self._running) - len(self._assignments)
+            if free <= 0 or self._awaiting_tasks or now < self._next_pull:
+                return
+            self._awaiting_tasks = True
+        self._send({"type": "pull", "max": free})
+
+    def _drain_assignments(self, pool: ThreadPoolExecutor) -> None:
+        """Startet vom Reader-Thread empfangene Tasks im Pool"""
+        with self._state_lock:
+            assignments, self._assignments = self._assignments, []
+            started = []
+            for item in assignments:
+                cancel = threading.Event()
+                self._running[item["task"]["id"]] = cancel
+                started.append((item, cancel))
+        for item, cancel in started:
+            task = item["task"]
+            pool.submit(self._execute, task, item["agent_type"],
+                        item["prompt"], cancel)
+
+    def _execute(self, task: Dict, agent_type: str, prompt: str,
+                 cancel: threading.Event) -> None:
+        task_id = task["id"]
+
+        def on_output(stream: str, line: str) -> None:
+            self._send({"type": "output", "task_id": task_id,
+                        "stream": stream, "line": line})
+
+        try:
+            result = self.executor.run(task, agent_type, prompt,
+                                       on_output=on_output, cancel=cancel)
+        except Exception as e:
+            result = self.executor._result(task, agent_type, False,
+                                           error=f"Worker-Fehler: {e}")
+        result["worker"] = self.worker_id
+        with self._state_lock:
+            self._running.pop(task_id, None)
+        if not self._lost.is_set():
+            self._send({"type": "result", "result": result})
+            self.completed += 1
+        self._wake.set()
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                message = recv_message(self._sock, self.max_message_bytes)
+                if message is None:
+                    break
+                self._handle(message)
+                if self._shutdown.is_set():
+                    return
+        except (OSError, ProtocolError) as e:
+            self.log(f"⚠️  Worker: {e}")
+        if not self._shutdown.is_set():
+            self._lost.set()
+        self._wake.set()
+
+    def _handle(self, message: Dict) -> None:
+        kind = message["type"]
+        if kind == "tasks":
+            with self._state_lock:
+                self._awaiting_tasks = False
+                tasks = message.get("tasks", [])
+                if tasks:
+                    self._assignments.extend(tasks)
+                else:
+                    self._next_pull = (time.monotonic()
+                                       + self.poll_interval_sec)
+        elif kind == "cancel":
+            cancel = self._running.get(message.get("task_id"))
+            if cancel is not None:
+                cancel.set()
+        elif kind == "shutdown":
+            self._shutdown.set()
+        elif kind == "error":
+            self.log(f"❌ Coordinator: {message.get('message')}")
+            self._lost.set()
+        self._wake.set()
+
+    def _send(self, message: Dict) -> None:
+        try:
+            with self._send_lock:
+                send_message(self._sock, message)
+        except OSError:
+            self._lost.set()
+            self._wake.set()
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+class WorkerConnection:
+    """Coordinator-Seite einer Worker-Verbindung"""
+
+    def __init__(self, sock: socket.socket, peer: str):
+        self.sock = sock
+        self.peer = peer
+        self.worker_id = peer
+        self.capacity = 1
+        self.registered = False
+        self.task_ids: Set[int] = set()
+        self.last_seen = time.monotonic()
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Dict) -> bool:
+        try:
+            with self._send_lock:
+                send_message(self.sock, message)
+            return True
+        except OSError:
+            return False
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
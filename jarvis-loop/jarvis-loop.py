@@ -7,13 +7,24 @@ Usage:
   jarvis-loop setup              # Projekt initialisieren
   jarvis-loop pdr create         # PDR erstellen (interaktiv)
   jarvis-loop start              # Loop starten
+  jarvis-loop start --metrics-port 9464  # + Prometheus /metrics
+  jarvis-loop start --profile    # + cProfile/tracemalloc (profile/)
   jarvis-loop status             # Status anzeigen
+  jarvis-loop status --profile   # Status + Profil
+  jarvis-loop status --task ID   # Output eines Tasks anzeigen
+  jarvis-loop history [--task ID] [--type T] [--since 2h] [--until ISO]
+  jarvis-loop report [--format json] [--since 1d]  # Laufzeit/Durchsatz/Kosten
   jarvis-loop resume             # Fortsetzen nach Absturz
+  jarvis-loop export [--file F]  # Tasks als tasks.json exportieren
+  jarvis-loop import [--file F]  # tasks.json ins Storage-Backend importieren
+  jarvis-loop start --engine coordinator [--listen tcp://0.0.0.0:7420]
+  jarvis-loop worker --connect tcp://host:7420 [--concurrency N]
 """
 
 import sys
 import os
 import json
+import signal
 import argparse
 from pathlib import Path
 
@@ -23,7 +34,14 @@ sys.path.insert(0, str(Path(__file__).parent / "pdr"))
 sys.path.insert(0, str(Path(__file__).parent / "ui"))
 
 from task_manager import TaskManager
-from agent_orchestrator import AgentOrchestrator, SafeguardMonitor
+from agent_orchestrator import (AgentOrchestrator, SafeguardMonitor,
+                                create_orchestrator)
+from executors import create_executor
+from worker_pool import WorkerClient
+from metrics import start_metrics_server
+from profiling import create_profiler
+from session_index import format_event, parse_time
+from analytics import analyze_session, format_report
 from pdr_generator import PDRGenerator
 from jarvis_tui import JarvisTUI
 
@@ -105,52 +123,98 @@ class JarvisLoop:
             json.dump(result, f, indent=2, ensure_ascii=False)
         
         # Tasks in Task Manager übernehmen
+        # PDR-IDs auf Task-IDs abbilden (Projekt kann schon Tasks haben)
         self.tm = TaskManager(self.project_path)
+        id_map = {}
         for task_data in result['tasks']:
-            self.tm.add_task(
+            id_map[task_data['id']] = self.tm.add_task(
                 title=task_data['title'],
                 task_type=task_data.get('type', 'coding'),
-                dependencies=task_data.get('dependencies', []),
+                dependencies=[id_map[dep] for dep in
+                              task_data.get('dependencies', [])],
                 estimated_cost=0.50
             )
+        self.tm.flush()
         
         print(f"\n💾 PDR gespeichert: {pdr_file}")
         print(f"   {len(result['tasks'])} Tasks erstellt")
         print(f"\nNächster Schritt: jarvis-loop start")
     
-    def start(self) -> None:
+    def start(self, engine: str = None, listen: str = None,
+              metrics_port: int = None, profile: bool = False) -> None:
         """
         Startet den Loop mit TUI
         Wie im Video [09:24] - Taste 'S'
+        engine: "thread" | "async" | "coordinator" (default: agents.engine)
+        listen: Adresse für Worker (nur coordinator)
+        metrics_port: Prometheus-Endpoint (/metrics) auf diesem Port
+        profile: cProfile + tracemalloc, Zusammenfassung beim Beenden
         """
-        if not self.tasks_file.exists():
+        if not self._open_project():
             print("❌ Kein tasks.json gefunden!")
             print("   Führe zuerst aus: jarvis-loop pdr create")
             return
         
-        self.tm = TaskManager(self.project_path)
-        
         print("🎬 Starte JARVIS Loop...")
         print("   Taste 'S' zum Starten")
         print("   Taste 'Q' zum Beenden")
         print()
         
-        # TUI starten
+        # TUI starten (S startet den Dispatch-Loop)
         tui = JarvisTUI(self.project_path)
+        try:
+            self.orchestrator = create_orchestrator(
+                str(self.project_path), self.tm.config, engine, listen)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        server = None
+        if metrics_port is not None:
+            self.orchestrator.metrics, server = start_metrics_server(
+                metrics_port, self.tm.config)
+            host, port = server.address[:2]
+            print(f"📈 Metrics: http://{host}:{port}/metrics")
+        profiler = None
+        if profile:
+            profiler = create_profiler(self.project_path, self.tm.config)
+            self.orchestrator.profiler = profiler
+            profiler.attach("main")  # TUI + Eingabe
         
         try:
-            tui.run(self.tm)
+            tui.run(self.tm, self.orchestrator)
         except KeyboardInterrupt:
             print("\n\n👋 Loop beendet.")
             print("   Um fortzufahren: jarvis-loop resume")
+        finally:
+            if server is not None:
+                server.stop()
+            if profiler is not None:
+                profiler.close()
+    
+    def status(self, task_id: int = None, profile: bool = False) -> None:
+        """
+        Zeigt aktuellen Status (mit task_id: Output dieses Tasks),
+        mit profile inkl. Laden des Projekts profiliert
+        """
+        if not profile:
+            self._status(task_id)
+            return
+        profiler = create_profiler(self.project_path, self._load_config())
+        profiler.attach("status")
+        try:
+            self._status(task_id)
+        finally:
+            profiler.close()
     
-    def status(self) -> None:
-        """Zeigt aktuellen Status"""
-        if not self.tasks_file.exists():
+    def _status(self, task_id: int = None) -> None:
+        if not self._open_project():
             print("❌ Kein Projekt gefunden!")
             return
         
-        self.tm = TaskManager(self.project_path)
+        if task_id is not None:
+            self._show_output(task_id)
+            return
+        
         status = self.tm.get_status()
         
         print("📊 JARVIS Loop Status")
@@ -164,32 +228,154 @@ class JarvisLoop:
               f"{status['tasks']['in_progress']} in progress, "
               f"{status['tasks']['pending']} pending, "
               f"{status['tasks']['failed']} failed")
+        
+        # Fehlermeldungen: nur der Anfang wird aus dem Blob Store gelesen
+        failed = [task for task in self.tm.get_tasks()
+                  if task['status'] == 'failed']
+        for task in failed[-5:]:
+            error = self.tm.get_output(task['id'], max_bytes=200) or ""
+            first_line = error.strip().splitlines()[0] if error.strip() else "-"
+            print(f"  ❌ #{task['id']} {task['title'][:30]}: {first_line[:80]}")
+    
+    def _show_output(self, task_id: int) -> None:
+        task = self.tm.get_task(task_id)
+        if task is None:
+            print(f"❌ Task #{task_id} nicht gefunden")
+            return
+        print(f"📄 Task #{task_id}: {task['title']} ({task['status']})")
+        print("=" * 50)
+        output = self.tm.get_output(task_id)
+        print(output if output is not None else "(kein Output)")
+    
+    def history(self, task_id: int = None, types: list = None,
+                since: str = None, until: str = None,
+                limit: int = None) -> None:
+        """Events aus session.jsonl über den Offset-Index (kein Full Scan)"""
+        if not self._open_project():
+            print("❌ Kein Projekt gefunden!")
+            return
+        
+        # Ohne Filter nur die letzten Events
+        if limit is None and task_id is None and not types and not since:
+            limit = 50
+        events = self.tm.query_history(task_id, types, parse_time(since),
+                                       parse_time(until), limit, newest=True)
+        title = f"Task #{task_id}" if task_id is not None else "Session"
+        print(f"📜 History {title} ({len(events)} Events)")
+        print("=" * 50)
+        for event in events:
+            print(format_event(event))
+    
+    def report(self, output_format: str = "text", since: str = None,
+               until: str = None) -> None:
+        """Run-Analyse aus dem Session-Log (ein Durchlauf, auch Archive)"""
+        if not self._open_project():
+            print("❌ Kein Projekt gefunden!")
+            return
+        
+        self.tm.store.flush_log()
+        report = analyze_session(self.tm.store.session_file,
+                                 parse_time(since), parse_time(until))
+        if output_format == "json":
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print(format_report(report))
     
     def resume(self) -> None:
         """Setzt nach Absturz fort (Session Persistence)"""
         print("🔄 Setze Session fort...")
         
-        if not self.tasks_file.exists():
+        # Lade letzten Snapshot + spiele Journal-Tail nach
+        if not self._open_project():
             print("❌ Keine Session gefunden!")
             return
         
-        # Lade letzten State
-        self.tm = TaskManager(self.project_path)
+        print(f"   {self.tm.replayed_events} Events aus session.jsonl nachgespielt")
+        
+        # Verwaiste in_progress Tasks (abgelaufene Leases) freigeben
+        reaped = self.tm.reap_expired_leases()
+        if reaped["requeued"] or reaped["failed"]:
+            print(f"   {len(reaped['requeued'])} verwaiste Tasks wieder pending, "
+                  f"{len(reaped['failed'])} nach max. Versuchen failed")
+        self.tm.flush()
         
         # Zeige was passiert ist
         self.status()
         
         print("\n✅ Session wiederhergestellt!")
         print("   Starte mit: jarvis-loop start")
+    
+    def export_tasks(self, path: str = None) -> None:
+        """Exportiert Tasks als tasks.json (z.B. aus SQLite Backend)"""
+        if not self._open_project():
+            print("❌ Kein Projekt gefunden!")
+            return
+        
+        target = self.tm.export_json(path)
+        print(f"💾 Exportiert: {target}")
+    
+    def import_tasks(self, path: str = None) -> None:
+        """Importiert tasks.json in das konfigurierte Storage-Backend"""
+        self._open_project()
+        source = Path(path) if path else self.tasks_file
+        if not source.exists():
+            print(f"❌ Datei nicht gefunden: {source}")
+            return
+        
+        count = self.tm.import_json(source)
+        backend = self.tm.config["storage"]["backend"]
+        print(f"📥 {count} Tasks importiert (Backend: {backend})")
+    
+    def worker(self, address: str = None, concurrency: int = None,
+               worker_id: str = None) -> None:
+        """
+        Worker für den Coordinator: holt Tasks, führt sie mit dem lokalen
+        Executor aus (Projekt-Pfad = Arbeitsverzeichnis der Agents)
+        """
+        config = self._load_config()
+        workers_config = config.get("workers", {})
+        address = address or workers_config.get("listen", "tcp://127.0.0.1:7420")
+        concurrency = concurrency or config["agents"]["parallel_max"]
+        executor = create_executor(config, str(self.project_path))
+        
+        client = WorkerClient(address, executor, concurrency, worker_id,
+                              workers_config)
+        try:
+            client.run()
+        except ConnectionError as e:
+            print(f"❌ Coordinator nicht erreichbar ({address}): {e}")
+        except KeyboardInterrupt:
+            print("\n👋 Worker beendet.")
+    
+    @staticmethod
+    def _load_config() -> dict:
+        """Default-Config ohne Projekt (für Worker)"""
+        config_path = Path(__file__).parent / "config" / "default_config.json"
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _open_project(self) -> bool:
+        """Öffnet TaskManager, True wenn ein Projekt existiert"""
+        if self.tm is None:
+            self.tm = TaskManager(self.project_path)
+        return self.tm.has_project()
+
+
+def _terminate(signum, frame):
+    """SIGTERM wie Ctrl+C beenden: atexit schreibt Snapshot + Session-Log"""
+    sys.exit(128 + signum)
 
 
 def main():
+    signal.signal(signal.SIGTERM, _terminate)
     parser = argparse.ArgumentParser(
         description="JARVIS Loop - Autonomous Development Framework"
     )
     parser.add_argument(
         "command",
-        choices=["setup", "pdr", "start", "status", "resume", "help"],
+        choices=["setup", "pdr", "start", "status", "resume",
+                 "export", "import", "worker", "history", "report",
+                 "help"],
         help="Auszuführender Befehl"
     )
     parser.add_argument(
@@ -202,6 +388,74 @@ def main():
         choices=["create"],
         help="PDR Aktion (nur mit 'pdr' command)"
     )
+    parser.add_argument(
+        "--engine",
+        choices=["thread", "async", "coordinator"],
+        help="Orchestrator-Engine für 'start' (default: agents.engine)"
+    )
+    parser.add_argument(
+        "--listen",
+        help="Adresse des Coordinators, z.B. tcp://0.0.0.0:7420 oder "
+             "unix:///tmp/jarvis.sock (default: workers.listen)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="'start': Prometheus-Metriken unter http://<host>:<port>/metrics "
+             "(host: metrics.host)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="'start'/'status': cProfile + tracemalloc nach <projekt>/profile/, "
+             "Top-N beim Beenden (siehe profiling in der Config)"
+    )
+    parser.add_argument(
+        "--connect",
+        help="Coordinator-Adresse für 'worker' (default: workers.listen)"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        help="Parallele Tasks pro Worker (default: agents.parallel_max)"
+    )
+    parser.add_argument(
+        "--worker-id",
+        help="Name des Workers (default: host:pid)"
+    )
+    parser.add_argument(
+        "--task", "-t",
+        type=int,
+        help="Task-ID für 'status' (Output) bzw. 'history' (Events)"
+    )
+    parser.add_argument(
+        "--type",
+        action="append",
+        help="Event-Typ für 'history', mehrfach möglich (z.B. task_failed)"
+    )
+    parser.add_argument(
+        "--since",
+        help="'history'/'report' ab Zeitpunkt: ISO oder relativ (15m, 2h, 1d)"
+    )
+    parser.add_argument(
+        "--until",
+        help="'history'/'report' bis Zeitpunkt: ISO oder relativ"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Ausgabeformat für 'report'"
+    )
+    parser.add_argument(
+        "--limit", "-n",
+        type=int,
+        help="'history': höchstens N (neueste) Events (default ohne Filter: 50)"
+    )
+    parser.add_argument(
+        "--file", "-f",
+        help="Datei für export/import (default: <projekt>/tasks.json)"
+    )
     
     args = parser.parse_args()
     
@@ -218,11 +472,21 @@ def main():
         if args.pdr_action == "create":
             loop.create_pdr()
     elif args.command == "start":
-        loop.start()
+        loop.start(args.engine, args.listen, args.metrics_port, args.profile)
     elif args.command == "status":
-        loop.status()
+        loop.status(args.task, args.profile)
+    elif args.command == "history":
+        loop.history(args.task, args.type, args.since, args.until, args.limit)
+    elif args.command == "report":
+        loop.report(args.format, args.since, args.until)
     elif args.command == "resume":
         loop.resume()
+    elif args.command == "export":
+        loop.export_tasks(args.file)
+    elif args.command == "import":
+        loop.import_tasks(args.file)
+    elif args.command == "worker":
+        loop.worker(args.connect, args.concurrency, args.worker_id)
     elif args.command == "help":
         print(__doc__)
 
@@ -0,0 +1,74 @@
+"""
+JARVIS Loop - Test-Fixtures
+core/ auf dem Pfad, TaskManager mit Config-Overrides, Stub-Agent
+
+    cd jarvis-loop && python -m pytest -q
+"""
+
+import copy
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "core"))
+
+from task_manager import TaskManager
+
+# Schnelle Läufe ohne Limits (Cache, Retries, Traces sind ohnehin aus)
+BASE_OVERRIDES = {
+    "safeguards": {"max_iterations": 1000, "max_total_cost_usd": 100.0},
+    "executor": {"simulated_duration_sec": 0.05}
+}
+
+
+def merge(target: Dict, overrides: Dict) -> Dict:
+    """Verschachtelte Overrides in eine Config übernehmen"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+class ConfigTaskManager(TaskManager):
+    """TaskManager mit Config-Overrides (wie bench/run_bench.py)"""
+
+    def __init__(self, project_path: str, overrides: Dict):
+        self._overrides = overrides
+        super().__init__(project_path)
+
+    def _load_config(self) -> Dict:
+        return merge(super()._load_config(), self._overrides)
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """make_manager(name, overrides) -> TaskManager mit angelegtem Projekt"""
+    managers = []
+
+    def make(name: str = "project", overrides: Dict = None,
+             create: bool = True) -> TaskManager:
+        config = merge(copy.deepcopy(BASE_OVERRIDES), overrides or {})
+        manager = ConfigTaskManager(str(tmp_path / name), config)
+        if create:
+            manager.create_project(name, "Test")
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def core_dir() -> Path:
+    return ROOT / "core"
+
+
+@pytest.fixture
+def stub_agent() -> Path:
+    return ROOT / "tools" / "stub_agent.py"
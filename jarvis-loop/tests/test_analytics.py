@@ -0,0 +1,105 @@
+"""
+Run-Analytics: Perzentile aus dem Log-Histogramm, Wartezeit ab
+Dependency-Ende, Fehler-/Retry-Raten, Kosten, Parallelität pro Minute,
+gestreamtes Lesen über Archive
+"""
+
+import gzip
+import json
+
+import pytest
+
+from analytics import LogHistogram, analyze_session, format_report
+from event_writer import archive_path
+
+
+def event(clock, event_type, task_id, **data):
+    return {"timestamp": f"2026-10-18T10:{clock}", "type": event_type,
+            "data": dict(data, id=task_id)}
+
+
+EVENTS = [
+    event("00:00", "task_added", 1, task={"dependencies": []}),
+    event("00:00", "task_added", 2, task={"dependencies": [1]}),
+    event("00:10", "task_assigned", 1, agent="coding-agent"),
+    event("00:40", "task_completed", 1, agent="coding-agent", cost=0.10),
+    event("00:50", "task_assigned", 2, agent="coding-agent"),
+    event("01:00", "task_retry_scheduled", 2),
+    event("01:05", "task_assigned", 2, agent="coding-agent"),
+    event("01:10", "task_hedged", 2),
+    event("01:20", "extra_cost", 2, cost=0.05),
+    event("01:20", "task_failed", 2),
+    event("01:20", "task_requeued", 3, reason="lease_expired: worker weg"),
+]
+
+
+def write(path, events):
+    path.write_bytes(b"".join(json.dumps(item).encode() + b"\n"
+                              for item in events))
+
+
+def test_histogram_percentiles():
+    histogram = LogHistogram()
+    assert histogram.summary() == {"count": 0}
+    for value in range(1, 1001):
+        histogram.add(value / 10)
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["min"] == 0.1 and summary["max"] == 100.0
+    assert summary["p50"] == pytest.approx(50, rel=0.02)
+    assert summary["p99"] == pytest.approx(99, rel=0.02)
+
+
+def test_report_from_session(tmp_path):
+    path = tmp_path / "session.jsonl"
+    write(path, EVENTS)
+    report = analyze_session(path)
+
+    assert report["events"] == len(EVENTS)
+    assert report["span_sec"] == 80.0
+    tasks = report["tasks"]
+    assert (tasks["completed"], tasks["failed"]) == (1, 1)
+    assert tasks["failure_rate"] == 0.5 and tasks["retry_rate"] == 0.5
+    assert tasks["requeues"] == {"lease_expired": 1}
+    assert tasks["hedges"] == 1
+    # #2 ist erst bereit, wenn #1 fertig ist: je 10s Wartezeit
+    assert report["queue_wait_sec"]["count"] == 2
+    assert report["queue_wait_sec"]["max"] == pytest.approx(10)
+    assert report["cost"] == {"total_usd": 0.15, "extra_usd": 0.05,
+                              "per_task_usd": 0.15}
+
+    agent = report["agents"]["coding-agent"]
+    assert (agent["completed"], agent["failed"], agent["retries"]) == (1, 1, 1)
+    assert agent["duration_sec"]["p50"] == pytest.approx(30, rel=0.02)
+    # belegt: 30s + 10s in Minute 0, 15s von 20s beobachteten in Minute 1
+    timeline = [entry["parallelism"] for entry in report["timeline"]]
+    assert timeline == [0.67, 0.75]
+    throughput = report["throughput"]
+    assert throughput["avg_parallelism"] == pytest.approx(55 / 80, abs=0.01)
+    assert "coding-agent" in format_report(report)
+
+
+def test_streams_archives_and_skips_noise(tmp_path):
+    path = tmp_path / "session.jsonl"
+    with gzip.open(archive_path(path, 0).with_suffix(".jsonl.gz"), "wb") as f:
+        f.write(b"".join(json.dumps(item).encode() + b"\n"
+                         for item in EVENTS[:4]))
+    write(path, [event("00:20", "lease_renewed", 1)] + EVENTS[4:])
+    with open(path, "ab") as f:
+        f.write(b'{"timestamp": "2026-10-18T10:02')  # abgerissen
+
+    report = analyze_session(path)
+    assert report["events"] == len(EVENTS)
+    assert report["tasks"]["completed"] == 1
+
+    window = analyze_session(path, since="2026-10-18T10:00:45",
+                             until="2026-10-18T10:01:05")
+    assert window["events"] == 3
+    assert window["tasks"]["retries"] == 1
+
+
+def test_empty_session(tmp_path):
+    report = analyze_session(tmp_path / "session.jsonl")
+    assert report["events"] == 0 and report["start"] is None
+    assert report["throughput"]["tasks_per_minute"] == 0.0
+    assert "Tasks: 0 done" in format_report(report)
@@ -0,0 +1,81 @@
+"""
+Async-Engine: gleiche Parallelität wie die Thread-Engine
+(agents.parallel_max), Limits pro Agent-Typ, Hedges belegen Slots
+"""
+
+import asyncio
+
+from agent_orchestrator import create_orchestrator
+from executors import AgentExecutor
+from hedging import Hedger
+
+
+class CountingExecutor(AgentExecutor):
+    """Zählt gleichzeitige Sessions; Dauer pro Task-ID und Aufruf"""
+
+    name = "counting"
+
+    def __init__(self, durations=None, default_sec: float = 0.05):
+        self.durations = durations or {}  # task_id -> [Dauer je Aufruf]
+        self.default_sec = default_sec
+        self.running = 0
+        self.peak = 0
+        self.calls = {}
+
+    async def run_async(self, task, agent_type, prompt, on_output=None):
+        call = self.calls.get(task["id"], 0)
+        self.calls[task["id"]] = call + 1
+        durations = self.durations.get(task["id"], [])
+        duration = durations[call] if call < len(durations) else self.default_sec
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.running -= 1
+        return self._result(task, agent_type, True, output="ok", cost=0.01,
+                            exit_code=0)
+
+
+def run_async_engine(tm, executor, hedger=None):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config, "async")
+    orchestrator.executor = executor
+    orchestrator.hedger = hedger
+    orchestrator.log_handler = lambda message: None
+    return orchestrator, orchestrator.run_loop(tm)
+
+
+def test_default_limit_is_parallel_max(make_manager):
+    tm = make_manager(overrides={"agents": {"parallel_max": 2}})
+    for index in range(6):
+        tm.add_task(f"Task {index}")
+    executor = CountingExecutor()
+    _, results = run_async_engine(tm, executor)
+    assert len(results["completed"]) == 6
+    assert executor.peak == 2
+
+
+def test_per_agent_type_limit(make_manager):
+    tm = make_manager(overrides={"async": {"per_agent_type": {"default": 1}}})
+    for index in range(4):
+        tm.add_task(f"Task {index}")
+    executor = CountingExecutor()
+    run_async_engine(tm, executor)
+    assert executor.peak == 1
+
+
+def test_hedges_take_a_slot(make_manager):
+    tm = make_manager(overrides={"agents": {"parallel_max": 6},
+                                 "async": {"per_agent_type": {"default": 3}}})
+    for index in range(3):
+        tm.add_task(f"Task {index}")
+    hedger = Hedger({"enabled": True, "min_samples": 1})
+    hedger.latency.observe("coding-agent", 0.01)
+    # Tasks 1 und 2 hängen beim ersten Lauf, ihre Duplikate sind schnell;
+    # für das zweite Duplikat ist erst nach dem ersten ein Slot frei
+    executor = CountingExecutor({1: [1.5, 0.05], 2: [1.5, 0.05]})
+    _, results = run_async_engine(tm, executor, hedger)
+
+    assert executor.peak == 3
+    assert len(results["completed"]) == 3
+    assert hedger.won >= 1
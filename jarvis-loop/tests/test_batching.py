@@ -0,0 +1,191 @@
+"""
+Batching: Aufteilen der Batch-Ausgabe pro Task, Kostenverteilung,
+Fallback auf Einzel-Läufe bei unvollständiger Ausgabe, eine Iteration pro
+Session; opt-in über batching.enabled
+"""
+
+import sys
+import threading
+
+import pytest
+
+from agent_orchestrator import create_orchestrator
+from batching import TaskBatcher
+from executors import AgentExecutor
+
+ENGINES = ("thread", "async")
+BATCHING = {"batching": {"enabled": True}}
+
+
+def members(*costs):
+    return [{"id": index + 1, "type": "config", "estimated_cost": cost}
+            for index, cost in enumerate(costs)]
+
+
+def section(task_id, status="ok", text="erledigt"):
+    return f"=== JARVIS TASK #{task_id} ===\n{text}\nJARVIS_TASK_STATUS={status}\n"
+
+
+class ScriptedExecutor(AgentExecutor):
+    """Antwortet auf Batch-Prompts laut batch_output, Einzel-Tasks mit Erfolg"""
+
+    name = "scripted"
+
+    def __init__(self, batch_output, cost_usd: float = 0.10):
+        self.batch_output = batch_output
+        self.cost_usd = cost_usd
+        self.sessions = []  # Task-IDs pro Session
+        self._lock = threading.Lock()
+
+    def run(self, task, agent_type, prompt, on_output=None, cancel=None):
+        ids = [member["id"] for member in task.get("batch", [task])]
+        with self._lock:
+            self.sessions.append(ids)
+        output = (self.batch_output(ids) if "batch" in task
+                  else f"Task {task['id']} fertig")
+        return self._result(task, agent_type, True, output=output,
+                            cost=self.cost_usd, exit_code=0)
+
+
+def completed_ids(results):
+    return sorted(result["task_id"] for result in results["completed"])
+
+
+def run_config_tasks(tm, engine, executor, count=3):
+    for index in range(count):
+        tm.add_task(f"Config {index}", "config", estimated_cost=0.05)
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config, engine)
+    orchestrator.executor = executor
+    logs = []
+    orchestrator.log_handler = logs.append
+    results = orchestrator.run_loop(tm)
+    return orchestrator, results, logs
+
+
+# --- TaskBatcher ---
+
+def test_group_respects_type_limits_and_minimum():
+    batcher = TaskBatcher({"enabled": True, "max_tasks": 2,
+                           "task_types": ["config"]})
+    ready = members(0.1, 0.1, 0.1) + [{"id": 9, "type": "coding"}]
+    grouped = batcher.group(ready)
+    assert [[task["id"] for task in item["batch"]] if "batch" in item
+            else item["id"] for item in grouped] == [[1, 2], 3, 9]
+
+
+def test_batching_is_opt_in():
+    grouped = TaskBatcher().group(members(0.1, 0.1))
+    assert ["batch" in item for item in grouped] == [False, False]
+
+
+def test_split_assigns_sections_and_shares_cost():
+    batch = {"id": 1, "batch": members(0.1, 0.3)}
+    result = {"success": True, "output": section(1) + section(2),
+              "cost_usd": 0.4, "agent_type": "coding-agent", "exit_code": 0}
+    split = TaskBatcher().split(batch, result)
+    assert [split[task_id]["success"] for task_id in (1, 2)] == [True, True]
+    assert split[1]["output"].startswith("erledigt")
+    assert split[1]["cost_usd"] == pytest.approx(0.1)
+    assert split[2]["cost_usd"] == pytest.approx(0.3)
+
+
+def test_split_marks_missing_and_failed_sections():
+    batch = {"id": 1, "batch": members(0.1, 0.1, 0.1)}
+    result = {"success": True, "output": section(1) + section(2, "failed"),
+              "cost_usd": 0.3}
+    split = TaskBatcher().split(batch, result)
+    assert split[1]["success"] is True
+    assert split[2]["error"] == "Task im Batch fehlgeschlagen"
+    assert split[3]["error"] == "Kein Abschnitt in der Batch-Ausgabe"
+    assert sum(item["cost_usd"] for item in split.values()) == pytest.approx(0.3)
+
+
+def test_split_of_failed_batch_fails_every_member():
+    batch = {"id": 1, "batch": members(0.1, 0.1)}
+    result = {"success": False, "output": section(1), "error": "Exit-Code 1",
+              "cost_usd": 0.0}
+    split = TaskBatcher().split(batch, result)
+    assert [item["error"] for item in split.values()] == ["Exit-Code 1"] * 2
+
+
+# --- Orchestrator ---
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_complete_batch_output_needs_one_session(make_manager, engine):
+    tm = make_manager(overrides=BATCHING)
+    executor = ScriptedExecutor(
+        lambda ids: "".join(section(task_id) for task_id in ids))
+    _, results, _ = run_config_tasks(tm, engine, executor)
+    assert executor.sessions == [[1, 2, 3]]
+    assert completed_ids(results) == [1, 2, 3]
+    assert tm.get_status()["iteration"]["cost_usd"] == pytest.approx(0.10)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_incomplete_batch_output_falls_back_to_single_runs(make_manager,
+                                                           engine):
+    tm = make_manager(overrides=BATCHING)
+    executor = ScriptedExecutor(
+        lambda ids: section(ids[0]) + section(ids[1], "failed"))
+    orchestrator, results, logs = run_config_tasks(tm, engine, executor)
+
+    assert executor.sessions[0] == [1, 2, 3]
+    assert sorted(executor.sessions[1:]) == [[2], [3]]
+    assert completed_ids(results) == [1, 2, 3]
+    assert orchestrator.batcher.excluded == {2, 3}
+    assert any("laufen einzeln" in line for line in logs)
+    # Batch-Session + zwei Einzel-Sessions
+    assert tm.get_status()["iteration"]["cost_usd"] == pytest.approx(0.30)
+
+
+def test_stub_agent_batch_runs_in_one_process(make_manager, stub_agent):
+    tm = make_manager(overrides=dict(BATCHING, executor={
+        "backend": "subprocess",
+        "command": [sys.executable, str(stub_agent), "--latency", "0",
+                    "--cost", "0.02"]}))
+    for index in range(4):
+        tm.add_task(f"Config {index}", "config", estimated_cost=0.05)
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config,
+                                       "thread")
+    logs = []
+    orchestrator.log_handler = logs.append
+    results = orchestrator.run_loop(tm)
+
+    assert completed_ids(results) == [1, 2, 3, 4]
+    assert [line for line in logs if "Spawning" in line] == [
+        "🚀 Spawning coding-agent für Batch #1, #2, #3, #4"]
+    assert tm.get_status()["iteration"]["cost_usd"] == pytest.approx(0.08)
+    assert "Task #3 fertig" in tm.get_output(3)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_simulated_batch_costs_one_session(make_manager, engine):
+    tm = make_manager(overrides=BATCHING)
+    for index in range(4):
+        tm.add_task(f"Config {index}", "config", estimated_cost=0.05)
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config, engine)
+    logs = []
+    orchestrator.log_handler = logs.append
+    results = orchestrator.run_loop(tm)
+
+    assert completed_ids(results) == [1, 2, 3, 4]
+    assert not any("laufen einzeln" in line for line in logs)
+    simulated_cost = tm.config["executor"]["simulated_cost_usd"]
+    assert tm.get_status()["iteration"]["cost_usd"] == pytest.approx(
+        simulated_cost)
+    assert tm.get_output(2).startswith("Task 2 completed by coding-agent")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_batch_session_counts_one_iteration(make_manager, engine):
+    tm = make_manager(overrides=dict(BATCHING,
+                                     safeguards={"max_iterations": 2}))
+    executor = ScriptedExecutor(
+        lambda ids: "".join(section(task_id) for task_id in ids))
+    orchestrator, results, _ = run_config_tasks(tm, engine, executor, count=5)
+
+    assert executor.sessions == [[1, 2, 3, 4, 5]]
+    assert completed_ids(results) == [1, 2, 3, 4, 5]
+    assert results["alerts"] == []  # max_iterations 2 nicht erreicht
+    assert orchestrator._monitor.iteration_count == 1
+    assert tm.get_status()["iteration"]["current"] == 1
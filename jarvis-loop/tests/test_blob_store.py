@@ -0,0 +1,68 @@
+"""
+Output-Blobs: Round-Trip pro Codec, Anfang/Ende lesen, Deduplizierung,
+Fallback zstd -> gzip, Outputs über den TaskManager
+"""
+
+import pytest
+
+import blob_store
+from blob_store import BlobStore
+
+TEXT = "".join(f"Zeile {index}: ä ö ü\n" for index in range(500))
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip", "zstd"])
+def test_round_trip_and_slices(tmp_path, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    store = BlobStore(tmp_path, codec, compress_min_bytes=0)
+    ref = store.put(TEXT)
+    data = TEXT.encode("utf-8")
+    assert ref["size"] == len(data) and ref["codec"] == codec
+    assert store.get(ref) == TEXT
+    assert store.get(ref, max_bytes=9) == "Zeile 0: "
+    assert store.get(ref, max_bytes=20, tail=True) == data[-20:].decode()
+    assert store.get(ref, max_bytes=len(data) * 2) == TEXT
+
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = BlobStore(tmp_path, "gzip", compress_min_bytes=100)
+    assert store.put(TEXT) == store.put(TEXT)
+    small = store.put("kurz")
+    assert small["codec"] == "none"  # unter compress_min_bytes
+    assert len([path for path in tmp_path.rglob("*") if path.is_file()]) == 2
+    assert store.get(store.put("")) == ""  # leere Datei, kein mmap
+
+
+def test_zstd_falls_back_to_gzip(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "ZSTD_AVAILABLE", False)
+    store = BlobStore(tmp_path, "zstd", compress_min_bytes=0)
+    ref = store.put(TEXT)
+    assert ref["codec"] == "gzip"
+    assert store.get(ref) == TEXT
+    # zstd-Blob aus einer Installation mit zstandard: klare Fehlermeldung
+    zstd_ref = dict(ref, codec="zstd")
+    (tmp_path / ref["digest"][:2] / (ref["digest"] + ".zst")).write_bytes(b"x")
+    with pytest.raises(RuntimeError, match="pip install zstandard"):
+        store.get(zstd_ref)
+
+
+def test_missing_blob_and_unknown_codec(tmp_path):
+    store = BlobStore(tmp_path, "none")
+    assert store.get({"digest": "ab" * 32, "size": 3, "codec": "none"}) is None
+    with pytest.raises(ValueError):
+        BlobStore(tmp_path, "lz4")
+
+
+def test_task_manager_keeps_only_the_reference(make_manager):
+    tm = make_manager(overrides={"storage": {"outputs": {
+        "codec": "gzip", "compress_min_bytes": 0}}})
+    tm.add_task("A")
+    tm.assign_task(1, "coding-agent")
+    tm.complete_task(1, TEXT)
+    task = tm.get_task(1)
+    assert task["output"] is None
+    assert task["output_ref"]["codec"] == "gzip"
+    assert tm.get_output(1) == TEXT
+    assert tm.get_output(1, max_bytes=9) == "Zeile 0: "
+    assert TEXT not in (tm.project_path / "tasks.json").read_text()
@@ -0,0 +1,70 @@
+"""
+Kostenbuch: Reservieren, Abrechnen, Freigeben in Decimal; ein teurer
+Task warnt nur, das Gesamtlimit stoppt den Lauf
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from agent_orchestrator import SafeguardMonitor, create_orchestrator
+from budget import BudgetLedger, add_usd, to_decimal
+
+
+def test_decimal_sums_do_not_drift():
+    total = 0.0
+    for _ in range(10):
+        total = add_usd(total, 0.1)
+    assert total == 1.0
+    assert to_decimal(0.1) + to_decimal(0.2) == Decimal("0.3")
+    assert to_decimal(None) == Decimal("0")
+
+
+def test_reserve_settle_release():
+    ledger = BudgetLedger("1.00", per_task_limit_usd="0.50")
+    assert ledger.reserve(1, 0.4)
+    assert ledger.reserve(1, 0.4)  # schon reserviert: nicht doppelt
+    assert ledger.reserve(2, 0.4)
+    assert not ledger.reserve(3, 0.3)  # 0.8 + 0.3 > 1.0
+    assert not ledger.reserve(4, 0.6)  # über dem Limit pro Task
+    assert ledger.reserved == Decimal("0.8")
+
+    ledger.settle(1, 0.1)  # tatsächlich günstiger
+    assert ledger.committed == Decimal("0.1")
+    assert ledger.available == Decimal("0.5")
+    ledger.release(2)
+    assert ledger.reservations() == {}
+    assert ledger.reserve(3, 0.3)
+    assert ledger.snapshot() == {
+        "limit_usd": 1.0, "committed_usd": 0.1, "reserved_usd": 0.3,
+        "available_usd": 0.6, "reservations": 1}
+
+
+def test_task_overshoot_warns_without_stopping():
+    monitor = SafeguardMonitor({"max_total_cost_usd": 10.0,
+                                "max_cost_per_iteration_usd": 0.5,
+                                "max_iterations": 100})
+    monitor.ledger.reserve(7, 0.2)
+    check = monitor.check_limits(0.8, 7)
+    assert check["should_stop"] is False
+    assert check["alerts"] == ["💸 Iteration cost $0.80 > $0.50 (Task #7)"]
+    assert monitor.ledger.reservations() == {}
+
+
+def test_total_limit_stops():
+    monitor = SafeguardMonitor({"max_total_cost_usd": 1.0,
+                                "max_iterations": 100}, spent_usd=0.7)
+    assert monitor.check_limits(0.3, 1)["should_stop"] is True
+
+
+def test_expensive_task_does_not_stop_run(make_manager):
+    tm = make_manager(overrides={"executor": {"simulated_cost_usd": 0.8}})
+    for index in range(3):
+        tm.add_task(f"Task {index}", estimated_cost=0.1)
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.log_handler = lambda message: None
+    results = orchestrator.run_loop(tm)
+
+    assert len(results["completed"]) == 3
+    assert len(results["alerts"]) == 3
+    assert tm.get_status()["iteration"]["cost_usd"] == pytest.approx(2.4)
@@ -0,0 +1,69 @@
+"""
+AIMD-Regler: additive Erhöhung, multiplikative Senkung bei Fehlern und
+Latenz, Cooldown, Budget-Deckel, Limits pro Agent-Typ
+"""
+
+from concurrency import AIMDController, create_controller
+
+ADAPTIVE = {"adaptive": True, "initial_parallel": 1, "cooldown_sec": 60}
+
+
+def test_disabled_by_default_uses_engine_limit():
+    controller = create_controller({}, 3)
+    assert controller.window("coding") == 3
+    assert controller.record("coding", 1.0, False) is None
+    assert controller.window("coding") == 3
+
+
+def test_additive_increase_per_full_window():
+    controller = AIMDController(ADAPTIVE, 4)
+    assert controller.window("coding") == 1
+    change = controller.record("coding", 1.0, True)
+    assert change == {"agent_type": "coding", "window": 2, "reason": "increase"}
+    controller.record("coding", 1.0, True)
+    controller.record("coding", 1.0, True)
+    assert controller.window("coding") == 2  # Fenster noch nicht voll
+    controller.record("coding", 1.0, True)
+    assert controller.window("coding") == 3
+    for _ in range(10):
+        controller.record("coding", 1.0, True)
+    assert controller.window("coding") == 4  # max_parallel
+
+
+def test_errors_halve_window_once_per_cooldown():
+    controller = AIMDController(dict(ADAPTIVE, initial_parallel=4), 4)
+    controller.record("coding", 1.0, True)
+    change = controller.record("coding", 1.0, False)
+    assert change == {"agent_type": "coding", "window": 2, "reason": "errors"}
+    assert controller.record("coding", 1.0, False) is None  # Cooldown
+    assert controller.window("coding") == 2
+    assert controller.can_admit("coding", 1)
+    assert not controller.can_admit("coding", 2)
+
+
+def test_slow_success_counts_as_overload():
+    controller = AIMDController(dict(ADAPTIVE, initial_parallel=4), 4)
+    controller.record("coding", 1.0, True)  # Basislatenz
+    change = controller.record("coding", 3.0, True)
+    assert change["reason"] == "latency"
+    assert change["window"] == 2
+
+
+def test_low_budget_caps_window():
+    controller = AIMDController(dict(ADAPTIVE, initial_parallel=4), 4)
+    change = controller.record("coding", 1.0, True, budget_left_fraction=0.1)
+    assert change == {"agent_type": "coding", "window": 2, "reason": "budget"}
+    controller.record("coding", 1.0, True, budget_left_fraction=0.5)
+    assert controller.window("coding") == 4
+
+
+def test_type_limits_and_minimum():
+    controller = AIMDController(dict(ADAPTIVE, initial_parallel=None,
+                                     min_parallel=2), 8,
+                                {"testing": 3, "default": 5})
+    assert controller.snapshot() == {}
+    assert controller.window("testing") == 3
+    assert controller.window("coding") == 5
+    controller.record("testing", 1.0, True)
+    controller.record("testing", 1.0, False)
+    assert controller.window("testing") == 2  # nicht unter min_parallel
@@ -0,0 +1,107 @@
+"""
+Coordinator mit Workern auf localhost: Verteilung und Worker-Verlust
+(Tasks eines getöteten Workers laufen woanders weiter), kein Lauschen im
+Netz ohne Token
+"""
+
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from agent_orchestrator import create_orchestrator
+from worker_pool import is_local_address
+
+WORKER = textwrap.dedent("""
+    import sys
+    sys.path.insert(0, sys.argv[1])
+    from executors import SimulatedExecutor
+    from worker_pool import WorkerClient
+    executor = SimulatedExecutor({"simulated_duration_sec": float(sys.argv[3]),
+                                  "simulated_cost_usd": 0.01})
+    WorkerClient(sys.argv[2], executor, 3, config={"heartbeat_sec": 0.2},
+                 log=lambda message: None).run()
+""")
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32",
+                                reason="Worker-Prozesse per SIGKILL")
+
+
+def start_coordinator(tm):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config,
+                                       "coordinator", "tcp://127.0.0.1:0")
+    logs, results = [], {}
+    orchestrator.log_handler = logs.append
+    loop = threading.Thread(
+        target=lambda: results.update(orchestrator.run_loop(tm)), daemon=True)
+    loop.start()
+    address = orchestrator.wait_listening(5)
+    assert address is not None
+    return address, loop, logs, results
+
+
+def start_worker(core_dir, address, duration_sec):
+    return subprocess.Popen([sys.executable, "-c", WORKER, str(core_dir),
+                             address, str(duration_sec)])
+
+
+def wait_until(condition, timeout_sec=10):
+    deadline = time.monotonic() + timeout_sec
+    while not condition():
+        assert time.monotonic() < deadline, "Timeout"
+        time.sleep(0.05)
+
+
+def test_tasks_of_lost_worker_finish_elsewhere(make_manager, core_dir):
+    tm = make_manager(overrides={"workers": {"timeout_sec": 1}})
+    for index in range(12):
+        tm.add_task(f"Task {index}", "coding" if index % 2 else "testing")
+    address, loop, logs, results = start_coordinator(tm)
+
+    # Langsamer Worker übernimmt 3 Tasks und wird dann getötet
+    doomed = start_worker(core_dir, address, 30)
+    healthy = None
+    try:
+        wait_until(lambda: tm.get_status()["tasks"]["in_progress"] == 3)
+        healthy = start_worker(core_dir, address, 0.05)
+        wait_until(lambda: sum("verbunden" in line for line in logs) == 2)
+        doomed.kill()
+        loop.join(30)
+        assert not loop.is_alive(), logs
+    finally:
+        for worker in (doomed, healthy):
+            if worker is not None:
+                worker.kill()
+                worker.wait(timeout=10)
+
+    assert any("verloren" in line and "3 Tasks wieder pending" in line
+               for line in logs), logs
+    assert len(results["completed"]) == 12
+    assert results["failed"] == []
+    assert tm.get_status()["tasks"]["done"] == 12
+
+
+def test_network_listen_requires_token(make_manager):
+    tm = make_manager()
+    with pytest.raises(ValueError, match="workers.token"):
+        create_orchestrator(str(tm.project_path), tm.config, "coordinator",
+                            "tcp://0.0.0.0:7420")
+    config = dict(tm.config, workers=dict(tm.config["workers"], token="s3"))
+    create_orchestrator(str(tm.project_path), config, "coordinator",
+                        "tcp://0.0.0.0:7420")
+    assert is_local_address("tcp://localhost:7420")
+    assert is_local_address("127.0.0.1:7420")
+    assert is_local_address("unix:///tmp/jarvis.sock")
+    assert not is_local_address("tcp://0.0.0.0:7420")
+
+
+def test_batching_and_hedging_reported_as_unsupported(make_manager):
+    tm = make_manager(overrides={"batching": {"enabled": True},
+                                 "hedging": {"enabled": True}})
+    _, loop, logs, _ = start_coordinator(tm)
+    loop.join(10)
+    assert any("Batching und Hedging im Coordinator-Modus" in line
+               for line in logs), logs
@@ -0,0 +1,109 @@
+"""
+Event-Writer: Reihenfolge, Rotation nach Größe mit gzip-Archiven,
+Segment-Nummern, von außen rotierte Datei, Kompaktierung des JSON-Stores
+"""
+
+import os
+
+import pytest
+
+from event_writer import (EventWriter, archive_path, list_archives,
+                          next_archive, open_segment)
+
+
+def lines(count, start=0):
+    return [f'{{"n": {index}}}\n'.encode() for index in range(start,
+                                                             start + count)]
+
+
+def read_all(path):
+    data = b""
+    for segment in list_archives(path) + [path]:
+        if segment.exists():
+            with open_segment(segment) as f:
+                data += f.read()
+    return data
+
+
+def test_writes_in_order_and_flushes(tmp_path):
+    path = tmp_path / "session.jsonl"
+    writer = EventWriter(path, {"fsync": "always"})
+    expected = lines(2000)
+    for line in expected:
+        writer.write(line)
+    assert writer.flush(timeout=5)
+    assert path.read_bytes() == b"".join(expected)
+    writer.close()
+    writer.write(b"nach close\n")  # synchron
+    assert path.read_bytes().endswith(b"nach close\n")
+
+
+def test_rotates_by_size_and_compresses(tmp_path):
+    path = tmp_path / "session.jsonl"
+    writer = EventWriter(path, {"journal_max_mb": 200 / (1024 * 1024)})
+    expected = lines(300)
+    for index, line in enumerate(expected):
+        writer.write(line)
+        if index % 20 == 19:
+            writer.flush()  # ein Block pro 20 Zeilen: Rotation dazwischen
+    writer.close()
+
+    archives = list_archives(path)
+    assert len(archives) >= 3
+    assert all(archive.name.endswith(".jsonl.gz") for archive in archives)
+    assert read_all(path) == b"".join(expected)
+
+
+def test_manual_rotate_without_compression(tmp_path):
+    path = tmp_path / "session.jsonl"
+    writer = EventWriter(path, {"compress_archives": False},
+                         auto_rotate=False)
+    assert writer.rotate(archive_path(path, 0)) is None  # noch leer
+    for segment in (0, 1, 2):
+        writer.write(lines(1, segment)[0])
+        assert writer.rotate(next_archive(path)) == archive_path(path, segment)
+    writer.close()
+    assert [archive.name for archive in list_archives(path)] == [
+        "session.0.jsonl", "session.1.jsonl", "session.2.jsonl"]
+    assert next_archive(path).name == "session.3.jsonl"
+
+
+def test_segment_order_is_numeric(tmp_path):
+    path = tmp_path / "session.jsonl"
+    for segment in (10, 2):
+        archive_path(path, segment).write_bytes(b"")
+    (tmp_path / "session.jsonl.idx").write_bytes(b"")
+    assert [archive.name for archive in list_archives(path)] == [
+        "session.2.jsonl", "session.10.jsonl"]
+
+
+def test_reopens_file_rotated_by_another_process(tmp_path):
+    path = tmp_path / "session.jsonl"
+    writer = EventWriter(path, {"fsync": "never"})
+    writer.write(b"a\n")
+    writer.flush()
+    os.replace(path, archive_path(path, 0))
+    writer.write(b"b\n")
+    writer.close()
+    assert path.read_bytes() == b"b\n"
+    assert archive_path(path, 0).read_bytes() == b"a\n"
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        EventWriter(tmp_path / "session.jsonl", {"fsync": "sometimes"})
+
+
+def test_json_store_compacts_and_replays_segments(make_manager):
+    tm = make_manager(overrides={"logging": {
+        "journal_max_mb": 2000 / (1024 * 1024), "compress_archives": False}})
+    for index in range(30):
+        tm.add_task(f"Task {index}")
+        if index % 5 == 4:
+            tm.flush()
+    assert len(list_archives(tm.session_file)) >= 2
+    tm.close()
+
+    reopened = make_manager(overrides={"logging": {
+        "journal_max_mb": 2000 / (1024 * 1024)}}, create=False)
+    assert reopened.get_status()["tasks"]["total"] == 30
@@ -0,0 +1,117 @@
+"""
+SubprocessExecutor mit dem Stub-Agent: Erfolg, Kosten, Exit-Codes,
+Timeout mit Kill der Prozessgruppe (auch nach ignoriertem SIGTERM)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from executors import SubprocessExecutor
+
+# Meldet seine PID und ignoriert SIGTERM (nur SIGKILL beendet ihn)
+STUBBORN_AGENT = (
+    "import os, signal, sys, time\n"
+    "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+    "print('PID=%d' % os.getpid(), flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+TASK = {"id": 7, "title": "Stub", "type": "coding"}
+
+
+def executor_for(command, tmp_path, timeout_sec=30.0, kill_grace_sec=1):
+    return SubprocessExecutor({"command": command, "max_processes": 2,
+                               "kill_grace_sec": kill_grace_sec},
+                              timeout_sec, str(tmp_path))
+
+
+def stubborn_command(tmp_path):
+    # als Datei: Platzhalter wie {task_id} werden im Kommando ersetzt
+    script = tmp_path / "stubborn_agent.py"
+    script.write_text(STUBBORN_AGENT)
+    return [sys.executable, str(script)]
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_stub_agent_success_reports_cost_and_streams(tmp_path, stub_agent):
+    executor = executor_for([sys.executable, str(stub_agent), "--latency", "0",
+                             "--cost", "0.25"], tmp_path)
+    lines = []
+    result = executor.run(TASK, "coding-agent", "JARVIS LOOP TASK #7: Stub",
+                          on_output=lambda stream, line: lines.append(line))
+    assert result["success"] is True
+    assert result["exit_code"] == 0
+    assert result["cost_usd"] == pytest.approx(0.25)
+    assert "Task #7 fertig" in result["output"]
+    assert any("Schritt 3/3" in line for line in lines)
+
+
+def test_stub_agent_failure_uses_stderr_as_error(tmp_path, stub_agent):
+    executor = executor_for([sys.executable, str(stub_agent), "--latency", "0",
+                             "--fail-rate", "1"], tmp_path)
+    result = executor.run(TASK, "coding-agent", "prompt")
+    assert result["success"] is False
+    assert result["exit_code"] == 1
+    assert "fehlgeschlagen" in result["error"]
+
+
+def test_timeout_kills_hanging_agent(tmp_path, stub_agent):
+    executor = executor_for([sys.executable, str(stub_agent), "--hang"],
+                            tmp_path, timeout_sec=0.5)
+    started = time.monotonic()
+    result = executor.run(TASK, "coding-agent", "prompt")
+    assert result["success"] is False
+    assert result["error"].startswith("Timeout")
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Prozessgruppen/Signale")
+def test_timeout_escalates_to_sigkill(tmp_path):
+    executor = executor_for(stubborn_command(tmp_path), tmp_path,
+                            timeout_sec=0.5, kill_grace_sec=0.5)
+    lines = []
+    result = executor.run(TASK, "coding-agent", "prompt",
+                          on_output=lambda stream, line: lines.append(line))
+    assert result["error"].startswith("Timeout")
+    assert result["exit_code"] == -9
+    pid = int(next(line for line in lines if line.startswith("PID="))[4:])
+    assert not process_alive(pid)
+
+
+def test_cancel_stops_agent(tmp_path, stub_agent):
+    executor = executor_for([sys.executable, str(stub_agent), "--hang"],
+                            tmp_path)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = executor.run(TASK, "coding-agent", "prompt", cancel=cancel)
+    assert result["success"] is False
+    assert result["error"] == "cancelled"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Prozessgruppen/Signale")
+def test_async_timeout_kills_process_group(tmp_path):
+    executor = executor_for(stubborn_command(tmp_path), tmp_path,
+                            kill_grace_sec=0.5)
+    lines = []
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(executor.run_async(
+                TASK, "coding-agent", "prompt",
+                on_output=lambda stream, line: lines.append(line)), 0.5)
+
+    asyncio.run(run())
+    pid = int(next(line for line in lines if line.startswith("PID="))[4:])
+    assert not process_alive(pid)
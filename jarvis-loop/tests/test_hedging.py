@@ -0,0 +1,118 @@
+"""
+Hedging: p95-Schwelle, Budget-Deckel, Gewinner und Abbruch des
+Zwillings, eigenes Arbeitsverzeichnis pro Duplikat
+"""
+
+import time
+from pathlib import Path
+
+from agent_orchestrator import create_orchestrator
+from budget import BudgetLedger
+from executors import AgentExecutor
+from hedging import DEFAULT_WORKSPACE_EXCLUDE, HedgeWorkspace, Hedger
+
+
+def test_threshold_needs_min_samples():
+    hedger = Hedger({"enabled": True, "min_samples": 3, "percentile": 50})
+    hedger.latency.observe("coding-agent", 1.0)
+    hedger.latency.observe("coding-agent", 3.0)
+    assert hedger.threshold("coding-agent") is None
+    hedger.latency.observe("coding-agent", 2.0)
+    assert hedger.threshold("coding-agent") == 2.0
+
+
+def test_budget_cap_and_cancel():
+    hedger = Hedger({"enabled": True, "max_budget_fraction": 0.10})
+    ledger = BudgetLedger("10.00")
+    assert hedger.reserve(ledger, {"id": 1, "estimated_cost": 0.6})
+    assert not hedger.reserve(ledger, {"id": 2, "estimated_cost": 0.6})
+    hedger.cancel(ledger, {"id": 1})
+    assert ledger.reservations() == {} and hedger.launched == 0
+    assert hedger.reserve(ledger, {"id": 2, "estimated_cost": 0.6})
+
+
+def test_workspace_promotes_only_own_changes(tmp_path):
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "src" / "a.py").write_text("a = 1\n")
+    (project / "old.txt").write_text("weg\n")
+    (project / "tasks.json").write_text("{}")
+    workspace = HedgeWorkspace(str(project), 1, DEFAULT_WORKSPACE_EXCLUDE)
+    workspace.populate()
+    assert not (workspace.path / "tasks.json").exists()
+
+    (project / "other.txt").write_text("anderer Task\n")
+    (workspace.path / "src" / "a.py").write_text("a = 2\n")
+    (workspace.path / "src" / "b.py").write_text("b = 1\n")
+    (workspace.path / "old.txt").unlink()
+    assert workspace.promote() == ["old.txt", "src/a.py", "src/b.py"]
+    assert (project / "src" / "a.py").read_text() == "a = 2\n"
+    assert (project / "src" / "b.py").exists()
+    assert not (project / "old.txt").exists()
+    assert (project / "other.txt").exists()  # unberührt
+    workspace.discard()
+    assert not workspace.path.exists()
+
+
+class WritingExecutor(AgentExecutor):
+    """
+    Schreibt result.txt in sein Arbeitsverzeichnis; slow_first: der
+    Primär-Lauf hängt (bis zum Abbruch), sonst das Duplikat
+    """
+
+    name = "writing"
+
+    def __init__(self, project_path, slow_first: bool):
+        self.project_path = project_path
+        self.slow_first = slow_first
+        self.workdirs = []
+
+    def run(self, task, agent_type, prompt, on_output=None, cancel=None):
+        workdir = Path(task.get("workdir") or self.project_path)
+        first = not self.workdirs
+        self.workdirs.append(workdir)
+        (workdir / "result.txt").write_text(
+            "primary\n" if first else "hedge\n")
+        duration = 5.0 if first == self.slow_first else 1.0
+        if cancel.wait(duration):
+            return self._result(task, agent_type, False, error="cancelled",
+                                cost=0.01)
+        return self._result(task, agent_type, True, output="ok", cost=0.01,
+                            exit_code=0)
+
+
+def run_hedged(tm, slow_first: bool):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.executor = WritingExecutor(tm.project_path, slow_first)
+    orchestrator.hedger = Hedger({"enabled": True, "min_samples": 1})
+    orchestrator.hedger.latency.observe("coding-agent", 0.01)
+    orchestrator.log_handler = lambda message: None
+    started = time.monotonic()
+    results = orchestrator.run_loop(tm)
+    return orchestrator, results, time.monotonic() - started
+
+
+def test_hedge_wins_and_cancels_primary(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    orchestrator, results, elapsed = run_hedged(tm, slow_first=True)
+
+    primary, hedge = orchestrator.executor.workdirs
+    assert primary == tm.project_path and hedge != primary
+    assert elapsed < 4  # hängender Primär-Lauf wurde abgebrochen
+    assert [result["task_id"] for result in results["completed"]] == [1]
+    assert results["hedging"]["won"] == 1
+    assert (tm.project_path / "result.txt").read_text() == "hedge\n"
+    assert not hedge.exists()
+
+
+def test_losing_hedge_is_discarded(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    orchestrator, results, _ = run_hedged(tm, slow_first=False)
+
+    _, hedge = orchestrator.executor.workdirs
+    assert results["hedging"] == {"launched": 1, "won": 0,
+                                  "extra_cost_usd": 0.01}
+    assert (tm.project_path / "result.txt").read_text() == "primary\n"
+    assert not hedge.exists()
@@ -0,0 +1,74 @@
+"""
+Leases: Ablauf, tote Besitzer-Prozesse, Heartbeat und Reaper
+(wieder pending bzw. failed nach leases.max_attempts)
+"""
+
+import socket
+import subprocess
+import sys
+import time
+
+from leases import LEASE_OWNER, LeaseKeeper, lease_expired, owner_alive
+
+
+def dead_owner() -> str:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return f"{socket.gethostname()}:{proc.pid}"
+
+
+def test_lease_expiry_and_owner():
+    now = time.time()
+    assert not lease_expired({"lease_owner": LEASE_OWNER,
+                              "lease_expires_at": now + 60}, now)
+    assert lease_expired({"lease_owner": LEASE_OWNER,
+                          "lease_expires_at": now - 1}, now)
+    # toter Prozess auf diesem Host: sofort abgelaufen
+    assert lease_expired({"lease_owner": dead_owner(),
+                          "lease_expires_at": now + 60}, now)
+    # fremder Host: nur der Ablaufzeitpunkt zählt
+    assert owner_alive("anderer-host:1")
+    assert not lease_expired({"lease_owner": "anderer-host:1",
+                              "lease_expires_at": now + 60}, now)
+    assert not owner_alive(None)
+
+
+def test_heartbeat_renews_own_leases(make_manager):
+    tm = make_manager(overrides={"leases": {"duration_sec": 60}})
+    tm.add_task("A")
+    tm.add_task("B")
+    tm.assign_task(1, "coding-agent")
+    before = tm.get_task(1)["lease_expires_at"]
+    time.sleep(0.01)
+    assert tm.renew_leases([1, 2]) == 1  # 2 läuft nicht
+    assert tm.get_task(1)["lease_expires_at"] > before
+
+
+def test_reaper_requeues_then_fails(make_manager):
+    tm = make_manager(overrides={"leases": {"duration_sec": -1,
+                                            "max_attempts": 2}})
+    tm.add_task("A")
+    tm.add_task("B")
+    tm.assign_task(1, "coding-agent")
+    logs = []
+    keeper = LeaseKeeper(tm, lambda: [], tm.config["leases"], logs.append)
+    assert keeper.reap() == {"requeued": [1], "failed": []}
+    assert tm.get_task(1)["status"] == "pending"
+    assert tm.get_task(1)["lease_owner"] is None
+
+    tm.assign_task(1, "coding-agent")  # zweiter Versuch
+    assert keeper.reap() == {"requeued": [], "failed": [1]}
+    assert tm.get_task(1)["status"] == "failed"
+    assert len(logs) == 2
+
+
+def test_task_of_dead_process_is_reaped_on_resume(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    tm.assign_task(1, "coding-agent")
+    tm.store.transition(1, "lease_renewed", {"lease_owner": dead_owner()})
+    tm.close()
+
+    reopened = make_manager(create=False)
+    assert reopened.reap_expired_leases() == {"requeued": [1], "failed": []}
+    assert [task["id"] for task in reopened.get_ready_tasks()] == [1]
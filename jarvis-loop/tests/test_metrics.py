@@ -0,0 +1,109 @@
+"""
+Metrics: lock-freie Counter ohne verlorene Events, kumulative
+Histogramm-Buckets, Scrape-Callbacks, Textformat, /metrics-Endpoint,
+Instrumentierung des Loops
+"""
+
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from agent_orchestrator import create_orchestrator
+from metrics import LoopMetrics, MetricsRegistry, MetricsServer
+
+
+def sample_lines(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def test_parallel_increments_are_not_lost(monkeypatch):
+    monkeypatch.setattr(metrics, "FOLD_AT", 16)
+    counter = MetricsRegistry().counter("c_total", "Test", ["kind"])
+    child = counter.labels("a")
+    assert counter.labels("a") is child
+
+    def work():
+        for _ in range(5000):
+            child.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert child.value == 40000
+    child.set(3)
+    child.dec()
+    assert child.value == 2
+
+
+def test_histogram_and_render():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("d_seconds", "Dauer", ["agent"],
+                                   buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.labels("coding").observe(value)
+    counter = registry.counter("e_total", 'Zeile 1\nZeile 2', ["reason"])
+    counter.labels('sagt "nein"').inc(2.5)
+    with pytest.raises(ValueError):
+        registry.counter("e_total", "doppelt")
+
+    text = registry.render()
+    assert "# TYPE d_seconds histogram" in text
+    assert "# HELP e_total Zeile 1\\nZeile 2" in text
+    assert sample_lines(text) == [
+        'd_seconds_bucket{agent="coding",le="1"} 2',
+        'd_seconds_bucket{agent="coding",le="5"} 3',
+        'd_seconds_bucket{agent="coding",le="+Inf"} 4',
+        'd_seconds_sum{agent="coding"} 14.5',
+        'd_seconds_count{agent="coding"} 4',
+        'e_total{reason="sagt \\"nein\\""} 2.5',
+    ]
+
+
+def test_scrape_callbacks():
+    registry = MetricsRegistry()
+    registry.gauge("ready", "Bereit").set_function(lambda: 3)
+    registry.gauge("in_flight", "Laufend", ["agent_type"]).set_function(
+        lambda: {"coding-agent": 2})
+    registry.gauge("broken", "Kaputt").set_function(lambda: 1 / 0)
+    text = registry.render()
+    assert sample_lines(text) == ["ready 3",
+                                  'in_flight{agent_type="coding-agent"} 2']
+    assert "broken" not in text  # Callback-Fehler: Metrik ausgelassen
+
+
+def test_server_serves_metrics():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Treffer").labels().inc()
+    server = MetricsServer(registry, 0).start()
+    host, port = server.address
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as reply:
+            assert reply.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert "hits_total 1" in reply.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/other")
+    finally:
+        server.stop()
+
+
+def test_loop_is_instrumented(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    tm.add_task("B")
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.log_handler = lambda message: None
+    orchestrator.metrics = LoopMetrics(buckets=(1,))
+    orchestrator.run_loop(tm)
+
+    text = orchestrator.metrics.registry.render()
+    assert 'jarvis_tasks_started_total{agent_type="coding-agent"} 2' in text
+    assert 'jarvis_tasks_completed_total{agent_type="coding-agent"} 2' in text
+    assert ('jarvis_task_duration_seconds_count{agent_type="coding-agent",'
+            'outcome="ok"} 2') in text
+    assert "jarvis_ready_tasks 0" in text
+    assert "jarvis_budget_usd 100" in text
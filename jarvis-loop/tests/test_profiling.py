@@ -0,0 +1,79 @@
+"""
+Profiling: Snapshots pro Iteration bzw. Intervall, Aufräumen alter
+Speicher-Snapshots, pstats-Dateien, Zusammenfassung, Dispatch-Thread
+"""
+
+import pstats
+import time
+
+import pytest
+
+from agent_orchestrator import create_orchestrator
+from profiling import LoopProfiler, create_profiler
+
+
+def busy():
+    return sum(index * index for index in range(20000))
+
+
+def test_iteration_snapshots_and_summary(tmp_path):
+    profiler = LoopProfiler(tmp_path, {"every_iterations": 2,
+                                       "keep_snapshots": 2}).start()
+    profiler.attach("main")
+    for _ in range(6):
+        busy()
+        profiler.tick()
+    assert [path.name for path in profiler._snapshots] == [
+        "mem-0002.snapshot", "mem-0003.snapshot"]
+    assert not (profiler.directory / "mem-0001.snapshot").exists()
+
+    messages = []
+    summary_file = profiler.close(log=messages.append)
+    assert profiler.close() is None  # nur einmal
+    summary = summary_file.read_text(encoding="utf-8")
+    assert summary.startswith("🔬 Profil (6 Loop-Iterationen)")
+    assert "=== CPU: main" in summary and "busy" in summary
+    assert "Speicher: Top" in summary
+    assert messages[0] == summary
+    stats = pstats.Stats(str(profiler.directory / "main.prof"))
+    assert any(func[2] == "busy" for func in stats.stats)
+
+
+def test_interval_mode_samples_in_background(tmp_path):
+    profiler = LoopProfiler(tmp_path, {"mode": "interval",
+                                       "interval_sec": 0.05}).start()
+    try:
+        deadline = time.monotonic() + 5
+        while not profiler._snapshots and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert profiler._snapshots
+    finally:
+        profiler.close(log=lambda message: None)
+    assert not profiler._sampler.is_alive()
+
+
+def test_config_and_run_directories(tmp_path):
+    with pytest.raises(ValueError):
+        LoopProfiler(tmp_path, {"mode": "always"})
+    first = LoopProfiler(tmp_path, {"dir": "prof"})
+    first.directory.mkdir(parents=True)
+    second = LoopProfiler(tmp_path, {"dir": "prof"})
+    assert first.directory.parent == tmp_path / "prof"
+    assert second.directory != first.directory
+
+
+def test_profiles_the_dispatch_thread(make_manager):
+    tm = make_manager(overrides={"profiling": {"every_iterations": 1}})
+    for index in range(3):
+        tm.add_task(f"Task {index}")
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.log_handler = lambda message: None
+    profiler = create_profiler(tm.project_path, tm.config)
+    orchestrator.profiler = profiler
+    try:
+        orchestrator.run_loop(tm)
+    finally:
+        summary_file = profiler.close(log=lambda message: None)
+    assert profiler.directory.parent == tm.project_path / "profile"
+    assert profiler._iterations >= 1 and profiler._snapshots
+    assert "=== CPU: dispatch" in summary_file.read_text(encoding="utf-8")
@@ -0,0 +1,72 @@
+"""
+Result-Cache: LRU-Verdrängung, Index nach Neustart, opt-in und
+Projekt-Generation im Schlüssel
+"""
+
+from agent_orchestrator import create_orchestrator
+from result_cache import ResultCache, create_cache
+
+CACHE = {"cache": {"enabled": True}}
+
+
+def entry(text):
+    return {"output": text, "agent_type": "coding-agent", "cost_usd": 0.1}
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1 << 20)
+    cache.put("aa1", entry("x" * 100))
+    size = cache.stats()["bytes"]
+    cache.max_bytes = 3 * size
+    cache.put("bb2", entry("y" * 100))
+    cache.put("cc3", entry("z" * 100))
+    assert cache.get("aa1")["output"] == "x" * 100  # aa1 jetzt jüngster
+
+    cache.put("dd4", entry("w" * 100))
+    assert cache.get("bb2") is None
+    assert [cache.get(key) is not None for key in ("aa1", "cc3", "dd4")] == [
+        True, True, True]
+    assert cache.stats() == {"hits": 4, "misses": 1, "entries": 3,
+                             "bytes": 3 * size}
+
+    reopened = ResultCache(tmp_path / "cache", 3 * size)
+    assert reopened.stats()["entries"] == 3
+    assert reopened.get("dd4")["output"] == "w" * 100
+
+
+def test_key_covers_generation_and_dependencies():
+    key = ResultCache.make_key("prompt", "coding", "coding-agent", ["d1"], "g1")
+    assert key == ResultCache.make_key("prompt", "coding", "coding-agent",
+                                       ["d1"], "g1")
+    assert key != ResultCache.make_key("prompt", "coding", "coding-agent",
+                                       ["d2"], "g1")
+    assert key != ResultCache.make_key("prompt", "coding", "coding-agent",
+                                       ["d1"], "g2")
+
+
+def test_cache_is_opt_in(tmp_path):
+    assert create_cache(str(tmp_path), {}) is None
+    assert create_cache(str(tmp_path), CACHE) is not None
+
+
+def run(tm):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.log_handler = lambda message: None
+    orchestrator.run_loop(tm)
+    return orchestrator.get_cache_stats()
+
+
+def test_new_project_generation_misses(make_manager):
+    tm = make_manager(overrides=CACHE)
+    tm.add_task("A")
+    assert run(tm)["misses"] == 1
+
+    tm.store.transition(1, "task_reset", {"status": "pending"})
+    stats = run(tm)
+    assert (stats["hits"], tm.get_task(1)["status"]) == (1, "done")
+
+    # neu angelegtes Projekt mit gleichem Task: kein Treffer
+    tm.create_project("project", "Test")
+    tm.add_task("A")
+    assert run(tm)["hits"] == 0
+    assert tm.get_task(1)["status"] == "done"
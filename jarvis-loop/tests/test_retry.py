@@ -0,0 +1,120 @@
+"""
+Retries: Fehlerklassen, Backoff mit Jitter, Retry-After, Versuche pro
+Task-Typ, Timer-Wheel; opt-in über retry.enabled
+"""
+
+from agent_orchestrator import create_orchestrator
+from executors import AgentExecutor
+from retry import (PERMANENT, RATE_LIMIT, TRANSIENT, RetryPolicy, TimerWheel,
+                   classify_failure)
+
+RETRY = {"enabled": True, "base_delay_sec": 1, "rate_limit_delay_sec": 10,
+         "multiplier": 2, "max_delay_sec": 5,
+         "max_attempts": {"default": 3, "research": 4}}
+
+
+def failure(error=None, output=None, exit_code=1):
+    return {"success": False, "error": error, "output": output,
+            "exit_code": exit_code}
+
+
+def test_classify_failure():
+    assert classify_failure(failure("HTTP 429")) == RATE_LIMIT
+    assert classify_failure(failure(output="Too Many Requests")) == RATE_LIMIT
+    assert classify_failure(failure("Timeout nach 30s")) == TRANSIENT
+    assert classify_failure(failure("connection reset by peer")) == TRANSIENT
+    assert classify_failure(failure("upstream 503")) == TRANSIENT
+    assert classify_failure(failure("Exit 75", exit_code=75)) == TRANSIENT
+    assert classify_failure(failure("SyntaxError")) == PERMANENT
+    assert classify_failure(failure("SyntaxError"), TRANSIENT) == TRANSIENT
+    # Abbruch per Kill wird nie wiederholt
+    assert classify_failure(failure("cancelled", exit_code=75)) == PERMANENT
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(RETRY)
+    caps = {1: 1, 2: 2, 3: 4}
+    for attempts, cap in caps.items():
+        delays = [policy.decide({"attempts": attempts, "type": "research"},
+                                failure("timeout"))["delay_sec"]
+                  for _ in range(50)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap / 2  # Full Jitter streut über [0, cap]
+
+    decision = policy.decide({"attempts": 1}, failure("rate limit"))
+    assert decision["failure_class"] == RATE_LIMIT
+    assert decision["delay_sec"] <= 5  # max_delay_sec
+
+
+def test_retry_after_is_respected():
+    policy = RetryPolicy(RETRY)
+    decision = policy.decide({"attempts": 1},
+                             failure("429, retry-after: 30"))
+    assert decision["retry"] and decision["delay_sec"] == 30.0
+
+
+def test_no_retry_when_permanent_exhausted_or_disabled():
+    policy = RetryPolicy(RETRY)
+    assert not policy.decide({"attempts": 1}, failure("SyntaxError"))["retry"]
+    assert not policy.decide({"attempts": 3, "type": "coding"},
+                             failure("timeout"))["retry"]
+    assert policy.decide({"attempts": 3, "type": "research"},
+                         failure("timeout"))["retry"]
+    assert not RetryPolicy({}).decide({"attempts": 1},
+                                      failure("timeout"))["retry"]
+
+
+def test_timer_wheel():
+    wheel = TimerWheel(tick_sec=1, slots=4)
+    wheel.schedule("a", 2, now=0)
+    wheel.schedule("b", 9, now=0)  # mehr als eine Umdrehung
+    wheel.schedule("c", 1, now=0)
+    assert wheel.cancel("c")
+    assert wheel.advance(now=1) == []
+    assert wheel.advance(now=2) == ["a"]
+    assert wheel.advance(now=5) == []
+    assert wheel.advance(now=9) == ["b"]
+    assert len(wheel) == 0
+    wheel.schedule("d", 60, now=9)
+    assert wheel.drain() == ["d"]
+
+
+class FlakyExecutor(AgentExecutor):
+    """Scheitert beim ersten Versuch jedes Tasks mit einem Timeout"""
+
+    name = "flaky"
+
+    def __init__(self):
+        self.calls = {}
+
+    def run(self, task, agent_type, prompt, on_output=None, cancel=None):
+        call = self.calls.get(task["id"], 0) + 1
+        self.calls[task["id"]] = call
+        if call == 1:
+            return self._result(task, agent_type, False, error="Timeout",
+                                exit_code=1)
+        return self._result(task, agent_type, True, output="ok", cost=0.01,
+                            exit_code=0)
+
+
+def run_flaky(tm):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.executor = FlakyExecutor()
+    orchestrator.log_handler = lambda message: None
+    return orchestrator.run_loop(tm)
+
+
+def test_transient_failure_is_retried(make_manager):
+    tm = make_manager(overrides={"retry": {"enabled": True,
+                                           "base_delay_sec": 0.01}})
+    tm.add_task("A")
+    results = run_flaky(tm)
+    assert len(results["completed"]) == 1
+    assert tm.get_task(1)["status"] == "done"
+
+
+def test_retry_is_opt_in(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    run_flaky(tm)
+    assert tm.get_task(1)["status"] == "failed"
@@ -0,0 +1,78 @@
+"""
+Scheduling-Policies: fifo, cheapest_first (Schätzung, dann beobachtete
+Dauer), critical_path über den DAG, Aging
+"""
+
+import time
+
+import pytest
+
+from scheduling import (CheapestFirstPolicy, CriticalPathPolicy, FifoPolicy,
+                        create_policy)
+
+
+def ids(tasks):
+    return [task["id"] for task in tasks]
+
+
+def task(task_id, cost, task_type="coding"):
+    return {"id": task_id, "type": task_type, "estimated_cost": cost}
+
+
+def test_create_policy():
+    assert create_policy({}).name == "fifo"
+    policy = create_policy({"scheduling": {"policy": "critical_path",
+                                           "critical_path_refresh_sec": 1}})
+    assert isinstance(policy, CriticalPathPolicy) and policy.refresh_sec == 1
+    with pytest.raises(ValueError):
+        create_policy({"scheduling": {"policy": "lifo"}})
+
+
+def test_cheapest_first_uses_estimates_then_observed_durations():
+    policy = CheapestFirstPolicy()
+    ready = [task(1, 0.9, "research"), task(2, 0.1, "coding"),
+             task(3, 0.5, "testing")]
+    assert ids(policy.order(ready)) == [2, 3, 1]
+    assert ids(FifoPolicy().order(ready)) == [1, 2, 3]
+
+    policy.observe(task(9, 0, "coding"), 30.0)
+    policy.observe(task(9, 0, "research"), 10.0)
+    # testing: noch nie beobachtet -> Gesamt-Durchschnitt (20s)
+    assert ids(policy.order(ready)) == [1, 3, 2]
+
+
+def test_critical_path_prefers_long_chains(make_manager):
+    tm = make_manager()
+    tm.add_task("Einzeln", estimated_cost=0.05)
+    tm.add_task("Kopf", estimated_cost=0.1)
+    tm.add_task("Mitte", dependencies=[2], estimated_cost=0.5)
+    tm.add_task("Ende", dependencies=[3], estimated_cost=0.5)
+    ready = tm.get_ready_tasks()
+
+    assert ids(create_policy({}).order(ready, tm)) == [1, 2]
+    assert ids(CheapestFirstPolicy().order(ready, tm)) == [1, 2]
+    policy = CriticalPathPolicy()
+    assert ids(policy.order(ready, tm)) == [2, 1]
+    assert policy._path_length[2] == pytest.approx(1.1)
+
+
+def test_critical_path_ignores_finished_tasks(make_manager):
+    tm = make_manager()
+    tm.add_task("A", estimated_cost=0.3)
+    tm.add_task("B", dependencies=[1], estimated_cost=0.3)
+    tm.add_task("C", estimated_cost=0.4)
+    tm.assign_task(1, "coding-agent")
+    tm.complete_task(1, "ok")
+    policy = CriticalPathPolicy({"critical_path_refresh_sec": 0})
+    assert ids(policy.order(tm.get_ready_tasks(), tm)) == [3, 2]
+    assert policy._path_length[1] == pytest.approx(0.3)  # nur noch B
+
+
+def test_aging_moves_waiting_tasks_first():
+    policy = CheapestFirstPolicy({"aging_sec": 0.05})
+    policy.order([task(1, 0.9)])
+    time.sleep(0.06)
+    assert ids(policy.order([task(1, 0.9), task(2, 0.1)])) == [1, 2]
+    # nicht mehr bereit: Wartezeit beginnt von vorn
+    policy.order([task(2, 0.1)])
+    assert ids(policy.order([task(1, 0.9), task(2, 0.1)])) == [2, 1]
@@ -0,0 +1,106 @@
+"""
+Session-Index: Abfragen nach Task, Typ und Zeitraum, limit/newest,
+inkrementelles Nachindizieren, Segmente über Rotation und gzip
+"""
+
+import gzip
+import json
+
+from event_writer import archive_path
+from session_index import SessionIndex, format_event, parse_time
+
+
+def event(index, task_id, event_type="task_updated"):
+    return {"timestamp": f"2026-10-18T10:{index // 60:02d}:{index % 60:02d}",
+            "type": event_type, "data": {"id": task_id, "n": index}}
+
+
+def encode(events):
+    return b"".join(json.dumps(item).encode() + b"\n" for item in events)
+
+
+def numbers(events):
+    return [item["data"]["n"] for item in events]
+
+
+def test_filters_by_task_type_and_time(tmp_path):
+    path = tmp_path / "session.jsonl"
+    events = [event(index, index % 3,
+                    "task_added" if index % 10 == 0 else "task_updated")
+              for index in range(300)]
+    path.write_bytes(encode(events))
+    index = SessionIndex(path, block_kb=1)
+
+    assert numbers(index.query(task_id=1)) == list(range(1, 300, 3))
+    assert numbers(index.query(types=["task_added"])) == list(range(0, 300, 10))
+    window = index.query(since="2026-10-18T10:01:00",
+                         until="2026-10-18T10:01:04")
+    assert numbers(window) == [60, 61, 62, 63, 64]
+    added = index.query(task_id=2, types=["task_added"])
+    assert numbers(added) == list(range(20, 300, 30))
+    assert numbers(index.query(task_id=0, limit=3)) == [0, 3, 6]
+    newest = index.query(task_id=0, limit=3, newest=True)
+    assert numbers(newest) == [291, 294, 297]
+    assert index.query(task_id=99) == []
+
+
+def test_extends_incrementally_and_ignores_partial_lines(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(encode([event(0, 1)]))
+    index = SessionIndex(path, block_kb=1)
+    assert numbers(index.query(task_id=1)) == [0]
+
+    with open(path, "ab") as f:
+        f.write(encode([event(1, 1)]) + b'{"timestamp": "2026')
+    assert numbers(index.query(task_id=1)) == [0, 1]
+    segment = next(iter(index._segments.values()))
+    assert segment["indexed"] == len(encode([event(0, 1), event(1, 1)]))
+
+    with open(path, "ab") as f:
+        f.write(b'-10-18T11:00:00", "type": "task_updated", '
+                b'"data": {"id": 1, "n": 2}}\n')
+    assert numbers(index.query(task_id=1)) == [0, 1, 2]
+
+
+def test_survives_rotation_gzip_and_reload(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(encode([event(index, 1) for index in range(50)]))
+    index = SessionIndex(path, block_kb=1)
+    assert index.refresh() == 1
+
+    # wie der EventWriter: Segment archivieren und komprimieren
+    packed = archive_path(path, 0).with_suffix(".jsonl.gz")
+    with gzip.open(packed, "wb") as f:
+        f.write(path.read_bytes())
+    path.write_bytes(encode([event(index, 1) for index in range(50, 80)]))
+    assert numbers(index.query(task_id=1)) == list(range(80))
+    assert numbers(index.query(task_id=1, limit=5, newest=True)) == list(
+        range(75, 80))
+    assert numbers(index.query(until="2026-10-18T10:00:02")) == [0, 1, 2]
+
+    reloaded = SessionIndex(path, block_kb=1)
+    assert reloaded.index_file.exists()
+    assert numbers(reloaded.query(task_id=1)) == list(range(80))
+    assert SessionIndex(path, block_kb=2).refresh() == 2  # anderes Format
+
+
+def test_task_manager_query_history(make_manager):
+    tm = make_manager(overrides={"logging": {"index_block_kb": 1}})
+    tm.add_task("A")
+    tm.add_task("B")
+    tm.assign_task(2, "coding-agent")
+    history = tm.query_history(task_id=2)
+    assert history and all(item["data"]["id"] == 2 for item in history)
+    assert tm.query_history(task_id=2, limit=1, newest=True) == history[-1:]
+
+
+def test_parse_time_and_format_event():
+    assert parse_time(None) is None
+    assert parse_time("2026-10-18T09:30") == "2026-10-18T09:30:00"
+    assert parse_time("15m") < parse_time("1m")
+    line = format_event({"timestamp": "2026-10-18T09:30:00.123",
+                         "type": "task_updated",
+                         "data": {"id": 4, "changes": {"status": "done"},
+                                  "agent": "coding-agent", "error": None}})
+    assert line.startswith("2026-10-18T09:30:00  task_updated")
+    assert "#4" in line and "-> done" in line and "error" not in line
@@ -0,0 +1,70 @@
+"""
+DAG-Index: Ready-Set bei Statuswechseln, ungültige Dependencies und
+gleiche Ready-Reihenfolge auf beiden Backends
+"""
+
+import pytest
+
+from task_graph import TaskGraph
+
+SQLITE = {"storage": {"backend": "sqlite"}}
+
+
+def test_ready_set_follows_dependencies():
+    graph = TaskGraph()
+    graph.add(1, [])
+    graph.add(2, [1])
+    graph.add(3, [1, 2])
+    assert graph.ready() == [1]
+
+    graph.set_status(1, "in_progress")
+    assert graph.ready() == []
+    graph.set_status(1, "done")
+    assert graph.ready() == [2]
+    graph.set_status(2, "done")
+    assert graph.ready() == [3]
+
+    # zurück auf pending: Dependents sind wieder blockiert
+    graph.set_status(1, "pending")
+    assert graph.ready() == [1]
+    assert graph.ready_count() == 1
+
+
+def test_dependency_added_before_its_task():
+    graph = TaskGraph()
+    graph.add(2, [1])
+    assert graph.ready() == []
+    graph.add(1, [], status="done")
+    assert graph.ready() == [2]
+
+
+def test_ready_order_is_by_id_not_by_readiness():
+    graph = TaskGraph()
+    graph.add(1, [])
+    graph.add(2, [1])
+    graph.add(3, [])
+    graph.set_status(1, "done")  # 2 wird nach 3 bereit
+    assert graph.ready() == [2, 3]
+
+
+def test_find_invalid_reports_unknown_deps_and_cycles():
+    tasks = [{"id": 1, "dependencies": [9]},
+             {"id": 2, "dependencies": [3]},
+             {"id": 3, "dependencies": [2]},
+             {"id": 4, "dependencies": [3]},
+             {"id": 5, "dependencies": []}]
+    invalid = TaskGraph.find_invalid(tasks)
+    assert invalid == {1: "Unbekannte Dependency: #9",
+                       2: "Dependency-Zyklus", 3: "Dependency-Zyklus",
+                       4: "Dependency-Zyklus"}
+
+
+@pytest.mark.parametrize("overrides", [{}, SQLITE], ids=["json", "sqlite"])
+def test_ready_tasks_in_id_order_on_both_backends(make_manager, overrides):
+    tm = make_manager(overrides=overrides)
+    tm.add_task("A")
+    tm.add_task("B", dependencies=[1])
+    tm.add_task("C")
+    tm.assign_task(1, "coding-agent")
+    tm.complete_task(1, "ok")
+    assert [task["id"] for task in tm.get_ready_tasks()] == [2, 3]
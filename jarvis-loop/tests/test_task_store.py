@@ -0,0 +1,241 @@
+"""
+Storage-Backends: Journal-Replay nach Absturz (JSON), Kopien statt
+Index-Einträgen, konkurrierende Prozesse auf SQLite, Ausschnitte und
+Statuswechsel (für das TUI)
+"""
+
+import json
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+SQLITE = {"storage": {"backend": "sqlite"}}
+
+# Kindprozess: Mutationen ins Journal, dann Absturz ohne Snapshot
+CRASHING_RUN = textwrap.dedent("""
+    import os, sys
+    sys.path.insert(0, sys.argv[1])
+    from task_manager import TaskManager
+    tm = TaskManager(sys.argv[2])
+    tm.store.auto_save_interval = 3600  # kein Snapshot mehr bis zum Absturz
+    tm.assign_task(1, "coding-agent")
+    tm.complete_task(1, "out 1", 0.1)
+    tm.assign_task(2, "coding-agent")
+    tm.add_task("nach Snapshot", "testing", dependencies=[1])
+    tm.increment_iteration()
+    tm.store.flush_log()
+    os._exit(1)
+""")
+
+# Kindprozess: beansprucht bereite Tasks, solange es welche gibt
+CLAIMING_WORKER = textwrap.dedent("""
+    import json, sys
+    sys.path.insert(0, sys.argv[1])
+    from task_manager import TaskManager
+
+    class SqliteTaskManager(TaskManager):
+        def _load_config(self):
+            config = super()._load_config()
+            config["storage"]["backend"] = "sqlite"
+            return config
+
+    tm = SqliteTaskManager(sys.argv[2])
+    claimed = []
+    while True:
+        ready = tm.get_ready_tasks()
+        if not ready:
+            break
+        for task in ready:
+            if tm.assign_task(task["id"], sys.argv[3]):
+                claimed.append(task["id"])
+                tm.complete_task(task["id"], "ok", 0.01)
+    tm.close()
+    print(json.dumps(claimed))
+""")
+
+
+def test_journal_replay_after_crash(make_manager, core_dir):
+    tm = make_manager()
+    for index in range(3):
+        tm.add_task(f"Task {index}")
+    tm.flush()
+    tm.close()
+
+    crash = subprocess.run([sys.executable, "-c", CRASHING_RUN,
+                            str(core_dir), str(tm.project_path)])
+    assert crash.returncode == 1
+
+    reopened = make_manager(create=False)
+    assert reopened.replayed_events >= 5
+    assert reopened.get_task(1)["status"] == "done"
+    assert reopened.get_output(1) == "out 1"
+    assert reopened.get_task(2)["status"] == "in_progress"
+    assert reopened.get_task(4)["title"] == "nach Snapshot"
+    status = reopened.get_status()
+    assert status["iteration"]["current"] == 1
+    assert status["iteration"]["cost_usd"] == pytest.approx(0.1)
+    assert [task["id"] for task in reopened.get_ready_tasks()] == [3, 4]
+
+
+def test_torn_journal_line_is_dropped(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    tm.add_task("B")
+    tm.store.flush_log()
+    session = tm.store.session_file
+    tm.store._writer.close()
+    intact = session.stat().st_size
+    with open(session, "ab") as f:
+        f.write(b'{"timestamp": "x", "type": "task_completed", "da')
+
+    reopened = make_manager(create=False)
+    assert [task["status"] for task in reopened.get_tasks()] == ["pending"] * 2
+    assert session.stat().st_size == intact
+
+
+def test_json_store_returns_copies(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    task = tm.get_task(1)
+    task["status"] = "done"
+    task["dependencies"].append(99)
+    tm.get_ready_tasks()[0]["title"] = "geändert"
+    tm.get_tasks()[0]["attempts"] = 5
+    tm.store.get_meta()["iteration"]["current"] = 99
+
+    fresh = tm.get_task(1)
+    assert (fresh["status"], fresh["dependencies"]) == ("pending", [])
+    assert (fresh["title"], fresh["attempts"]) == ("A", 0)
+    assert tm.get_status()["iteration"]["current"] == 0
+
+
+def test_sqlite_concurrent_processes_claim_each_task_once(make_manager,
+                                                          core_dir):
+    tm = make_manager(overrides=SQLITE)
+    for index in range(60):
+        tm.add_task(f"Task {index}", dependencies=[index] if index % 3 else [])
+    tm.close()
+
+    workers = [subprocess.Popen([sys.executable, "-c", CLAIMING_WORKER,
+                                 str(core_dir), str(tm.project_path),
+                                 f"worker-{index}"],
+                                stdout=subprocess.PIPE, text=True)
+               for index in range(4)]
+    claimed = []
+    for worker in workers:
+        out, _ = worker.communicate(timeout=60)
+        assert worker.returncode == 0
+        claimed.extend(json.loads(out))
+
+    assert sorted(claimed) == list(range(1, 61))
+    reopened = make_manager(overrides=SQLITE, create=False)
+    status = reopened.get_status()
+    assert status["tasks"]["done"] == 60
+    assert status["iteration"]["cost_usd"] == pytest.approx(0.6)
+
+
+def test_sqlite_lock_released_when_begin_fails(make_manager):
+    tm = make_manager(overrides={"storage": {
+        "backend": "sqlite", "sqlite_busy_timeout_sec": 0.1}})
+    tm.add_task("A")
+    blocker = sqlite3.connect(str(tm.store.db_file), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    with pytest.raises(sqlite3.OperationalError):
+        tm.add_task("B")
+    blocker.execute("ROLLBACK")
+    blocker.close()
+
+    added = []
+    writer = threading.Thread(target=lambda: added.append(tm.add_task("C")))
+    writer.start()
+    writer.join(5)
+    assert not writer.is_alive(), "Store-Lock nach fehlgeschlagenem BEGIN belegt"
+    assert added == [2]
+
+
+
+def test_sqlite_readers_wait_for_open_transaction(make_manager):
+    tm = make_manager(overrides=SQLITE)
+    tm.add_task("A")
+    inside, release = threading.Event(), threading.Event()
+
+    def writer():
+        with tm.store._transaction() as cur:
+            cur.execute("UPDATE tasks SET status = 'done' WHERE id = 1")
+            inside.set()
+            release.wait(5)
+            cur.execute("UPDATE tasks SET status = 'pending' WHERE id = 1")
+
+    counts = []
+    threads = [threading.Thread(target=writer),
+               threading.Thread(target=lambda: (
+                   inside.wait(5), counts.append(tm.store.count_by_status())))]
+    for thread in threads:
+        thread.start()
+    inside.wait(5)
+    threads[1].join(0.2)
+    assert threads[1].is_alive(), "Leser sieht offene Transaktion"
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert counts[0]["done"] == 0
+
+@pytest.mark.parametrize("overrides", [{}, SQLITE], ids=["json", "sqlite"])
+def test_tasks_page_and_status_changes(make_manager, overrides):
+    tm = make_manager(overrides=overrides)
+    for index in range(10):
+        tm.add_task(f"Task {index}")
+    assert [task["id"] for task in tm.get_tasks_page(3)] == [1, 2, 3]
+    assert [task["id"] for task in tm.get_tasks_page(3, offset=8)] == [9, 10]
+    assert len(tm.get_tasks_page(None)) == 10
+
+    cursor, changed = tm.get_status_changes()
+    assert changed == []
+    tm.assign_task(4, "coding-agent")
+    tm.complete_task(4, "ok")
+    tm.assign_task(2, "coding-agent")
+    cursor, changed = tm.get_status_changes(cursor)
+    assert [(task["id"], task["status"]) for task in changed] == [
+        (4, "done"), (2, "in_progress")]
+    tm.renew_leases([2])  # kein Statuswechsel
+    assert tm.get_status_changes(cursor) == (cursor, [])
+
+
+def test_sqlite_status_seq_added_to_existing_database(make_manager):
+    tm = make_manager(overrides=SQLITE)
+    tm.add_task("A")
+    db_file = tm.store.db_file
+    tm.close()
+    conn = sqlite3.connect(str(db_file))
+    conn.executescript("""
+        DROP INDEX idx_tasks_status_seq;
+        ALTER TABLE tasks DROP COLUMN status_seq;
+    """)
+    conn.close()
+
+    reopened = make_manager(overrides=SQLITE, create=False)
+    cursor, _ = reopened.get_status_changes()
+    reopened.assign_task(1, "coding-agent")
+    assert [task["id"] for task in reopened.get_status_changes(cursor)[1]] == [1]
+
+
+@pytest.mark.parametrize("overrides", [{}, SQLITE], ids=["json", "sqlite"])
+def test_active_position(make_manager, overrides):
+    tm = make_manager(overrides=overrides)
+    assert tm.get_active_position() == 0
+    tm.add_task("A")
+    tm.add_task("B", dependencies=[1])
+    tm.add_task("C")
+    tm.add_task("D")
+    tm.assign_task(1, "coding-agent")
+    tm.fail_task(1, "kaputt")
+    assert tm.get_active_position() == 2  # C bereit, B blockiert
+    tm.assign_task(4, "coding-agent")
+    tm.assign_task(3, "coding-agent")
+    assert tm.get_active_position() == 2  # C läuft
+    tm.complete_task(3, "ok")
+    assert tm.get_active_position() == 3  # D läuft
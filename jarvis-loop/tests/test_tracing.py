@@ -0,0 +1,85 @@
+"""
+Tracing: Phasen pro Ausführung, Slots, Export als Chrome-Trace und
+OTLP-JSON mit Dependency-Links; opt-in über tracing.enabled
+"""
+
+import json
+
+from agent_orchestrator import create_orchestrator
+from tracing import PHASES, Tracer
+
+TRACING = {"tracing": {"enabled": True, "export": ["chrome", "otlp"]}}
+
+
+def test_phases_and_lane_reuse():
+    tracer = Tracer({"enabled": True})
+    tracer.begin_run()
+    for task_id in (1, 2):
+        tracer.admit({"id": task_id, "title": "T"}, "coding-agent")
+    assert tracer.active(1).phase == "admitted"
+    tracer.spawn(1)
+    tracer.run_started(1)
+    assert tracer.active(1).phase == "running"
+    tracer.run_finished(1)
+    tracer.report({"id": 1}, "coding-agent")
+    tracer.persist(1)
+    tracer.finish(1, "done")
+
+    trace = tracer.finished[0]
+    assert [name for name, _, _ in trace.phases()] == list(PHASES)
+    assert all(end is not None and start <= end
+               for _, start, end in trace.phases())
+    assert tracer.active(2).lane == 1
+    tracer.admit({"id": 3, "title": "T"}, "coding-agent")
+    assert tracer.active(3).lane == 0  # Slot von #1 wieder frei
+
+
+def test_disabled_tracer_records_nothing(tmp_path):
+    tracer = Tracer()
+    tracer.begin_run()
+    tracer.admit({"id": 1}, "coding-agent")
+    assert tracer.active(1) is None
+    assert tracer.end_run(tmp_path) == []
+
+
+def run(tm):
+    orchestrator = create_orchestrator(str(tm.project_path), tm.config)
+    orchestrator.log_handler = lambda message: None
+    return orchestrator, orchestrator.run_loop(tm)
+
+
+def test_tracing_is_opt_in(make_manager):
+    tm = make_manager()
+    tm.add_task("A")
+    orchestrator, results = run(tm)
+    assert orchestrator.tracer is None
+    assert "traces" not in results
+    assert not (tm.project_path / "output" / "traces").exists()
+
+
+def test_export_links_dependencies(make_manager):
+    tm = make_manager(overrides=TRACING)
+    tm.add_task("A")
+    tm.add_task("B", dependencies=[1])
+    _, results = run(tm)
+    chrome_file, otlp_file = sorted(results["traces"], key=len)
+
+    events = json.loads(open(chrome_file).read())["traceEvents"]
+    tasks = [event["name"] for event in events
+             if event.get("ph") == "X" and event["cat"] != "phase"]
+    assert tasks == ["#1 A", "#2 B"]
+    assert [event["ph"] for event in events
+            if event.get("cat") == "dependency"] == ["s", "f"]
+
+    otlp = json.loads(open(otlp_file).read())
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    run_span = spans[0]
+    by_name = {span["name"]: span for span in spans}
+    assert run_span["name"] == "run_loop"
+    assert by_name["task #1"]["parentSpanId"] == run_span["spanId"]
+    assert by_name["task #2"]["links"] == [
+        {"traceId": run_span["traceId"],
+         "spanId": by_name["task #1"]["spanId"]}]
+    phases = [span["name"] for span in spans
+              if span.get("parentSpanId") == by_name["task #2"]["spanId"]]
+    assert phases == list(PHASES)
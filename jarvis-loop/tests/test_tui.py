@@ -0,0 +1,89 @@
+"""
+TUI: pro Frame nur sichtbare Tasks (ab den aktiven, mit Blättern) und
+Statuswechsel laden, nur geänderte Bereiche neu zeichnen (nur mit rich)
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("rich")
+from rich.console import Console
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "ui"))
+from jarvis_tui import JarvisTUI
+
+
+@pytest.fixture
+def tui(tmp_path):
+    tui = JarvisTUI(str(tmp_path))
+    tui.console = Console(file=io.StringIO(), width=160, height=30,
+                          force_terminal=True)
+    return tui
+
+
+def test_frame_loads_only_visible_tasks(make_manager, tui):
+    tm = make_manager()
+    for index in range(200):
+        tm.add_task(f"Task {index}")
+    status = tui.collect_status(tm)
+    assert len(status["tasks_detail"]) == tui._visible_rows() == 19
+    assert status["tasks"]["total"] == 200
+
+
+def test_page_follows_active_tasks_and_scrolls(make_manager, tui):
+    tm = make_manager()
+    for index in range(200):
+        tm.add_task(f"Task {index}")
+    for task_id in range(1, 101):
+        tm.assign_task(task_id, "coding-agent")
+        tm.complete_task(task_id, "ok")
+    tm.assign_task(150, "coding-agent")
+
+    def first_id():
+        return tui.collect_status(tm)["tasks_detail"][0]["id"]
+
+    assert first_id() == 99  # zwei fertige über dem ersten bereiten (#101)
+    tui._handle_key('N', tm)
+    assert first_id() == 118
+    for _ in range(10):
+        tui._handle_key('N', tm)
+    assert first_id() == 182  # letzte Seite
+    tui._handle_key('P', tm)
+    assert first_id() == 163
+    assert JarvisTUI._tasks_title(tui.collect_status(tm), 19) == (
+        "📋 Tasks 163-181 von 200")
+
+
+def test_finished_task_tracked_from_status_changes(make_manager, tui):
+    tm = make_manager()
+    for index in range(5):
+        tm.add_task(f"Task {index}")
+    tm.assign_task(1, "coding-agent")
+    tm.complete_task(1, "vorher")
+    tui.collect_status(tm)
+    assert tui._output_task is None  # vor dem ersten Frame fertig
+
+    tm.assign_task(5, "coding-agent")
+    tm.fail_task(5, "kaputt")
+    tm.assign_task(3, "coding-agent")
+    tui.collect_status(tm)
+    assert tui._output_task == 5
+
+
+def test_unchanged_frame_is_not_redrawn(make_manager, tui):
+    tm = make_manager()
+    for index in range(50):
+        tm.add_task(f"Task {index}")
+    tui.start_display(screen=False)
+    try:
+        assert tui.update_display(tui.collect_status(tm)) is True
+        assert tui.update_display(tui.collect_status(tm)) is False
+        tm.assign_task(2, "coding-agent")
+        assert tui.update_display(tui.collect_status(tm)) is True
+        tm.assign_task(40, "coding-agent")  # nicht sichtbar
+        assert tui.update_display(tui.collect_status(tm)) is False
+    finally:
+        tui.stop_display()
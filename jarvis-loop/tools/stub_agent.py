@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+JARVIS Loop - Stub Agent
+Lokaler Ersatz für einen echten Agent (Tests, Benchmarks)
+
+Liest den Task-Prompt von stdin, "arbeitet" eine Weile, streamt
+Fortschritt nach stdout/stderr und meldet Kosten als JARVIS_COST=<usd>.
+
+Usage:
+  python tools/stub_agent.py --latency 2 --cost 0.10
+  python tools/stub_agent.py --fail-rate 0.2      # 20% Fehlschläge
+  python tools/stub_agent.py --transient-rate 0.3 # 30% vorübergehend (Exit 75)
+  python tools/stub_agent.py --rate-limit-rate 0.1  # 10% HTTP 429
+  python tools/stub_agent.py --hang               # für Timeout-Tests
+  python tools/stub_agent.py --startup 1          # 1s Start/Kontext-Aufbau
+
+Batch-Prompts (JARVIS LOOP BATCH) werden Task für Task abgearbeitet,
+mit Abschnitten "=== JARVIS TASK #<id> ===" und JARVIS_TASK_STATUS.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS Loop Stub Agent")
+    parser.add_argument("--agent", default=os.environ.get("JARVIS_AGENT", "stub"))
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="Arbeitszeit in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Zufällige Abweichung der Arbeitszeit (+/- Sekunden)")
+    parser.add_argument("--cost", type=float, default=0.10,
+                        help="Gemeldete Kosten in USD")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Anteil fehlschlagender Tasks (0..1)")
+    parser.add_argument("--transient-rate", type=float, default=0.0,
+                        help="Anteil vorübergehender Fehler (Exit-Code 75)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Anteil simulierter Rate-Limits (HTTP 429)")
+    parser.add_argument("--straggler-rate", type=float, default=0.0,
+                        help="Anteil von Nachzüglern (Tail-Latenz)")
+    parser.add_argument("--straggler-factor", type=float, default=10.0,
+                        help="Nachzügler laufen latency x Faktor")
+    parser.add_argument("--startup", type=float, default=0.0,
+                        help="Start-/Kontext-Aufbauzeit pro Session (Sekunden)")
+    parser.add_argument("--hang", action="store_true",
+                        help="Nie beenden (Timeout-Test)")
+    args = parser.parse_args()
+
+    prompt = sys.stdin.read()
+    task_id = os.environ.get("JARVIS_TASK_ID", "?")
+    title = next((line.split(":", 1)[1].strip() for line in prompt.splitlines()
+                  if line.startswith("JARVIS LOOP TASK")), "unbekannt")
+
+    print(f"{args.agent}: starte Task #{task_id} ({title})", flush=True)
+    print(f"{args.agent}: Prompt {len(prompt)} Zeichen", file=sys.stderr,
+          flush=True)
+
+    if args.hang:
+        while True:
+            time.sleep(1)
+
+    time.sleep(args.startup)
+    if prompt.lstrip().startswith("JARVIS LOOP BATCH"):
+        run_batch(args, prompt)
+        return
+
+    latency = max(0.0, args.latency + random.uniform(-args.jitter, args.jitter))
+    if random.random() < args.straggler_rate:
+        latency *= args.straggler_factor
+    steps = 3
+    for step in range(1, steps + 1):
+        time.sleep(latency / steps)
+        print(f"{args.agent}: Schritt {step}/{steps}", flush=True)
+
+    print(f"JARVIS_COST={args.cost:.4f}", flush=True)
+
+    roll = random.random()
+    if roll < args.rate_limit_rate:
+        print(f"{args.agent}: HTTP 429 Too Many Requests (Retry-After: 1)",
+              file=sys.stderr, flush=True)
+        sys.exit(1)
+    if roll < args.rate_limit_rate + args.transient_rate:
+        print(f"{args.agent}: API vorübergehend nicht erreichbar (503)",
+              file=sys.stderr, flush=True)
+        sys.exit(75)
+
+    if random.random() < args.fail_rate:
+        print(f"{args.agent}: Task #{task_id} fehlgeschlagen", file=sys.stderr,
+              flush=True)
+        sys.exit(1)
+
+    print(f"{args.agent}: Task #{task_id} fertig", flush=True)
+
+
+def run_batch(args, prompt: str) -> None:
+    """Arbeitet alle Tasks eines Batch-Prompts in einer Session ab"""
+    task_ids = re.findall(r"^JARVIS LOOP TASK #(\d+):", prompt, re.MULTILINE)
+    for task_id in task_ids:
+        time.sleep(max(0.0, args.latency
+                       + random.uniform(-args.jitter, args.jitter)))
+        print(f"=== JARVIS TASK #{task_id} ===", flush=True)
+        if random.random() < args.fail_rate:
+            print(f"{args.agent}: Task #{task_id} fehlgeschlagen", flush=True)
+            print("JARVIS_TASK_STATUS=failed", flush=True)
+        else:
+            print(f"{args.agent}: Task #{task_id} fertig", flush=True)
+            print("JARVIS_TASK_STATUS=ok", flush=True)
+    print(f"JARVIS_COST={args.cost * len(task_ids):.4f}", flush=True)
+
+    roll = random.random()
+    if roll < args.transient_rate:
+        print(f"{args.agent}: API vorübergehend nicht erreichbar (503)",
+              file=sys.stderr, flush=True)
+        sys.exit(75)
+
+
+if __name__ == "__main__":
+    main()
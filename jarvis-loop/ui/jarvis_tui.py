@@ -3,13 +3,23 @@
 JARVIS Loop - Terminal UI
 Ralph TUI Style Interface für OpenClaw
 Links: Tasks | Rechts: Live Log | Unten: Status
+
+Das Layout wird einmal gebaut und von rich.live.Live gezeichnet (ohne
+console.clear()). Pro Frame werden nur Bereiche neu gerendert, deren Inhalt
+sich geändert hat; Task-Zeilen sind pro Task gecacht. Geladen werden nur die
+sichtbaren Tasks und die Statuswechsel seit dem letzten Frame (Cursor des
+Stores) - kein Durchlauf über alle Tasks. Der Ausschnitt beginnt bei den
+laufenden bzw. bereiten Tasks und folgt ihnen; [N]/[P] blättern. Ändert sich nichts, wird nicht
+gezeichnet. Takt: ui.refresh_rate_ms.
 """
 
 import sys
 import time
 import json
+import shutil
+import threading
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Versuche rich zu importieren, sonst simple Alternative
 try:
@@ -26,6 +36,17 @@ except ImportError:
     print("⚠️  'rich' nicht installiert. Nutze simples UI.")
     print("Installieren: pip install rich")
 
+from session_index import format_event
+
+CONTEXT_ROWS = 2  # zuletzt fertige Tasks über den laufenden
+
+STATUS_ICONS = {
+    "pending": "⏳",
+    "in_progress": "🔄",
+    "done": "✅",
+    "failed": "❌"
+}
+
 
 class JarvisTUI:
     """
@@ -41,6 +62,21 @@ class JarvisTUI:
         self.running = True
         self.show_traces = False
         self.current_log = []
+        self.orchestrator = None
+        self.loop_thread = None
+        self.task_manager = None
+        self.show_output = False
+        self.show_history = False
+        self.scroll = 0  # Zeilen relativ zu den aktiven Tasks ([N]/[P])
+        self._change_cursor: Optional[int] = None  # Statuswechsel bis hier
+        self._output_task: Optional[int] = None  # zuletzt fertiger Task
+        self._output_cache = (None, "")  # (task_id, Output-Ende)
+        self.refresh_sec = 1.0  # aus ui.refresh_rate_ms (run())
+        self.layout: Optional[Layout] = None  # einmal gebaut
+        self.live: Optional[Live] = None
+        self._rows: Dict[int, tuple] = {}  # task_id -> (Signatur, Zeile)
+        self._signatures: Dict[str, object] = {}  # Bereich -> letzter Frame
+        self._size = None  # Terminal-Größe beim letzten Frame
         
     def create_layout(self) -> Layout:
         """Erstellt Layout wie im Ralph Loop Video"""
@@ -61,16 +97,23 @@ class JarvisTUI:
         
         return layout
     
-    def render_header(self, status: Dict) -> Panel:
+    def _header_content(self, status: Dict) -> str:
         """Obere Status-Leiste"""
         title = f"🎯 JARVIS LOOP v1.0 - {status['project']['name']}"
         iteration = f"Iteration: {status['iteration']['current']}/{status['iteration']['limit']}"
         cost = f"Cost: ${status['iteration']['cost_usd']:.2f}"
+        policy = f"Policy: {status.get('policy', '-')}"
         
-        content = f"{title} | {iteration} | {cost}"
-        return Panel(content, style="bold blue")
+        content = f"{title} | {iteration} | {cost} | {policy}"
+        windows = self._format_windows(status)
+        if windows:
+            content += f" | Parallel: {windows}"
+        cache = self._format_cache(status)
+        if cache:
+            content += f" | Cache: {cache}"
+        return content
     
-    def render_tasks(self, status: Dict) -> Panel:
+    def _tasks_panel(self, rows: List[tuple], title: str) -> Panel:
         """Linke Seite: Task List (wie im Video [01:32])"""
         table = Table(show_header=True, header_style="bold magenta")
         table.add_column("#", style="dim", width=4)
@@ -78,51 +121,128 @@ class JarvisTUI:
         table.add_column("Task", width=30)
         table.add_column("Agent", width=12)
         
-        for task in status.get('tasks_detail', []):
-            status_icon = {
-                "pending": "⏳",
-                "in_progress": "🔄",
-                "done": "✅",
-                "failed": "❌"
-            }.get(task['status'], "⏳")
-            
-            agent = task.get('assigned_agent', '-') or '-'
-            
-            table.add_row(
-                str(task['id']),
-                status_icon,
-                task['title'][:28],
-                agent[:10]
-            )
+        for row in rows:
+            table.add_row(*row)
         
-        return Panel(table, title="📋 Tasks", border_style="blue")
+        return Panel(table, title=title, border_style="blue")
     
-    def render_log(self) -> Panel:
-        """Rechte Seite: Live Log (wie im Video)"""
+    def _task_row(self, task: Dict) -> tuple:
+        """Zeile eines Tasks - nur neu gebaut, wenn sich der Task geändert hat"""
+        agent = task.get('assigned_agent', '-') or '-'
+        signature = (task['status'], task['title'], agent)
+        cached = self._rows.get(task['id'])
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        row = (str(task['id']), STATUS_ICONS.get(task['status'], "⏳"),
+               task['title'][:28], agent[:10])
+        self._rows[task['id']] = (signature, row)
+        return row
+    
+    def _log_content(self) -> tuple:
+        """
+        Rechte Seite: Live Log (wie im Video), Traces ([T]), Output ([O]),
+        History ([H]) - als (Titel, Text, Rahmenfarbe)
+        """
+        if self.show_traces:
+            return "🧭 Traces", "\n".join(self._format_traces()), "magenta"
+        if self.show_history:
+            title = (f"📜 History #{self._output_task}"
+                     if self._output_task is not None else "📜 History")
+            return title, "\n".join(self._load_history()), "yellow"
+        if self.show_output and self._output_task is not None:
+            lines = self._load_output(self._output_task).splitlines()[-15:]
+            return f"📄 Output #{self._output_task}", "\n".join(lines), "cyan"
         # Zeige letzte 15 Log-Einträge
-        log_text = "\n".join(self.current_log[-15:])
-        return Panel(log_text, title="🖥️  Live Output", border_style="green")
+        return "🖥️  Live Output", "\n".join(self.current_log[-15:]), "green"
     
     def render_footer(self) -> Panel:
         """Untere Status-Leiste mit Controls"""
-        controls = "[S] Start/Pause | [T] Traces | [H] History | [Q] Quit"
+        controls = ("[S] Start/Pause | [T] Traces | [O] Output | [H] History | "
+                    "[N/P] Blättern | [Q] Quit")
         return Panel(controls, style="dim")
     
-    def update_display(self, status: Dict) -> None:
-        """Aktualisiert komplettes UI"""
+    def start_display(self, screen: bool = True) -> None:
+        """Startet Live auf dem persistenten Layout (gezeichnet wird manuell)"""
+        if not RICH_AVAILABLE or self.live is not None:
+            return
+        self.live = Live(self._ensure_layout(), console=self.console,
+                         screen=screen, auto_refresh=False)
+        self.live.start()
+    
+    def stop_display(self) -> None:
+        if self.live is not None:
+            self.live.stop()
+            self.live = None
+    
+    def update_display(self, status: Dict) -> bool:
+        """
+        Aktualisiert nur geänderte Bereiche und zeichnet nur, wenn sich etwas
+        geändert hat (gibt zurück, ob gezeichnet wurde)
+        """
         if not RICH_AVAILABLE:
             self._simple_ui(status)
-            return
+            return True
         
-        layout = self.create_layout()
+        layout = self._ensure_layout()
+        size = self.console.size
+        changed = size != self._size
+        self._size = size
         
-        layout["header"].update(self.render_header(status))
-        layout["tasks"].update(self.render_tasks(status))
-        layout["log"].update(self.render_log())
-        layout["footer"].update(self.render_footer())
+        header = self._header_content(status)
+        changed |= self._update_region(
+            "header", header, lambda: Panel(header, style="bold blue"))
+        rows = [self._task_row(task)
+                for task in status.get('tasks_detail', [])]
+        title = self._tasks_title(status, len(rows))
+        changed |= self._update_region(
+            "tasks", (title, rows), lambda: self._tasks_panel(rows, title))
+        title, text, border = self._log_content()
+        changed |= self._update_region(
+            "log", (title, text, border),
+            lambda: Panel(text, title=title, border_style=border))
         
-        self.console.clear()
-        self.console.print(layout)
+        if not changed:
+            return False
+        if self.live is not None:
+            self.live.refresh()
+        else:
+            # Ohne Live (z.B. einmalige Ausgabe): wie früher neu ausgeben
+            self.console.clear()
+            self.console.print(layout)
+        return True
+    
+    def _ensure_layout(self) -> Layout:
+        """Persistentes Layout (Footer ist statisch und wird einmal gesetzt)"""
+        if self.layout is None:
+            self.layout = self.create_layout()
+            self.layout["footer"].update(self.render_footer())
+            self._signatures.clear()
+        return self.layout
+    
+    def _update_region(self, name: str, signature, render) -> bool:
+        """Ersetzt einen Bereich nur, wenn seine Signatur sich geändert hat"""
+        if self._signatures.get(name) == signature:
+            return False
+        self._signatures[name] = signature
+        self.layout[name].update(render())
+        return True
+    
+    @staticmethod
+    def _tasks_title(status: Dict, count: int) -> str:
+        """z.B. '📋 Tasks 41-59 von 200'"""
+        total = status.get('tasks', {}).get('total', count)
+        if not count or count >= total:
+            return "📋 Tasks"
+        first = status.get('tasks_offset', 0) + 1
+        return f"📋 Tasks {first}-{first + count - 1} von {total}"
+    
+    def _visible_rows(self) -> int:
+        """Task-Zeilen, die ins Panel passen (Rest würde abgeschnitten)"""
+        if not RICH_AVAILABLE:
+            # simples UI: Kopf, Log und Controls brauchen ca. 25 Zeilen
+            return max(5, shutil.get_terminal_size().lines - 25)
+        # Header + Footer (6), Panel-Rahmen (2), Tabellenkopf (3)
+        return max(1, self.console.size.height - 11)
     
     def _simple_ui(self, status: Dict) -> None:
         """Einfaches UI ohne rich"""
@@ -132,20 +252,33 @@ class JarvisTUI:
         print(f"🎯 JARVIS LOOP - {status['project']['name']}")
         print("=" * 60)
         print(f"Iteration: {status['iteration']['current']}/{status['iteration']['limit']} | "
-              f"Cost: ${status['iteration']['cost_usd']:.2f}")
+              f"Cost: ${status['iteration']['cost_usd']:.2f} | "
+              f"Policy: {status.get('policy', '-')}")
+        windows = self._format_windows(status)
+        if windows:
+            print(f"Parallel: {windows}")
+        cache = self._format_cache(status)
+        if cache:
+            print(f"Cache: {cache}")
         print("-" * 60)
         
-        print("\n📋 TASKS:")
+        print(f"\n{self._tasks_title(status, len(status.get('tasks_detail', [])))}:")
         for task in status.get('tasks_detail', []):
-            icon = {"pending": "⏳", "in_progress": "🔄", "done": "✅", "failed": "❌"}.get(task['status'], "⏳")
+            icon = STATUS_ICONS.get(task['status'], "⏳")
             print(f"  {icon} #{task['id']}: {task['title'][:40]}")
         
-        print("\n🖥️  LIVE LOG:")
-        for line in self.current_log[-10:]:
-            print(f"  {line}")
+        if self.show_traces:
+            print("\n🧭 TRACES:")
+            for line in self._format_traces():
+                print(f"  {line}")
+        else:
+            print("\n🖥️  LIVE LOG:")
+            for line in self.current_log[-10:]:
+                print(f"  {line}")
         
         print("\n" + "-" * 60)
-        print("[S] Start/Pause | [T] Traces | [H] History | [Q] Quit")
+        print("[S] Start/Pause | [T] Traces | [O] Output | [H] History | "
+              "[N/P] Blättern | [Q] Quit")
         print("=" * 60)
     
     def add_log(self, message: str) -> None:
@@ -178,32 +311,38 @@ class JarvisTUI:
         
         return None
     
-    def run(self, task_manager) -> None:
+    def run(self, task_manager, orchestrator=None) -> None:
         """Haupt-Loop für UI"""
+        self.orchestrator = orchestrator
+        self.task_manager = task_manager
+        if orchestrator is not None:
+            orchestrator.log_handler = self.add_log
+        
         self.add_log("JARVIS Loop gestartet...")
         self.add_log("Drücke 'S' zum Starten")
         
+        refresh_ms = task_manager.config.get("ui", {}).get("refresh_rate_ms", 1000)
+        self.refresh_sec = max(0.05, refresh_ms / 1000)
+        self.start_display()
         try:
             while self.running:
-                # Status laden
-                status = task_manager.get_status()
-                
-                # Tasks Detail hinzufügen
-                data = task_manager._load_tasks()
-                status['tasks_detail'] = data.get('tasks', [])
-                
                 # UI aktualisieren
-                self.update_display(status)
+                self.update_display(self.collect_status(task_manager))
                 
                 # Input prüfen
                 key = self.handle_input()
                 if key:
                     self._handle_key(key, task_manager)
                 
-                time.sleep(1)  # Refresh Rate
+                time.sleep(self.refresh_sec)  # Refresh Rate
                 
         except KeyboardInterrupt:
+            self.stop_display()
             print("\n👋 Beendet.")
+        finally:
+            self.stop_display()
+            if self.orchestrator is not None:
+                self.orchestrator.stop()
     
     def _handle_key(self, key: str, task_manager) -> None:
         """Verarbeitet Tasten"""
@@ -212,16 +351,144 @@ class JarvisTUI:
             self.running = False
             
         elif key == 'S':
-            self.add_log("Start/Pause gedrückt")
-            # Hier würde Start/Pause Logik kommen
+            self._toggle_loop(task_manager)
             
         elif key == 'T':
             self.show_traces = not self.show_traces
+            self.show_output = self.show_history = False
             self.add_log(f"Traces: {'ON' if self.show_traces else 'OFF'}")
             
+        elif key == 'O':
+            self.show_output = not self.show_output
+            self.show_history = self.show_traces = False
+            if self.show_output and self._output_task is None:
+                self.add_log("Noch kein Task fertig")
+            
         elif key == 'H':
-            self.add_log("Zeige History...")
-            # History anzeigen
+            self.show_history = not self.show_history
+            self.show_output = self.show_traces = False
+            self.add_log(f"History: {'ON' if self.show_history else 'OFF'}")
+            
+        elif key in ('N', 'P'):
+            page = self._visible_rows()
+            self.scroll += page if key == 'N' else -page
+    
+    def collect_status(self, task_manager) -> Dict:
+        """
+        Status für einen Frame: Zähler, nur die sichtbaren Tasks und die
+        Statuswechsel seit dem letzten Frame
+        """
+        status = task_manager.get_status()
+        rows = self._visible_rows()
+        status['tasks_offset'] = self._page_offset(
+            task_manager, status['tasks']['total'], rows)
+        status['tasks_detail'] = task_manager.get_tasks_page(
+            rows, status['tasks_offset'])
+        self._track_finished(task_manager)
+        status['policy'] = self._policy_name(task_manager)
+        if self.orchestrator is not None:
+            status['concurrency'] = self.orchestrator.get_concurrency_windows()
+            status['cache'] = self.orchestrator.get_cache_stats()
+        return status
+    
+    def _page_offset(self, task_manager, total: int, rows: int) -> int:
+        """
+        Anfang des Ausschnitts: ab dem ersten laufenden oder bereiten Task
+        (CONTEXT_ROWS fertige davor), verschoben um scroll
+        """
+        anchor = max(0, task_manager.get_active_position() - CONTEXT_ROWS)
+        offset = max(0, min(anchor + self.scroll, total - rows))
+        if self.scroll:
+            self.scroll = offset - anchor  # nicht über die Enden hinaus
+        return offset
+    
+    def _track_finished(self, task_manager) -> None:
+        """Merkt sich den zuletzt fertig gewordenen Task (für [O])"""
+        if self._change_cursor is None:
+            # erster Frame: nur Startpunkt, vorher Fertiges zählt nicht
+            self._change_cursor, _ = task_manager.get_status_changes()
+            return
+        self._change_cursor, changed = task_manager.get_status_changes(
+            self._change_cursor)
+        for task in changed:
+            if task['status'] in ("done", "failed"):
+                self._output_task = task['id']
+    
+    def _load_output(self, task_id: int) -> str:
+        """Ende des Outputs - erst beim Anzeigen und nur einmal pro Task"""
+        if self._output_cache[0] != task_id:
+            output = self.task_manager.get_output(task_id, max_bytes=4096,
+                                                  tail=True)
+            self._output_cache = (task_id, output or "(kein Output)")
+        return self._output_cache[1]
+    
+    def _load_history(self) -> List[str]:
+        """
+        Letzte Events des zuletzt fertigen Tasks (bzw. der Session) über
+        den Offset-Index - nur neue Journal-Bytes werden nachindiziert
+        """
+        events = self.task_manager.query_history(task_id=self._output_task,
+                                                 limit=15, newest=True)
+        return [format_event(event) for event in events] or ["(keine Events)"]
+    
+    def _format_traces(self) -> List[str]:
+        """
+        Laufende Agents mit aktueller Phase und Dauer pro Phase, z.B.
+        '#12 coding   running   4.2s  queued 0.3 · spawned 0.0 · running 3.9'
+        """
+        if self.orchestrator is None:
+            return ["(kein Orchestrator verbunden)"]
+        lines = []
+        for trace in self.orchestrator.get_agent_traces()[:15]:
+            agent = trace['agent'].replace('-agent', '')
+            if "phase" not in trace:
+                lines.append(f"#{trace['task_id']:<4} {agent:<8} "
+                             f"{trace['status']:<9} seit {trace['started'][11:19]}")
+                continue
+            phases = " · ".join(f"{name} {seconds:.1f}"
+                                for name, seconds in trace['phases'].items())
+            retry = f" (Versuch {trace['attempt']})" if trace['attempt'] > 1 else ""
+            lines.append(f"#{trace['task_id']:<4} {agent:<8} {trace['phase']:<9} "
+                         f"{trace['elapsed_sec']:5.1f}s  {phases}{retry}")
+        return lines or ["(keine laufenden Agents)"]
+    
+    def _policy_name(self, task_manager) -> str:
+        """Aktive Scheduling-Policy (laut Orchestrator oder Config)"""
+        if self.orchestrator is not None and self.orchestrator.policy:
+            return self.orchestrator.policy.name
+        return task_manager.config.get("scheduling", {}).get("policy", "fifo")
+    
+    @staticmethod
+    def _format_windows(status: Dict) -> str:
+        """AIMD-Fenster pro Agent-Typ, z.B. 'coding 3 · testing 1'"""
+        windows = status.get('concurrency') or {}
+        return " · ".join(f"{agent.replace('-agent', '')} {window}"
+                          for agent, window in sorted(windows.items()))
+    
+    @staticmethod
+    def _format_cache(status: Dict) -> str:
+        """Result-Cache Treffer, z.B. '12 Hits / 3 Misses'"""
+        cache = status.get('cache')
+        if not cache:
+            return ""
+        return f"{cache['hits']} Hits / {cache['misses']} Misses"
+    
+    def _toggle_loop(self, task_manager) -> None:
+        """Start/Pause: startet Dispatch-Loop im Hintergrund oder pausiert ihn"""
+        if self.orchestrator is None:
+            self.add_log("Kein Orchestrator verbunden")
+            return
+        
+        if self.loop_thread is None or not self.loop_thread.is_alive():
+            self.orchestrator.resume_all()
+            self.loop_thread = threading.Thread(
+                target=self.orchestrator.run_loop, args=(task_manager,),
+                daemon=True)
+            self.loop_thread.start()
+        elif self.orchestrator.paused:
+            self.orchestrator.resume_all()
+        else:
+            self.orchestrator.pause_all()
 
 
 # Mock für Windows ohne rich
@@ -230,6 +497,7 @@ import os
 if __name__ == "__main__":
     # Test
     from task_manager import TaskManager
+    from agent_orchestrator import AgentOrchestrator
     
     tm = TaskManager("./test_tui")
     tm.create_project("Test", "Test Projekt")
@@ -241,6 +509,6 @@ if __name__ == "__main__":
     tui.add_log("Warte auf Start...")
     
     try:
-        tui.run(tm)
+        tui.run(tm, AgentOrchestrator("./test_tui"))
     except KeyboardInterrupt:
         print("\nBeendet")